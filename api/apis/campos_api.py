@@ -1,11 +1,14 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
 from ..models import Campo
 from ..serializers import CampoSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..response_cache import cache_response
+from ..sparse_fields import aplicar_fieldsets, CamposInvalidos
+from ..read_serializers import serializar_lista
 
 @extend_schema(
     operation_id='get_campos',
@@ -14,17 +17,13 @@ from ..utils import get_usuario_id_from_request
     responses={200: CampoSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Campo)
 def get_campos(request, pk=None):
     """
     Obtiene una lista de campos o un campo específico si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Campo.objects.filter(usuario_id=usuario_id)
     
@@ -33,8 +32,11 @@ def get_campos(request, pk=None):
         serializer = CampoSerializer(campo)
         return Response(serializer.data)
     else:
+        try:
+            queryset, opciones = aplicar_fieldsets(request, queryset, CampoSerializer)
+        except CamposInvalidos as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         skip = int(request.query_params.get('skip', 0))
         limit = int(request.query_params.get('limit', 100))
         campos = queryset[skip:skip+limit]
-        serializer = CampoSerializer(campos, many=True)
-        return Response(serializer.data)
+        return Response(serializar_lista(campos, CampoSerializer, **opciones))
@@ -1,11 +1,12 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
 from ..models import Costo
 from ..serializers import CostoSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..response_cache import cache_response
+from ..read_serializers import serializar_lista
 
 @extend_schema(
     operation_id='get_costos',
@@ -14,17 +15,13 @@ from ..utils import get_usuario_id_from_request
     responses={200: CostoSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Costo)
 def get_costos(request, pk=None):
     """
     Obtiene una lista de costos o un costo específico si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Costo.objects.filter(usuario_id=usuario_id)
     
@@ -34,8 +31,7 @@ def get_costos(request, pk=None):
         return Response(serializer.data)
     else:
         costos = queryset
-        serializer = CostoSerializer(costos, many=True)
-        return Response(serializer.data)
+        return Response(serializar_lista(costos, CostoSerializer))
 
 @extend_schema(
     operation_id='get_costos_pagados',
@@ -44,21 +40,16 @@ def get_costos(request, pk=None):
     responses={200: CostoSerializer(many=True)}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Costo)
 def get_costos_pagados(request):
     """
     Obtiene una lista de costos pagados.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     costos = Costo.objects.filter(usuario_id=usuario_id, pagado=True)
-    serializer = CostoSerializer(costos, many=True)
-    return Response(serializer.data)
+    return Response(serializar_lista(costos, CostoSerializer))
 
 @extend_schema(
     operation_id='get_costos_pendientes',
@@ -67,18 +58,13 @@ def get_costos_pagados(request):
     responses={200: CostoSerializer(many=True)}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Costo)
 def get_costos_pendientes(request):
     """
     Obtiene una lista de costos pendientes.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     costos = Costo.objects.filter(usuario_id=usuario_id, pagado=False)
-    serializer = CostoSerializer(costos, many=True)
-    return Response(serializer.data)
+    return Response(serializar_lista(costos, CostoSerializer))
@@ -1,11 +1,10 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
 from ..models import Credito
 from ..serializers import CreditoSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
 
 @extend_schema(
     operation_id='get_creditos',
@@ -14,17 +13,12 @@ from ..utils import get_usuario_id_from_request
     responses={200: CreditoSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
 def get_creditos(request, pk=None):
     """
     Obtiene una lista de créditos o un crédito específico si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Credito.objects.filter(usuario_id=usuario_id)
     
@@ -0,0 +1,61 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework import status
+from drf_spectacular.utils import extend_schema
+from ..permissions import IsTenantAuthenticated
+from ..utils import parse_rango_fechas
+from ..services.export_service import (
+    EXPORTS, export_queryset, iter_export_rows, stream_csv, stream_xlsx
+)
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
+
+@extend_schema(
+    operation_id='exportar',
+    summary='Exportar historial',
+    description=(
+        'Exporta en streaming movimientos, costos, facturas o pagos en CSV o XLSX. '
+        'Filtros: formato=csv|xlsx, periodo (YYYY, YYYY-MM o YYYY-MM-DD) o desde/hasta, '
+        'y categoria (estado en facturas, método de pago en pagos).'
+    ),
+    responses={200: 'Archivo', 400: 'Bad Request', 404: 'Not Found'}
+)
+@api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+def exportar(request, recurso):
+    """
+    Exporta el historial completo de un recurso sin materializarlo en memoria.
+    """
+    usuario_id = request.user.usuario_id
+    
+    if recurso not in EXPORTS:
+        return Response({"error": f"Recurso no exportable: {recurso}"}, status=status.HTTP_404_NOT_FOUND)
+    
+    formato = request.query_params.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return Response({"error": "formato debe ser csv o xlsx."}, status=status.HTTP_400_BAD_REQUEST)
+    
+    periodo = request.query_params.get('periodo')
+    desde = request.query_params.get('desde')
+    hasta = request.query_params.get('hasta')
+    inicio = fin = None
+    if periodo or desde or hasta:
+        try:
+            inicio, fin = parse_rango_fechas(periodo, desde, hasta)
+        except ValueError:
+            return Response({"error": "periodo, desde y hasta deben ser fechas válidas (YYYY, YYYY-MM o YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+    
+    queryset = export_queryset(recurso, usuario_id, inicio, fin, request.query_params.get('categoria'))
+    columnas = EXPORTS[recurso]['columnas']
+    filas = iter_export_rows(queryset, [campo for campo, _ in columnas])
+    
+    content_type, writer = FORMATOS[formato]
+    response = StreamingHttpResponse(writer([titulo for _, titulo in columnas], filas), content_type=content_type)
+    nombre = f"{recurso}_{timezone.now().strftime('%Y%m%d')}.{formato}"
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return response
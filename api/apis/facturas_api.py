@@ -1,11 +1,11 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
-from ..models import Factura
+from ..models import Factura, FacturaItem
 from ..serializers import FacturaSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..response_cache import cache_response
 
 @extend_schema(
     operation_id='get_facturas',
@@ -14,17 +14,13 @@ from ..utils import get_usuario_id_from_request
     responses={200: FacturaSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Factura, FacturaItem)
 def get_facturas(request, pk=None):
     """
     Obtiene una lista de facturas o una factura específica si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Factura.objects.filter(usuario_id=usuario_id)
     
@@ -1,43 +1,76 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from ..models import Trabajo, Campo, Maquina, Personal, Cliente, Costo, Factura
+from ..models import (
+    Trabajo, TrabajoPersonal, TrabajoMaquina, Campo, Maquina, Personal,
+    Cliente, Costo, Factura, FacturaItem
+)
 from ..serializers import (
     TrabajoSerializer, CampoSerializer, MaquinaSerializer, 
     PersonalSerializer, ClienteSerializer, CostoSerializer, 
     FacturaSerializer
 )
-from ..utils import get_usuario_id_from_request
+from ..mixins import TenantQuerysetMixin
+from ..permissions import IsTenantAuthenticated
+from ..response_cache import cache_response
+from ..pagination import paginar_keyset, CursorInvalido
+from ..sparse_fields import aplicar_fieldsets, CamposInvalidos
+from ..read_serializers import serializar_lista
+from ..services.trabajo_service import trabajos_para_listado
+
+MAX_LIMIT_CURSOR = 500
 
-class FlutterBaseListView(APIView):
+class FlutterBaseListView(TenantQuerysetMixin, APIView):
+    """
+    Listado paginado. Dos modos:
+    - skip/limit (contrato original): página por offset con el total exacto.
+    - cursor: ?cursor= (vacío en la primera página) y el `next_cursor` devuelto en
+      las siguientes; opcional ?orden=updated_at y ?total=1 para incluir el total.
+      Cada página cuesta lo mismo que la primera (keyset sobre el índice).
+    En los dos, ?fields= / ?expand= recortan la salida y las columnas leídas
+    (ver sparse_fields).
+    """
+    permission_classes = [IsTenantAuthenticated]
     model = None
     serializer_class = None
+    # Modelos de los que depende la respuesta (cache); por defecto (model,)
+    cache_models = None
+    # Órdenes admitidos en modo cursor (con índice (usuario_id, campo) en el modelo)
+    ordenes_cursor = ('id', 'updated_at')
 
-    def get(self, request):
-        usuario_id = get_usuario_id_from_request(request)
-        
-        if not usuario_id:
-            return Response(
-                {"detail": "Token de acceso requerido"}, 
-                status=status.HTTP_401_UNAUTHORIZED
-            )
-        
-        skip = int(request.query_params.get('skip', 0))
-        limit = int(request.query_params.get('limit', 100))
-        
-        queryset = self.model.objects.filter(usuario_id=usuario_id)
-        
+    def filtrar(self, queryset, request):
         # Filtrado opcional (ejemplo para trabajos)
         if self.model == Trabajo and request.query_params.get('estado'):
             queryset = queryset.filter(estado=request.query_params.get('estado'))
-            
+        return queryset
+
+    def preparar(self, queryset, relaciones):
+        """select_related/prefetch de las relaciones que usa la salida (None = todas)."""
+        return queryset
+
+    @cache_response()
+    def get(self, request):
+        limit = int(request.query_params.get('limit', 100))
+        cursor = 'cursor' in request.query_params
+        try:
+            queryset, opciones = aplicar_fieldsets(
+                request, self.filtrar(self.get_queryset(), request), self.serializer_class,
+                preparar=self.preparar
+            )
+        except CamposInvalidos as exc:
+            return Response({"success": False, "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if cursor:
+            return self._get_cursor(request, queryset, limit, opciones)
+
+        skip = int(request.query_params.get('skip', 0))
         total = queryset.count()
-        data = queryset[skip:skip+limit]
-        serializer = self.serializer_class(data, many=True)
+        # Orden estable: sin ORDER BY las filas pueden repetirse o saltearse entre páginas
+        data = queryset.order_by('id')[skip:skip+limit]
         
         return Response({
             "success": True,
-            "data": serializer.data,
+            "data": serializar_lista(data, self.serializer_class, **opciones),
             "pagination": {
                 "total": total,
                 "skip": skip,
@@ -46,9 +79,40 @@ class FlutterBaseListView(APIView):
             }
         })
 
+    def _get_cursor(self, request, queryset, limit, opciones):
+        orden = request.query_params.get('orden', 'id')
+        if orden not in self.ordenes_cursor:
+            return Response(
+                {"success": False, "error": f"orden debe ser uno de: {', '.join(self.ordenes_cursor)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, MAX_LIMIT_CURSOR))
+        try:
+            pagina, next_cursor = paginar_keyset(queryset, orden, request.query_params.get('cursor'), limit)
+        except CursorInvalido as exc:
+            return Response({"success": False, "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        pagination = {
+            "limit": limit,
+            "orden": orden,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }
+        if request.query_params.get('total') in ('1', 'true'):
+            pagination["total"] = queryset.count()
+        return Response({
+            "success": True,
+            "data": serializar_lista(pagina, self.serializer_class, **opciones),
+            "pagination": pagination
+        })
+
 class FlutterTrabajoListView(FlutterBaseListView):
     model = Trabajo
     serializer_class = TrabajoSerializer
+    cache_models = (Trabajo, TrabajoPersonal, TrabajoMaquina, Personal, Campo)
+
+    def preparar(self, queryset, relaciones):
+        return trabajos_para_listado(queryset, relaciones)
 
 class FlutterCampoListView(FlutterBaseListView):
     model = Campo
@@ -69,8 +133,16 @@ class FlutterClienteListView(FlutterBaseListView):
 class FlutterCostoListView(FlutterBaseListView):
     model = Costo
     serializer_class = CostoSerializer
+    ordenes_cursor = ('id',)
 
 class FlutterFacturaListView(FlutterBaseListView):
     model = Factura
     serializer_class = FacturaSerializer
+    cache_models = (Factura, FacturaItem)
+    ordenes_cursor = ('id',)
+
+    def preparar(self, queryset, relaciones):
+        if relaciones is None or 'items' in relaciones:
+            queryset = queryset.prefetch_related('items')
+        return queryset
 
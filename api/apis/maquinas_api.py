@@ -1,11 +1,14 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
 from ..models import Maquina
 from ..serializers import MaquinaSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..response_cache import cache_response
+from ..sparse_fields import aplicar_fieldsets, CamposInvalidos
+from ..read_serializers import serializar_lista
 
 @extend_schema(
     operation_id='get_maquinas',
@@ -14,17 +17,13 @@ from ..utils import get_usuario_id_from_request
     responses={200: MaquinaSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Maquina)
 def get_maquinas(request, pk=None):
     """
     Obtiene una lista de máquinas o una máquina específica si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Maquina.objects.filter(usuario_id=usuario_id)
     
@@ -33,6 +32,9 @@ def get_maquinas(request, pk=None):
         serializer = MaquinaSerializer(maquina)
         return Response(serializer.data)
     else:
+        try:
+            queryset, opciones = aplicar_fieldsets(request, queryset, MaquinaSerializer)
+        except CamposInvalidos as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         maquinas = queryset
-        serializer = MaquinaSerializer(maquinas, many=True)
-        return Response(serializer.data)
+        return Response(serializar_lista(maquinas, MaquinaSerializer, **opciones))
@@ -1,51 +1,62 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from ..models import Trabajo, Campo, Maquina, Personal, Cliente, Movimiento
 from ..serializers import (
-    TrabajoSerializer, CampoSerializer, MaquinaSerializer, 
-    PersonalSerializer, ClienteSerializer, MovimientoSerializer
+    TrabajoSerializer, CampoSerializer, MaquinaSerializer,
+    PersonalSerializer, ClienteSerializer
 )
-from django.utils import timezone
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..read_serializers import serializar_lista
+from ..services.trabajo_service import trabajos_para_listado
+from ..services.sync_service import aplicar_cambios, get_cambios, make_sync_token, parse_since
+
+SERIALIZERS_SYNC = {
+    'trabajos': TrabajoSerializer,
+    'campos': CampoSerializer,
+    'maquinas': MaquinaSerializer,
+    'personal': PersonalSerializer,
+    'clientes': ClienteSerializer,
+}
 
 class MobileSyncView(APIView):
+    permission_classes = [IsTenantAuthenticated]
     def get(self, request):
-        usuario_id = get_usuario_id_from_request(request)
-        
-        if not usuario_id:
+        usuario_id = request.user.usuario_id
+        try:
+            since = parse_since(request.query_params.get('since'))
+        except ValueError:
             return Response(
-                {"detail": "Token de acceso requerido"}, 
-                status=status.HTTP_401_UNAUTHORIZED
+                {"success": False, "error": "since debe ser un sync_token o un timestamp ISO 8601"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Sincronización descendente (servidor -> móvil)
-        return Response({
-            "success": True,
-            "data": {
-                "trabajos": TrabajoSerializer(Trabajo.objects.filter(usuario_id=usuario_id), many=True).data,
-                "campos": CampoSerializer(Campo.objects.filter(usuario_id=usuario_id), many=True).data,
-                "maquinas": MaquinaSerializer(Maquina.objects.filter(usuario_id=usuario_id), many=True).data,
-                "personal": PersonalSerializer(Personal.objects.filter(usuario_id=usuario_id), many=True).data,
-                "clientes": ClienteSerializer(Cliente.objects.filter(usuario_id=usuario_id), many=True).data,
-                "timestamp": timezone.now().isoformat()
-            }
-        })
+
+        # Sincronización descendente (servidor -> móvil): sin since o con un since
+        # anterior a la retención de tombstones se envía el snapshot completo
+        querysets, eliminados, completo, momento = get_cambios(usuario_id, since)
+        data = {
+            recurso: serializar_lista(
+                trabajos_para_listado(queryset) if recurso == 'trabajos' else queryset,
+                SERIALIZERS_SYNC[recurso]
+            )
+            for recurso, queryset in querysets.items()
+        }
+        data["eliminados"] = eliminados
+        data["completo"] = completo
+        data["sync_token"] = make_sync_token(momento)
+        data["timestamp"] = momento.isoformat()
+        return Response({"success": True, "data": data})
 
     def post(self, request):
-        # Sincronización ascendente (móvil -> servidor)
-        # En una implementación real, aquí procesaríamos los arrays de trabajos y movimientos
-        # para crearlos o actualizarlos.
-        trabajos_data = request.data.get('trabajos', [])
-        movimientos_data = request.data.get('movimientos', [])
-        
-        # Simplificando la respuesta para cumplir con la spec
+        # Sincronización ascendente (móvil -> servidor): upserts idempotentes por uuid
+        if not isinstance(request.data, dict):
+            return Response({"success": False, "error": "Se espera un objeto"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            resultado = aplicar_cambios(request.user.usuario_id, request.data)
+        except ValueError as exc:
+            return Response({"success": False, "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
         return Response({
             "success": True,
             "message": "Datos sincronizados exitosamente",
-            "sincronizados": {
-                "trabajos": len(trabajos_data),
-                "movimientos": len(movimientos_data)
-            }
+            **resultado
         })
-
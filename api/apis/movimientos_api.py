@@ -1,11 +1,11 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
 from ..models import Movimiento
 from ..serializers import MovimientoSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..read_serializers import serializar_lista
 
 @extend_schema(
     operation_id='get_movimientos',
@@ -14,17 +14,12 @@ from ..utils import get_usuario_id_from_request
     responses={200: MovimientoSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
 def get_movimientos(request, pk=None):
     """
     Obtiene una lista de movimientos o un movimiento específico si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Movimiento.objects.filter(usuario_id=usuario_id)
     
@@ -34,5 +29,4 @@ def get_movimientos(request, pk=None):
         return Response(serializer.data)
     else:
         movimientos = queryset
-        serializer = MovimientoSerializer(movimientos, many=True)
-        return Response(serializer.data)
+        return Response(serializar_lista(movimientos, MovimientoSerializer))
@@ -1,11 +1,14 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
 from ..models import Personal
 from ..serializers import PersonalSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..response_cache import cache_response
+from ..sparse_fields import aplicar_fieldsets, CamposInvalidos
+from ..read_serializers import serializar_lista
 
 @extend_schema(
     operation_id='get_personal',
@@ -14,17 +17,13 @@ from ..utils import get_usuario_id_from_request
     responses={200: PersonalSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Personal)
 def get_personal(request, pk=None):
     """
     Obtiene una lista de personal o un personal específico si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Personal.objects.filter(usuario_id=usuario_id)
     
@@ -33,9 +32,12 @@ def get_personal(request, pk=None):
         serializer = PersonalSerializer(p)
         return Response(serializer.data)
     else:
+        try:
+            queryset, opciones = aplicar_fieldsets(request, queryset, PersonalSerializer)
+        except CamposInvalidos as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         personal = queryset
-        serializer = PersonalSerializer(personal, many=True)
-        return Response(serializer.data)
+        return Response(serializar_lista(personal, PersonalSerializer, **opciones))
 
 @extend_schema(
     operation_id='validate_dni',
@@ -44,17 +46,12 @@ def get_personal(request, pk=None):
     responses={200: {'type': 'object', 'properties': {'available': {'type': 'boolean'}}}}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
 def validate_dni(request):
     """
     Valida si un DNI está disponible.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     dni = request.query_params.get('dni')
     exclude_id = request.query_params.get('exclude_id')
@@ -2,73 +2,81 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Sum, Count
-from ..models import Trabajo, Movimiento, Factura
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models.functions import Coalesce
+from ..models import Trabajo, TrabajoPersonal, Factura, Movimiento
 from django.utils import timezone
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
+from ..utils import parse_rango_fechas, filtro_rango_fechas
+from ..response_cache import cache_response
+from ..services.resumen_financiero_service import get_totales_por_categoria
+from ..services.series_service import get_series, rango_buckets
 
 class ReporteTrabajosView(APIView):
+    permission_classes = [IsTenantAuthenticated]
     def get(self, request):
-        usuario_id = get_usuario_id_from_request(request)
-        
-        if not usuario_id:
-            return Response(
-                {"detail": "Token de acceso requerido"}, 
-                status=status.HTTP_401_UNAUTHORIZED
-            )
+        usuario_id = request.user.usuario_id
         
         now = timezone.now()
         periodo = request.query_params.get('periodo', now.strftime('%Y-%m'))
+        desde = request.query_params.get('desde')
+        hasta = request.query_params.get('hasta')
+        try:
+            inicio, fin = parse_rango_fechas(periodo, desde, hasta)
+        except ValueError:
+            return Response({"error": "periodo, desde y hasta deben ser fechas válidas (YYYY, YYYY-MM o YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Rango semiabierto sobre fecha_inicio: usa el índice (usuario_id, fecha_inicio)
+        trabajos = Trabajo.objects.filter(usuario_id=usuario_id, **filtro_rango_fechas('fecha_inicio', inicio, fin))
         
-        trabajos = Trabajo.objects.filter(usuario_id=usuario_id, fecha_inicio__startswith=periodo)
+        # Totales en una sola query
+        # Nota: la superficie puede duplicar si hay varios trabajos en el mismo campo
+        totales = trabajos.aggregate(
+            total_trabajos=Count('id'),
+            superficie_total_ha=Coalesce(Sum('campo__hectareas'), Decimal('0')),
+            ingresos_totales=Coalesce(Sum('monto_cobrado'), Decimal('0'))
+        )
         
-        total_trabajos = trabajos.count()
-        # Esto es un poco simplificado, en un entorno real usaríamos GroupBy
-        por_tipo = {}
-        for t in trabajos:
-            tipo_nombre = t.id_tipo_trabajo.trabajo
-            por_tipo[tipo_nombre] = por_tipo.get(tipo_nombre, 0) + 1
-            
-        por_estado = {
-            "Pendiente": trabajos.filter(estado='Pendiente').count(),
-            "En curso": trabajos.filter(estado='En curso').count(),
-            "Completado": trabajos.filter(estado='Completado').count(),
+        por_tipo = {
+            fila['id_tipo_trabajo__trabajo']: fila['cantidad']
+            for fila in trabajos.values('id_tipo_trabajo__trabajo').annotate(cantidad=Count('id')).order_by()
         }
         
-        # Superficie total de los campos de esos trabajos
-        # Nota: Esto puede duplicar si hay varios trabajos en el mismo campo
-        superficie = sum([t.campo.hectareas for t in trabajos])
+        por_estado = {"Pendiente": 0, "En curso": 0, "Completado": 0}
+        for fila in trabajos.values('estado').annotate(cantidad=Count('id')).order_by():
+            por_estado[fila['estado']] = fila['cantidad']
         
         return Response({
-            "periodo": periodo,
-            "total_trabajos": total_trabajos,
+            "periodo": periodo if not (desde or hasta) else None,
+            "desde": inicio,
+            "hasta": fin - timedelta(days=1) if fin else None,
+            "total_trabajos": totales['total_trabajos'],
             "trabajos_por_tipo": por_tipo,
             "trabajos_por_estado": por_estado,
-            "superficie_total_ha": superficie,
-            "ingresos_totales": trabajos.aggregate(Sum('monto_cobrado'))['monto_cobrado__sum'] or 0.0
+            "superficie_total_ha": totales['superficie_total_ha'],
+            "ingresos_totales": totales['ingresos_totales']
         })
 
 class ReporteFinancieroView(APIView):
+    permission_classes = [IsTenantAuthenticated]
     def get(self, request):
-        usuario_id = get_usuario_id_from_request(request)
-        
-        if not usuario_id:
-            return Response(
-                {"detail": "Token de acceso requerido"}, 
-                status=status.HTTP_401_UNAUTHORIZED
-            )
+        usuario_id = request.user.usuario_id
         
         now = timezone.now()
         periodo = request.query_params.get('periodo', now.strftime('%Y-%m'))
         
-        movimientos = Movimiento.objects.filter(usuario_id=usuario_id, fecha__startswith=periodo)
-        
-        ingresos_total = movimientos.filter(es_cobro=True).aggregate(Sum('monto'))['monto__sum'] or 0.0
-        gastos_total = movimientos.filter(es_cobro=False).aggregate(Sum('monto'))['monto__sum'] or 0.0
-        
-        # Categorías simplificadas
+        # Lee el rollup mensual: O(meses x categorías) filas, no O(movimientos)
+        ingresos_total = Decimal('0')
+        gastos_total = Decimal('0')
         gastos_por_cat = {}
-        for m in movimientos.filter(es_cobro=False):
-            gastos_por_cat[m.categoria] = gastos_por_cat.get(m.categoria, 0.0) + m.monto
+        for fila in get_totales_por_categoria(usuario_id, periodo):
+            if fila['es_cobro']:
+                ingresos_total += fila['total']
+            else:
+                gastos_total += fila['total']
+                categoria = fila['categoria'] or None
+                gastos_por_cat[categoria] = gastos_por_cat.get(categoria, Decimal('0')) + fila['total']
 
         return Response({
             "periodo": periodo,
@@ -85,3 +93,35 @@ class ReporteFinancieroView(APIView):
             "facturas_vencidas": Factura.objects.filter(usuario_id=usuario_id, estado='Pendiente', fecha_vencimiento__lt=now.date()).count()
         })
 
+
+class ReporteSeriesView(APIView):
+    """
+    Serie temporal para gráficos: ?agrupacion=dia|semana|mes|campana y
+    ?periodo=YYYY[-MM] o ?desde/?hasta (default: año en curso).
+    """
+    permission_classes = [IsTenantAuthenticated]
+    @cache_response(Movimiento, Trabajo, TrabajoPersonal, per_day=True)
+    def get(self, request):
+        usuario_id = request.user.usuario_id
+        
+        now = timezone.now()
+        periodo = request.query_params.get('periodo', now.strftime('%Y'))
+        desde = request.query_params.get('desde')
+        hasta = request.query_params.get('hasta')
+        agrupacion = request.query_params.get('agrupacion', 'mes')
+        try:
+            inicio, fin = parse_rango_fechas(periodo, desde, hasta)
+            fin = fin or now.date() + timedelta(days=1)
+            inicio = inicio or fin - timedelta(days=365)
+            series = get_series(usuario_id, inicio, fin, agrupacion)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # Rango efectivo: los buckets de los bordes se toman completos
+        inicio, fin = rango_buckets(inicio, fin, agrupacion)
+        
+        return Response({
+            "agrupacion": agrupacion,
+            "desde": inicio,
+            "hasta": fin - timedelta(days=1),
+            "series": series
+        })
@@ -1,25 +1,42 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 from django.shortcuts import get_object_or_404
-from ..models import Trabajo
+from datetime import timedelta
+from django.utils import timezone
+from ..models import Trabajo, TrabajoPersonal, TrabajoMaquina, Personal, Campo, TipoTrabajo
 from ..serializers import TrabajoSerializer
-from ..utils import get_usuario_id_from_request
+from ..permissions import IsTenantAuthenticated
 
-from django.db.models import Sum
+from django.db import transaction
+from ..services.trabajo_service import (
+    trabajos_para_listado, get_progreso, lock_trabajo, excede_hectareas,
+    get_calendario, MAX_DIAS_CALENDARIO
+)
+from ..utils import parse_rango_fechas
+from ..response_cache import cache_response
+from ..sparse_fields import aplicar_fieldsets, CamposInvalidos
 
-def _add_progress_to_trabajo_data(trabajo_obj, data):
-    """Auxiliar para inyectar ha_realizadas y porcentaje_progreso en el dict de datos."""
-    ha_realizadas = float(trabajo_obj.trabajopersonal_set.aggregate(total=Sum('hectareas'))['total'] or 0.0)
-    total_ha_campo = float(trabajo_obj.campo.hectareas) if trabajo_obj.campo and trabajo_obj.campo.hectareas else 0.0
-    
-    porcentaje = 0.0
-    if total_ha_campo > 0:
-        porcentaje = round((ha_realizadas / total_ha_campo) * 100, 2)
-        
-    data['ha_realizadas'] = ha_realizadas
-    data['porcentaje_progreso'] = porcentaje
+# Modelos que entran en la respuesta de TrabajoSerializer (TipoTrabajo es global)
+TRABAJO_CACHE_MODELS = (Trabajo, TrabajoPersonal, TrabajoMaquina, Personal, Campo)
+
+# Claves que agrega _add_progress_to_trabajo_data -> columnas que lee (para ?fields=)
+PROGRESO_FIELDS = {'porcentaje_progreso': ('ha_realizadas', 'campo__hectareas')}
+
+def _add_progress_to_trabajo_data(trabajo_obj, data, fields=None):
+    """
+    Auxiliar para inyectar ha_realizadas y porcentaje_progreso en el dict de datos.
+    Con `fields` (?fields=) solo las que se pidieron.
+    """
+    if fields is None:
+        data['ha_realizadas'], data['porcentaje_progreso'] = get_progreso(trabajo_obj)
+    elif 'porcentaje_progreso' in fields:
+        ha_realizadas, data['porcentaje_progreso'] = get_progreso(trabajo_obj)
+        if 'ha_realizadas' in fields:
+            data['ha_realizadas'] = ha_realizadas
+    elif 'ha_realizadas' in fields:
+        data['ha_realizadas'] = float(trabajo_obj.ha_realizadas or 0.0)
     return data
 
 @extend_schema(
@@ -29,32 +46,35 @@ def _add_progress_to_trabajo_data(trabajo_obj, data):
     responses={200: TrabajoSerializer(many=True), 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(*TRABAJO_CACHE_MODELS)
 def get_trabajos(request, pk=None):
     """
     Obtiene una lista de trabajos o un trabajo específico si se proporciona un pk.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
     queryset = Trabajo.objects.filter(usuario_id=usuario_id)
     
     if pk is not None:
-        trabajo = get_object_or_404(queryset, pk=pk)
+        trabajo = get_object_or_404(trabajos_para_listado(queryset), pk=pk)
         serializer = TrabajoSerializer(trabajo)
         data = _add_progress_to_trabajo_data(trabajo, serializer.data)
         return Response(data)
     else:
-        trabajos = queryset
-        data_list = []
-        for t in trabajos:
-            serializer = TrabajoSerializer(t)
-            t_data = _add_progress_to_trabajo_data(t, serializer.data)
-            data_list.append(t_data)
+        try:
+            queryset, opciones = aplicar_fieldsets(
+                request, queryset, TrabajoSerializer,
+                preparar=trabajos_para_listado, extras=PROGRESO_FIELDS
+            )
+        except CamposInvalidos as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        trabajos = list(queryset)
+        serializer = TrabajoSerializer(trabajos, many=True, **opciones)
+        data_list = [
+            _add_progress_to_trabajo_data(t, t_data, opciones['fields'])
+            for t, t_data in zip(trabajos, serializer.data)
+        ]
         return Response(data_list)
 
 @extend_schema(
@@ -64,19 +84,15 @@ def get_trabajos(request, pk=None):
     responses={200: TrabajoSerializer, 404: 'Not Found'}
 )
 @api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(*TRABAJO_CACHE_MODELS)
 def get_trabajo_detalle(request, pk):
     """
     Obtiene el detalle completo de un trabajo.
     """
-    usuario_id = get_usuario_id_from_request(request)
-    
-    if not usuario_id:
-        return Response(
-            {"detail": "Token de acceso requerido"}, 
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    usuario_id = request.user.usuario_id
     
-    queryset = Trabajo.objects.filter(usuario_id=usuario_id)
+    queryset = trabajos_para_listado(Trabajo.objects.filter(usuario_id=usuario_id))
     trabajo = get_object_or_404(queryset, pk=pk)
     serializer = TrabajoSerializer(trabajo)
     data = serializer.data
@@ -100,10 +116,9 @@ from ..serializers import TrabajoPersonalSerializer
     responses={200: TrabajoPersonalSerializer, 400: 'Bad Request'}
 )
 @api_view(['PUT', 'PATCH'])
+@permission_classes([IsTenantAuthenticated])
 def update_trabajo_personal(request, pk):
-    usuario_id = get_usuario_id_from_request(request)
-    if not usuario_id:
-        return Response({"detail": "Token requerido"}, status=status.HTTP_401_UNAUTHORIZED)
+    usuario_id = request.user.usuario_id
 
     # Obtenemos el registro asegurando que pertenece al usuario
     # Como TrabajoPersonal no tiene usuario_id directo en algunos modelos viejos, filtramos por Trabajo->usuario_id
@@ -116,26 +131,29 @@ def update_trabajo_personal(request, pk):
         # --- VALIDACIÓN DE HECTÁREAS ---
         new_hectareas = serializer.validated_data.get('hectareas')
         
-        # Solo validamos si se están intentando modificar las hectáreas
-        if new_hectareas is not None:
-            trabajo = registro.trabajo
-            
-            if trabajo and trabajo.campo and trabajo.campo.hectareas:
-                limit_hectareas = float(trabajo.campo.hectareas)
-                
-                # Sumamos lo que llevan los DEMÁS registrados en este trabajo
-                current_total = trabajo.trabajopersonal_set.exclude(pk=pk).aggregate(sum=Sum('hectareas'))['sum'] or 0.0
-                
-                # Sumamos lo que se quiere guardar ahora
-                total_maybe = float(current_total) + float(new_hectareas)
-                
-                if total_maybe > limit_hectareas:
+        with transaction.atomic():
+            # Solo validamos si se están intentando modificar las hectáreas
+            if new_hectareas is not None and registro.trabajo_id:
+                # Una lectura de la fila del trabajo bloqueada: el contador ha_realizadas
+                # ya incluye a los DEMÁS registrados y a este registro (que se descuenta)
+                trabajo = lock_trabajo(registro.trabajo_id)
+                # Registro releído bajo el lock: otra edición concurrente ya cambió
+                # las hectáreas que se liberan
+                registro = get_object_or_404(
+                    TrabajoPersonal.objects.select_for_update(), pk=pk, usuario_id=usuario_id
+                )
+                serializer = TrabajoPersonalSerializer(registro, data=request.data, partial=True)
+                serializer.is_valid(raise_exception=True)
+                excede, total_maybe, limit_hectareas = excede_hectareas(
+                    trabajo, new_hectareas, liberadas=registro.hectareas
+                )
+                if excede:
                      return Response({
                         "error": f"No puedes trabajar mas hectareas totales (Actual intentado: {total_maybe}) que las que el campo tiene registradas ({limit_hectareas})"
                     }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Guardar si pasó la validación
-        serializer.save()
+            
+            # Guardar si pasó la validación
+            serializer.save()
         return Response(serializer.data)
         
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -146,11 +164,38 @@ def update_trabajo_personal(request, pk):
     responses={204: 'No Content'}
 )
 @api_view(['DELETE'])
+@permission_classes([IsTenantAuthenticated])
 def delete_trabajo_personal(request, pk):
-    usuario_id = get_usuario_id_from_request(request)
-    if not usuario_id:
-        return Response({"detail": "Token requerido"}, status=status.HTTP_401_UNAUTHORIZED)
+    usuario_id = request.user.usuario_id
         
     registro = get_object_or_404(TrabajoPersonal, pk=pk, usuario_id=usuario_id)
     registro.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
+
+@extend_schema(
+    operation_id='get_calendario_trabajos',
+    summary='Calendario de trabajos',
+    description='Trabajos activos por día en una ventana (desde/hasta inclusive, o periodo YYYY-MM; default: mes actual)',
+    responses={200: 'OK', 400: 'Bad Request'}
+)
+@api_view(['GET'])
+@permission_classes([IsTenantAuthenticated])
+@cache_response(Trabajo, TrabajoPersonal, Campo, TipoTrabajo)
+def get_calendario_trabajos(request):
+    periodo = request.query_params.get('periodo', timezone.now().strftime('%Y-%m'))
+    desde = request.query_params.get('desde')
+    hasta = request.query_params.get('hasta')
+    try:
+        inicio, fin = parse_rango_fechas(periodo, desde, hasta)
+    except ValueError:
+        return Response({"error": "periodo, desde y hasta deben ser fechas válidas (YYYY, YYYY-MM o YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+    if inicio is None or fin is None or fin <= inicio:
+        return Response({"error": "Indicar desde y hasta (o periodo)."}, status=status.HTTP_400_BAD_REQUEST)
+    if (fin - inicio).days > MAX_DIAS_CALENDARIO:
+        return Response({"error": f"La ventana no puede superar {MAX_DIAS_CALENDARIO} días."}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "desde": inicio,
+        "hasta": fin - timedelta(days=1),
+        "dias": get_calendario(request.user.usuario_id, inicio, fin)
+    })
@@ -0,0 +1,64 @@
+"""
+Autenticación DRF basada en los access tokens de auth_token_service.
+Resuelve el token una sola vez por request y deja en request.user un
+principal liviano con el tenant (usuario_id), el rol y el flag activo.
+"""
+from rest_framework.authentication import BaseAuthentication
+from .services.auth_token_service import get_token_owner
+
+
+class TokenPrincipal:
+    """Usuario autenticado por token, sin cargar el modelo Usuario."""
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, usuario_id: int, rol: str | None = None, is_active: bool | None = True):
+        self.id = usuario_id
+        self.pk = usuario_id
+        self.usuario_id = usuario_id
+        self.rol = rol
+        self.is_active = is_active
+
+    def __str__(self):
+        return f"Usuario {self.usuario_id} ({self.rol})"
+
+
+def get_access_token_from_request(request) -> str | None:
+    """
+    Obtiene el access_token del header Authorization (Bearer token)
+    o del query param access_token (para compatibilidad).
+    """
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if auth_header.startswith('Bearer '):
+        access_token = auth_header.replace('Bearer ', '').strip()
+        if access_token:
+            return access_token
+
+    query_params = getattr(request, 'query_params', request.GET)
+    return query_params.get('access_token') or None
+
+
+class AccessTokenAuthentication(BaseAuthentication):
+    """
+    Autentica con el access_token personalizado.
+    Un token ausente, inválido o de un usuario inactivo deja el request como
+    anónimo (no lanza error) para que los endpoints AllowAny sigan funcionando;
+    los endpoints protegidos lo rechazan con IsTenantAuthenticated.
+    """
+
+    def authenticate(self, request):
+        access_token = get_access_token_from_request(request)
+        if not access_token:
+            return None
+
+        owner = get_token_owner(access_token)
+        if owner is None:
+            return None
+
+        usuario_id, rol, is_active = owner
+        if is_active is False:
+            return None
+        return TokenPrincipal(usuario_id, rol, is_active), access_token
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -40,7 +40,8 @@ class LoginView(APIView):
                 #    la compara con el hash almacenado en la BD
                 if user.check_password(password) and user.is_active:
                     # 3. Si coinciden las password, crear token personalizado
-                    auth_token = create_auth_token(user.id)
+                    #    (opaco o firmado según AUTH_TOKEN_FORMAT)
+                    auth_token = create_auth_token(user.id, rol=user.rol)
                     
                     # Buscar Personal por nombre ya que no hay relación directa en la BD
                     try:
@@ -2,14 +2,15 @@ from rest_framework import generics
 from rest_framework.exceptions import ValidationError
 from ..models import Campo, Cliente
 from ..serializers import CampoSerializer
-from ..utils import get_usuario_id_from_request
+from ..mixins import TenantQuerysetMixin
 
-class CampoCreateAPIView(generics.CreateAPIView):
+class CampoCreateAPIView(TenantQuerysetMixin, generics.CreateAPIView):
+    model = Campo
     queryset = Campo.objects.all()
     serializer_class = CampoSerializer
     
     def perform_create(self, serializer):
-        usuario_id = get_usuario_id_from_request(self.request)
+        usuario_id = self.get_usuario_id()
         validated_data = serializer.validated_data
         
         # Validar cliente_id si propio=False
@@ -30,25 +31,12 @@ class CampoCreateAPIView(generics.CreateAPIView):
             # Si es propio, asegurar que cliente_id sea None
             validated_data['cliente_id'] = None
         
-        if usuario_id:
-            serializer.save(usuario_id=usuario_id)
-        else:
-            serializer.save()
+        super().perform_create(serializer)
 
-class CampoUpdateAPIView(generics.UpdateAPIView):
+class CampoUpdateAPIView(TenantQuerysetMixin, generics.UpdateAPIView):
+    model = Campo
     serializer_class = CampoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Campo.objects.filter(usuario_id=usuario_id)
-        return Campo.objects.none()
 
-class CampoDestroyAPIView(generics.DestroyAPIView):
-    serializer_class = CampoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Campo.objects.filter(usuario_id=usuario_id)
-        return Campo.objects.none()
\ No newline at end of file
+class CampoDestroyAPIView(TenantQuerysetMixin, generics.DestroyAPIView):
+    model = Campo
+    serializer_class = CampoSerializer
\ No newline at end of file
@@ -1,16 +1,27 @@
 from rest_framework import generics
 from ..models import CuotaCredito, Credito
 from ..serializers import CuotaCreditoSerializer
-from ..utils import get_usuario_id_from_request
+from ..mixins import TenantQuerysetMixin
 
-class CuotaCreditoCreateAPIView(generics.CreateAPIView):
+class CuotaCreditoTenantMixin(TenantQuerysetMixin):
+    """CuotaCredito no tiene usuario_id: se filtra por el usuario del crédito padre."""
+    model = CuotaCredito
+
+    def get_queryset(self):
+        usuario_id = self.get_usuario_id()
+        if usuario_id:
+            creditos_usuario = Credito.objects.filter(usuario_id=usuario_id).values_list('id', flat=True)
+            return CuotaCredito.objects.filter(credito_id__in=creditos_usuario)
+        return CuotaCredito.objects.none()
+
+class CuotaCreditoCreateAPIView(CuotaCreditoTenantMixin, generics.CreateAPIView):
     queryset = CuotaCredito.objects.all()
     serializer_class = CuotaCreditoSerializer
     
     def perform_create(self, serializer):
         # No asignamos usuario_id directamente porque CuotaCredito no tiene usuario_id
         # pero validamos que el crédito padre pertenezca al usuario
-        usuario_id = get_usuario_id_from_request(self.request)
+        usuario_id = self.get_usuario_id()
         if usuario_id and 'credito' in serializer.validated_data:
             credito = serializer.validated_data['credito']
             if credito.usuario_id != usuario_id:
@@ -18,22 +29,8 @@ class CuotaCreditoCreateAPIView(generics.CreateAPIView):
                 raise PermissionDenied("No tienes permiso para crear cuotas de este crédito")
         serializer.save()
 
-class CuotaCreditoUpdateAPIView(generics.UpdateAPIView):
+class CuotaCreditoUpdateAPIView(CuotaCreditoTenantMixin, generics.UpdateAPIView):
     serializer_class = CuotaCreditoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            creditos_usuario = Credito.objects.filter(usuario_id=usuario_id).values_list('id', flat=True)
-            return CuotaCredito.objects.filter(credito_id__in=creditos_usuario)
-        return CuotaCredito.objects.none()
 
-class CuotaCreditoDestroyAPIView(generics.DestroyAPIView):
-    serializer_class = CuotaCreditoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            creditos_usuario = Credito.objects.filter(usuario_id=usuario_id).values_list('id', flat=True)
-            return CuotaCredito.objects.filter(credito_id__in=creditos_usuario)
-        return CuotaCredito.objects.none()
\ No newline at end of file
+class CuotaCreditoDestroyAPIView(CuotaCreditoTenantMixin, generics.DestroyAPIView):
+    serializer_class = CuotaCreditoSerializer
\ No newline at end of file
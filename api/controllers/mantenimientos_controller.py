@@ -1,33 +1,17 @@
 from rest_framework import generics
+from ..mixins import TenantQuerysetMixin
 from ..models import Mantenimiento
 from ..serializers import MantenimientoSerializer
-from ..utils import get_usuario_id_from_request
 
-class MantenimientoCreateAPIView(generics.CreateAPIView):
+class MantenimientoCreateAPIView(TenantQuerysetMixin, generics.CreateAPIView):
+    model = Mantenimiento
     queryset = Mantenimiento.objects.all()
     serializer_class = MantenimientoSerializer
-    
-    def perform_create(self, serializer):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            serializer.save(usuario_id=usuario_id)
-        else:
-            serializer.save()
 
-class MantenimientoUpdateAPIView(generics.UpdateAPIView):
+class MantenimientoUpdateAPIView(TenantQuerysetMixin, generics.UpdateAPIView):
+    model = Mantenimiento
     serializer_class = MantenimientoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Mantenimiento.objects.filter(usuario_id=usuario_id)
-        return Mantenimiento.objects.none()
 
-class MantenimientoDestroyAPIView(generics.DestroyAPIView):
-    serializer_class = MantenimientoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Mantenimiento.objects.filter(usuario_id=usuario_id)
-        return Mantenimiento.objects.none()
\ No newline at end of file
+class MantenimientoDestroyAPIView(TenantQuerysetMixin, generics.DestroyAPIView):
+    model = Mantenimiento
+    serializer_class = MantenimientoSerializer
\ No newline at end of file
@@ -1,33 +1,17 @@
 from rest_framework import generics
+from ..mixins import TenantQuerysetMixin
 from ..models import Movimiento
 from ..serializers import MovimientoSerializer
-from ..utils import get_usuario_id_from_request
 
-class MovimientoCreateAPIView(generics.CreateAPIView):
+class MovimientoCreateAPIView(TenantQuerysetMixin, generics.CreateAPIView):
+    model = Movimiento
     queryset = Movimiento.objects.all()
     serializer_class = MovimientoSerializer
-    
-    def perform_create(self, serializer):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            serializer.save(usuario_id=usuario_id)
-        else:
-            serializer.save()
 
-class MovimientoUpdateAPIView(generics.UpdateAPIView):
+class MovimientoUpdateAPIView(TenantQuerysetMixin, generics.UpdateAPIView):
+    model = Movimiento
     serializer_class = MovimientoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Movimiento.objects.filter(usuario_id=usuario_id)
-        return Movimiento.objects.none()
 
-class MovimientoDestroyAPIView(generics.DestroyAPIView):
-    serializer_class = MovimientoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Movimiento.objects.filter(usuario_id=usuario_id)
-        return Movimiento.objects.none()
\ No newline at end of file
+class MovimientoDestroyAPIView(TenantQuerysetMixin, generics.DestroyAPIView):
+    model = Movimiento
+    serializer_class = MovimientoSerializer
\ No newline at end of file
@@ -1,33 +1,17 @@
 from rest_framework import generics
+from ..mixins import TenantQuerysetMixin
 from ..models import Pago
 from ..serializers import PagoSerializer
-from ..utils import get_usuario_id_from_request
 
-class PagoCreateAPIView(generics.CreateAPIView):
+class PagoCreateAPIView(TenantQuerysetMixin, generics.CreateAPIView):
+    model = Pago
     queryset = Pago.objects.all()
     serializer_class = PagoSerializer
-    
-    def perform_create(self, serializer):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            serializer.save(usuario_id=usuario_id)
-        else:
-            serializer.save()
 
-class PagoUpdateAPIView(generics.UpdateAPIView):
+class PagoUpdateAPIView(TenantQuerysetMixin, generics.UpdateAPIView):
+    model = Pago
     serializer_class = PagoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Pago.objects.filter(usuario_id=usuario_id)
-        return Pago.objects.none()
 
-class PagoDestroyAPIView(generics.DestroyAPIView):
-    serializer_class = PagoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Pago.objects.filter(usuario_id=usuario_id)
-        return Pago.objects.none()
\ No newline at end of file
+class PagoDestroyAPIView(TenantQuerysetMixin, generics.DestroyAPIView):
+    model = Pago
+    serializer_class = PagoSerializer
\ No newline at end of file
@@ -1,42 +1,34 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from ..models import Trabajo
+from ..mixins import TenantQuerysetMixin
+from ..models import Trabajo, TrabajoPersonal
 from ..serializers import TrabajoSerializer, RegistrarHorasSerializer
-from ..utils import get_usuario_id_from_request
+from ..services.trabajo_service import trabajos_para_listado
 
-class TrabajoCreateAPIView(generics.CreateAPIView):
+class TrabajoCreateAPIView(TenantQuerysetMixin, generics.CreateAPIView):
+    model = Trabajo
     queryset = Trabajo.objects.all()
     serializer_class = TrabajoSerializer
-    
-    def perform_create(self, serializer):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            serializer.save(usuario_id=usuario_id)
-        else:
-            serializer.save()
 
-class TrabajoUpdateAPIView(generics.UpdateAPIView):
+class TrabajoUpdateAPIView(TenantQuerysetMixin, generics.UpdateAPIView):
+    model = Trabajo
     serializer_class = TrabajoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Trabajo.objects.filter(usuario_id=usuario_id)
-        return Trabajo.objects.none()
 
-class TrabajoDestroyAPIView(generics.DestroyAPIView):
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Respuesta con campo, tipo, personal, máquinas y personal_detail precargados
+        serializer.instance = trabajos_para_listado(Trabajo.objects.filter(pk=serializer.instance.pk)).get()
+
+class TrabajoDestroyAPIView(TenantQuerysetMixin, generics.DestroyAPIView):
+    model = Trabajo
     serializer_class = TrabajoSerializer
-    
-    def get_queryset(self):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            return Trabajo.objects.filter(usuario_id=usuario_id)
-        return Trabajo.objects.none()
 
-from django.db.models import Sum
+from django.db import transaction
+from ..services.trabajo_service import lock_trabajo, excede_hectareas
 
-class RegistrarHorasView(generics.CreateAPIView):
+class RegistrarHorasView(TenantQuerysetMixin, generics.CreateAPIView):
     # No necesitamos queryset específico porque es solo Create
+    model = TrabajoPersonal
     serializer_class = RegistrarHorasSerializer
     
     def create(self, request, *args, **kwargs):
@@ -47,25 +39,69 @@ class RegistrarHorasView(generics.CreateAPIView):
         trabajo = serializer.validated_data.get('trabajo')
         hectareas = serializer.validated_data.get('hectareas')
         
-        if trabajo and trabajo.campo and hectareas:
-            limit_hectareas = float(trabajo.campo.hectareas or 0)
-            if limit_hectareas > 0:
-                current_total = trabajo.trabajopersonal_set.aggregate(total=Sum('hectareas'))['total'] or 0.0
-                total_maybe = float(current_total) + float(hectareas)
-                
-                if total_maybe > limit_hectareas:
+        with transaction.atomic():
+            if trabajo and trabajo.campo and hectareas:
+                # Fila del trabajo bloqueada: dos registros concurrentes no pueden pasar
+                # ambos el tope; el contador evita re-agregar trabajo_personal
+                trabajo = lock_trabajo(trabajo.pk)
+                excede, _, _ = excede_hectareas(trabajo, hectareas)
+                if excede:
                     return Response(
                         {"detail": "Se excede de horas del total declarado para el campo en el que trabaja"},
                         status=status.HTTP_200_OK
                     )
 
-        self.perform_create(serializer)
+            self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-    def perform_create(self, serializer):
-        usuario_id = get_usuario_id_from_request(self.request)
-        if usuario_id:
-            serializer.save(usuario_id=usuario_id)
-        else:
-            serializer.save()
\ No newline at end of file
+
+from ..permissions import IsTenantAuthenticated
+from ..serializers import RegistroHorasBulkSerializer
+from ..services.registro_horas_service import registrar_horas_bulk, MAX_REGISTROS_BULK
+
+class RegistrarHorasBulkView(TenantQuerysetMixin, generics.GenericAPIView):
+    """
+    Planilla de fin de día: lista de registros de horas (de uno o varios trabajos)
+    en un solo request. Body: [{...}, ...] o {"registros": [...]}, cada fila con los
+    campos de registrar-horas. Las filas válidas se guardan juntas; el resultado
+    informa el estado de cada una (201 si se crearon todas, 200 si hubo rechazos).
+    """
+    model = TrabajoPersonal
+    serializer_class = RegistroHorasBulkSerializer
+    permission_classes = [IsTenantAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        registros = request.data.get('registros') if isinstance(request.data, dict) else request.data
+        if not isinstance(registros, list) or not registros:
+            return Response({"error": "Se espera una lista de registros"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(registros) > MAX_REGISTROS_BULK:
+            return Response(
+                {"error": f"Máximo {MAX_REGISTROS_BULK} registros por request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        validas, errores = [], {}
+        for indice, fila in enumerate(registros):
+            serializer = self.get_serializer(data=fila)
+            if serializer.is_valid():
+                validas.append((indice, serializer.validated_data))
+            else:
+                errores[indice] = serializer.errors
+
+        creados, rechazados = registrar_horas_bulk(self.get_usuario_id(), validas) if validas else ([], {})
+        errores.update(rechazados)
+
+        resultados = [
+            {"indice": indice, "estado": "creado", "registro": RegistrarHorasSerializer(registro).data}
+            for indice, registro in creados
+        ]
+        resultados += [
+            {"indice": indice, "estado": "rechazado", "errores": detalle}
+            for indice, detalle in errores.items()
+        ]
+        resultados.sort(key=lambda r: r["indice"])
+        return Response(
+            {"creados": len(creados), "rechazados": len(errores), "resultados": resultados},
+            status=status.HTTP_201_CREATED if not errores else status.HTTP_200_OK
+        )
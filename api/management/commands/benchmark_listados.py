@@ -0,0 +1,159 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.apis.mobile_api import SERIALIZERS_SYNC
+from api.middleware import comprimir
+from api.models import Campo, Costo, Movimiento, Personal
+from api.read_serializers import serializar_lista
+from api.renderers import FastJSONRenderer
+from api.serializers import CampoSerializer, CostoSerializer, MovimientoSerializer, PersonalSerializer
+from api.services.sync_service import get_cambios
+from api.services.trabajo_service import trabajos_para_listado
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tenant ficticio: las filas se crean en una transacción que se descarta al final
+USUARIO_BENCHMARK = -1
+
+
+def _crear_filas(filas: int) -> None:
+    hoy = date.today()
+    Costo.objects.bulk_create([
+        Costo(
+            monto=Decimal(i) / 4, fecha=hoy - timedelta(days=i % 365), destinatario=f'Proveedor {i % 50}',
+            pagado=i % 2 == 0, categoria='Insumos', descripcion='Compra de insumos ' * 4,
+            usuario_id=USUARIO_BENCHMARK
+        )
+        for i in range(filas)
+    ], batch_size=1000)
+    Movimiento.objects.bulk_create([
+        Movimiento(
+            monto=Decimal(i) / 3, fecha=hoy - timedelta(days=i % 365), categoria='Venta',
+            es_cobro=i % 3 == 0, descripcion=f'Movimiento {i}', usuario_id=USUARIO_BENCHMARK
+        )
+        for i in range(filas)
+    ], batch_size=1000)
+    Personal.objects.bulk_create([
+        Personal(nombre=f'Operario {i}', horas_trabajadas=Decimal(i) / 10, usuario_id=USUARIO_BENCHMARK)
+        for i in range(filas)
+    ], batch_size=1000)
+    Campo.objects.bulk_create([
+        Campo(
+            nombre=f'Lote {i}', hectareas=Decimal(i) / 7, latitud=Decimal('-34.60370000'),
+            longitud=Decimal('-58.38160000'), usuario_id=USUARIO_BENCHMARK
+        )
+        for i in range(filas)
+    ], batch_size=1000)
+
+
+def _mejor_tiempo(funcion, repeticiones: int) -> tuple[float, object]:
+    mejor, resultado = None, None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor, resultado
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el listado con ModelSerializer contra serializar_lista (values() + conversores) '
+        'y el render/tamaño en la red (JSONRenderer vs FastJSONRenderer, gzip, brotli) de los '
+        'listados y de mobile/sync, sobre filas de prueba que se descartan al terminar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas',
+            type=int,
+            default=10000,
+            help='Filas por modelo (default: 10000)'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Se reporta el mejor tiempo de N corridas (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        filas, repeticiones = options['filas'], options['repeticiones']
+        renderer = JSONRenderer()
+        casos = [
+            (Costo, CostoSerializer),
+            (Movimiento, MovimientoSerializer),
+            (Personal, PersonalSerializer),
+            (Campo, CampoSerializer),
+        ]
+        payloads = {}
+        with transaction.atomic():
+            _crear_filas(filas)
+            for modelo, serializer_class in casos:
+                queryset = modelo.objects.filter(usuario_id=USUARIO_BENCHMARK).order_by('id')
+                lento, data_lenta = _mejor_tiempo(
+                    lambda: serializer_class(queryset.all(), many=True).data, repeticiones
+                )
+                rapido, data_rapida = _mejor_tiempo(
+                    lambda: serializar_lista(queryset.all(), serializer_class), repeticiones
+                )
+                # Lo que cuesta solo leer las filas en cada camino (modelos / tuplas)
+                lectura_lenta, _ = _mejor_tiempo(lambda: list(queryset.all()), repeticiones)
+                columnas = [campo.source for campo in serializer_class().fields.values() if not campo.write_only]
+                lectura_rapida, _ = _mejor_tiempo(lambda: list(queryset.values_list(*columnas)), repeticiones)
+                cpu_lenta = max(lento - lectura_lenta, 0) / filas * 1e6
+                cpu_rapida = max(rapido - lectura_rapida, 0) / filas * 1e6
+
+                identico = renderer.render(data_lenta) == renderer.render(data_rapida)
+                self.stdout.write(
+                    f'{modelo._meta.db_table:<12} {filas} filas  '
+                    f'ModelSerializer {lento * 1000:7.1f} ms (serialización {cpu_lenta:5.1f} µs/fila)  '
+                    f'serializar_lista {rapido * 1000:7.1f} ms (serialización {cpu_rapida:5.1f} µs/fila)  '
+                    f'x{lento / rapido:4.1f} total, x{cpu_lenta / max(cpu_rapida, 0.01):4.1f} serialización  '
+                    f'JSON idéntico: {"sí" if identico else "NO"}'
+                )
+                payloads[modelo._meta.db_table] = {'success': True, 'data': data_rapida}
+
+            # Snapshot completo de mobile/sync del tenant de prueba, como lo arma MobileSyncView
+            querysets, eliminados, _, _ = get_cambios(USUARIO_BENCHMARK, None)
+            payloads['mobile/sync'] = {'success': True, 'data': {
+                **{
+                    recurso: serializar_lista(
+                        trabajos_para_listado(queryset) if recurso == 'trabajos' else queryset,
+                        SERIALIZERS_SYNC[recurso]
+                    )
+                    for recurso, queryset in querysets.items()
+                },
+                'eliminados': eliminados,
+            }}
+            transaction.set_rollback(True)
+
+        self._benchmark_respuestas(payloads, repeticiones)
+        self.stdout.write(self.style.SUCCESS('✓ Benchmark terminado (filas de prueba descartadas)'))
+
+    def _benchmark_respuestas(self, payloads, repeticiones):
+        drf, rapido = JSONRenderer(), FastJSONRenderer()
+        codificaciones = ['gzip'] + (['br'] if brotli is not None else [])
+        for nombre, payload in payloads.items():
+            lento_s, cuerpo = _mejor_tiempo(lambda: drf.render(payload), repeticiones)
+            rapido_s, cuerpo_rapido = _mejor_tiempo(lambda: rapido.render(payload), repeticiones)
+            linea = (
+                f'{nombre:<12} render JSONRenderer {lento_s * 1000:7.1f} ms  FastJSONRenderer '
+                f'{rapido_s * 1000:6.1f} ms (x{lento_s / rapido_s:4.1f}, '
+                f'{"idéntico" if cuerpo == cuerpo_rapido else "DISTINTO"})  {len(cuerpo) / 1024:8.1f} KiB'
+            )
+            for codificacion in codificaciones:
+                segundos, comprimido = _mejor_tiempo(lambda: comprimir(cuerpo, codificacion), repeticiones)
+                linea += (
+                    f'  {codificacion} {len(comprimido) / 1024:7.1f} KiB '
+                    f'({len(comprimido) / len(cuerpo):4.0%}, {segundos * 1000:5.1f} ms)'
+                )
+            self.stdout.write(linea)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from api.services.auth_token_service import purge_expired_tokens, PURGE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Elimina tokens de acceso expirados o inactivos de auth_tokens en lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help=f'Filas a borrar por lote (default: {PURGE_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Cantidad máxima de lotes a procesar (default: sin límite)'
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {deleted} tokens eliminados de auth_tokens')
+        )
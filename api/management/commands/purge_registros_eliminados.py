@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.services.sync_service import purge_registros_eliminados, PURGE_BATCH_SIZE, TOMBSTONE_RETENTION
+
+
+class Command(BaseCommand):
+    help = f'Elimina tombstones de registros_eliminados más viejos que la retención ({TOMBSTONE_RETENTION.days} días)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PURGE_BATCH_SIZE,
+            help=f'Filas a borrar por lote (default: {PURGE_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_registros_eliminados(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {deleted} tombstones eliminados de registros_eliminados')
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.services.resumen_financiero_service import rebuild_resumen_financiero
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el rollup mensual resumen_financiero_mensual a partir de movimientos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario-id',
+            type=int,
+            default=None,
+            help='Recalcular solo el rollup de este usuario (default: todos)'
+        )
+
+    def handle(self, *args, **options):
+        filas = rebuild_resumen_financiero(usuario_id=options['usuario_id'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {filas} filas generadas en resumen_financiero_mensual')
+        )
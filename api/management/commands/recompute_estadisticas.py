@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.models import Personal, Maquina
+from api.response_cache import bump_tenant_version
+from api.services.estadisticas_service import recalcular_tenant
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas de personal y máquinas (superficie, horas, trabajos completados, último trabajo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario-id',
+            type=int,
+            default=None,
+            help='Recalcular solo el personal y las máquinas de este usuario (default: todos)'
+        )
+
+    def handle(self, *args, **options):
+        usuario_id = options['usuario_id']
+        personal, maquinas = recalcular_tenant(usuario_id=usuario_id)
+        bump_tenant_version(usuario_id, Personal, Maquina)
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {personal} personal y {maquinas} máquinas recalculados')
+        )
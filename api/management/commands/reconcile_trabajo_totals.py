@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from api.services.trabajo_service import reconcile_trabajo_totals
+
+
+class Command(BaseCommand):
+    help = 'Recalcula ha_realizadas y horas_registradas de trabajos a partir de trabajo_personal'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario-id',
+            type=int,
+            default=None,
+            help='Reconciliar solo los trabajos de este usuario (default: todos)'
+        )
+
+    def handle(self, *args, **options):
+        corregidos = reconcile_trabajo_totals(usuario_id=options['usuario_id'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {corregidos} trabajos corregidos')
+        )
@@ -0,0 +1,106 @@
+"""
+Compresión de respuestas negociada por Accept-Encoding (brotli o gzip).
+
+Solo se comprimen respuestas de al menos RESPONSE_COMPRESSION_MIN_BYTES: por
+debajo el encabezado y la CPU no compensan. brotli es opcional (paquete
+`Brotli`); sin él se negocia solo gzip. Los streams (exportaciones) van en gzip
+por partes, como en GZipMiddleware de Django.
+
+Mitigación de BREACH: no se comprimen los endpoints de autenticación (devuelven el
+token y reflejan datos del request) ni las respuestas con Vary: Cookie o
+Authorization, y gzip agrega relleno de largo aleatorio como GZipMiddleware.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+COMPRESSION_MIN_BYTES = getattr(settings, 'RESPONSE_COMPRESSION_MIN_BYTES', 1024)
+# Calidad media: buena relación tamaño/CPU para respuestas dinámicas (máximo 11)
+BROTLI_QUALITY = getattr(settings, 'RESPONSE_COMPRESSION_BROTLI_QUALITY', 5)
+
+# Prefijos de path que nunca se comprimen (login, logout, cambio de contraseña)
+COMPRESSION_EXCLUDED_PATHS = tuple(getattr(settings, 'RESPONSE_COMPRESSION_EXCLUDED_PATHS', ('/api/auth/',)))
+# Relleno aleatorio del encabezado gzip (mismo valor que GZipMiddleware)
+GZIP_MAX_RANDOM_BYTES = 100
+_VARY_SENSIBLES = {'cookie', 'authorization'}
+
+_Q = re.compile(r'q=([0-9.]+)')
+
+
+def negociar_codificacion(accept_encoding: str, streaming: bool = False) -> str | None:
+    """'br', 'gzip' o None según Accept-Encoding (q-values; a igual q gana br)."""
+    pesos = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        q = 1.0
+        match = _Q.search(parametros)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        pesos[nombre.strip().lower()] = q
+
+    candidatas = ['gzip'] if streaming or brotli is None else ['br', 'gzip']
+    mejor, mejor_q = None, 0.0
+    for codificacion in candidatas:
+        q = pesos.get(codificacion, pesos.get('*', 0.0))
+        if q > mejor_q:
+            mejor, mejor_q = codificacion, q
+    return mejor
+
+
+def comprimir(contenido: bytes, codificacion: str) -> bytes:
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=BROTLI_QUALITY)
+    return compress_string(contenido, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def _sin_compresion(request, response) -> bool:
+    """Respuestas expuestas a BREACH: autenticación o contenido que depende de credenciales."""
+    if request.path.startswith(COMPRESSION_EXCLUDED_PATHS):
+        return True
+    vary = {valor.strip().lower() for valor in response.get('Vary', '').split(',')}
+    return bool(vary & _VARY_SENSIBLES)
+
+
+class CompresionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or _sin_compresion(request, response):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = negociar_codificacion(request.headers.get('Accept-Encoding', ''), response.streaming)
+        if codificacion is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content, max_random_bytes=GZIP_MAX_RANDOM_BYTES
+            )
+            del response.headers['Content-Length']
+        else:
+            comprimido = comprimir(response.content, codificacion)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        # El cuerpo cambia de bytes: un ETag fuerte dejaría de ser válido
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacion
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_trabajopersonal_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authtoken',
+            name='generation',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='authtoken',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
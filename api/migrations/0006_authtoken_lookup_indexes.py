@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_authtoken_generation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='authtoken',
+            name='auth_tokens_access__f9680e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='authtoken',
+            index=models.Index(fields=['access_token', 'is_active', 'expires_at', 'usuario_id'], name='auth_tokens_access__e6ed0e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authtoken',
+            index=models.Index(fields=['expires_at'], name='auth_tokens_expires_f09206_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authtoken',
+            index=models.Index(fields=['updated_at'], name='auth_tokens_updated_30eed1_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-17 20:33
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+def backfill_resumen(apps, schema_editor):
+    # Misma agregación que rebuild_resumen_financiero, con los modelos históricos
+    Movimiento = apps.get_model('api', 'Movimiento')
+    ResumenFinancieroMensual = apps.get_model('api', 'ResumenFinancieroMensual')
+
+    agregados = (
+        Movimiento.objects
+        .filter(usuario_id__isnull=False, fecha__isnull=False, es_cobro__isnull=False)
+        .annotate(mes=TruncMonth('fecha'), cat=Coalesce('categoria', Value('')))
+        .values('usuario_id', 'mes', 'es_cobro', 'cat')
+        .annotate(total=Coalesce(Sum('monto'), Decimal('0')), cantidad=Count('id'))
+        .order_by()
+    )
+    filas = {}
+    for fila in agregados:
+        clave = (fila['usuario_id'], fila['mes'].strftime('%Y-%m'), fila['es_cobro'], fila['cat'])
+        previa = filas.get(clave)
+        if previa:
+            previa.total += fila['total']
+            previa.cantidad += fila['cantidad']
+            continue
+        filas[clave] = ResumenFinancieroMensual(
+            usuario_id=clave[0], periodo=clave[1], es_cobro=clave[2], categoria=clave[3],
+            total=fila['total'], cantidad=fila['cantidad']
+        )
+    ResumenFinancieroMensual.objects.bulk_create(filas.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_authtoken_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenFinancieroMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usuario_id', models.IntegerField()),
+                ('periodo', models.CharField(max_length=7)),
+                ('es_cobro', models.BooleanField()),
+                ('categoria', models.CharField(blank=True, default='', max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'resumen_financiero_mensual',
+                'constraints': [models.UniqueConstraint(fields=('usuario_id', 'periodo', 'es_cobro', 'categoria'), name='resumen_financiero_mensual_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_resumen_financiero_mensual'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trabajo',
+            index=models.Index(fields=['usuario_id', 'fecha_inicio'], name='trabajos_usuario_68704c_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_trabajo_periodo_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['nombre'], name='usuarios_nombre_1ca585_idx'),
+        ),
+    ]
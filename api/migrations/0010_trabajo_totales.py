@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-17 20:42
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totales(apps, schema_editor):
+    Trabajo = apps.get_model('api', 'Trabajo')
+    TrabajoPersonal = apps.get_model('api', 'TrabajoPersonal')
+
+    def total(campo):
+        suma = (
+            TrabajoPersonal.objects.filter(trabajo=OuterRef('pk'))
+            .order_by().values('trabajo').annotate(t=Sum(campo)).values('t')
+        )
+        return Coalesce(Subquery(suma), Value(Decimal('0')), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    Trabajo.objects.update(
+        ha_realizadas=total('hectareas'),
+        horas_registradas=total('horas_trabajadas')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_usuario_nombre_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajo',
+            name='ha_realizadas',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='trabajo',
+            name='horas_registradas',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totales, migrations.RunPython.noop),
+    ]
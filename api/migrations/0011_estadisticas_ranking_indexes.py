@@ -0,0 +1,93 @@
+# Generated by Django 5.2 on 2026-10-17 20:46
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import CharField, Count, F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Now
+
+
+class _SqlSum(Func):
+    function = 'SUM'
+
+
+def backfill_estadisticas(apps, schema_editor):
+    # Misma lógica que recalcular_personal / recalcular_maquinas, con los modelos históricos.
+    # Los totales de los trabajos (de los que dependen las máquinas) ya los llenó 0010.
+    Personal = apps.get_model('api', 'Personal')
+    Maquina = apps.get_model('api', 'Maquina')
+    Trabajo = apps.get_model('api', 'Trabajo')
+    TrabajoPersonal = apps.get_model('api', 'TrabajoPersonal')
+    TrabajoMaquina = apps.get_model('api', 'TrabajoMaquina')
+
+    def suma(queryset, campo):
+        return Coalesce(
+            Subquery(queryset.order_by().annotate(t=_SqlSum(F(campo))).values('t')[:1]),
+            Value(Decimal('0'))
+        )
+
+    def ultimo_trabajo(trabajo_ids):
+        return Subquery(
+            Trabajo.objects
+            .filter(pk__in=trabajo_ids)
+            .order_by(F('fecha_inicio').desc(nulls_last=True), '-id')
+            .annotate(etiqueta=Concat(
+                Coalesce('id_tipo_trabajo__trabajo', Value('Trabajo')),
+                Value(' - '),
+                Coalesce('campo__nombre', Value('Sin campo')),
+                output_field=CharField()
+            ))
+            .values('etiqueta')[:1]
+        )
+
+    registros = TrabajoPersonal.objects.filter(personal_id=OuterRef('pk'))
+    completados = (
+        TrabajoPersonal.objects.filter(personal_id=OuterRef('pk'), trabajo__estado='Completado')
+        .order_by().values('personal_id')
+        .annotate(n=Count('trabajo_id', distinct=True)).values('n')
+    )
+    Personal.objects.update(
+        superficie_total_ha=suma(registros, 'hectareas'),
+        horas_trabajadas=suma(registros, 'horas_trabajadas'),
+        trabajos_completados=Coalesce(Subquery(completados), Value(0)),
+        ultimo_trabajo=ultimo_trabajo(
+            TrabajoPersonal.objects.filter(personal_id=OuterRef(OuterRef('pk'))).values('trabajo_id')
+        ),
+        updated_at=Now(),
+    )
+
+    trabajos_ids = TrabajoMaquina.objects.filter(maquina_id=OuterRef(OuterRef('pk'))).values('trabajo_id')
+    trabajos = Trabajo.objects.filter(pk__in=trabajos_ids)
+    Maquina.objects.update(
+        superficie_total_ha=suma(trabajos, 'ha_realizadas'),
+        horas_trabajadas=suma(trabajos, 'horas_registradas'),
+        ultimo_trabajo=ultimo_trabajo(trabajos_ids),
+        updated_at=Now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_trabajo_totales'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maquina',
+            index=models.Index(fields=['usuario_id', 'superficie_total_ha'], name='maquinas_usuario_f4b5d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maquina',
+            index=models.Index(fields=['usuario_id', 'horas_trabajadas'], name='maquinas_usuario_5319c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personal',
+            index=models.Index(fields=['usuario_id', 'superficie_total_ha'], name='personal_usuario_51c47e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personal',
+            index=models.Index(fields=['usuario_id', 'horas_trabajadas'], name='personal_usuario_b649b7_idx'),
+        ),
+        migrations.RunPython(backfill_estadisticas, migrations.RunPython.noop),
+    ]
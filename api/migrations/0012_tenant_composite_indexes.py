@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-17 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_estadisticas_ranking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campo',
+            index=models.Index(fields=['usuario_id', 'updated_at'], name='campos_usuario_76d559_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['usuario_id', 'updated_at'], name='clientes_usuario_f44408_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costo',
+            index=models.Index(fields=['usuario_id', 'pagado'], name='costos_usuario_11e47d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costo',
+            index=models.Index(fields=['usuario_id', 'fecha'], name='costos_usuario_b05893_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['usuario_id', 'estado', 'fecha_vencimiento'], name='facturas_usuario_b476a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['usuario_id', 'fecha_emision'], name='facturas_usuario_78f6f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['usuario_id', 'stock_actual', 'stock_minimo'], name='insumos_usuario_539361_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mantenimiento',
+            index=models.Index(fields=['usuario_id', 'estado'], name='mantenimien_usuario_1e3d55_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maquina',
+            index=models.Index(fields=['usuario_id', 'updated_at'], name='maquinas_usuario_5a23c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['usuario_id', 'fecha', 'es_cobro'], name='movimientos_usuario_198cf3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['usuario_id', 'fecha'], name='pagos_usuario_d4463e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personal',
+            index=models.Index(fields=['usuario_id', 'updated_at'], name='personal_usuario_93aa05_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajo',
+            index=models.Index(fields=['usuario_id', 'estado'], name='trabajos_usuario_102505_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajo',
+            index=models.Index(fields=['usuario_id', 'updated_at'], name='trabajos_usuario_2a015b_idx'),
+        ),
+    ]
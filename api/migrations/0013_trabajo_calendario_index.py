@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_tenant_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trabajo',
+            index=models.Index(fields=['usuario_id', 'fecha_inicio', 'fecha_fin'], name='trabajos_usuario_a2cee7_idx'),
+        ),
+        # Se crea el nuevo antes de borrar el viejo: los reportes nunca quedan sin índice
+        migrations.RemoveIndex(
+            model_name='trabajo',
+            name='trabajos_usuario_68704c_idx',
+        ),
+    ]
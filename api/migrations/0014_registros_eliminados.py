@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 20:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_trabajo_calendario_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usuario_id', models.IntegerField()),
+                ('recurso', models.CharField(max_length=50)),
+                ('objeto_id', models.IntegerField()),
+                ('eliminado_en', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'registros_eliminados',
+                'indexes': [models.Index(fields=['usuario_id', 'eliminado_en'], name='registros_e_usuario_edeb3b_idx'), models.Index(fields=['eliminado_en'], name='registros_e_elimina_7d2209_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_registros_eliminados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimiento',
+            name='client_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='trabajo',
+            name='client_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='movimiento',
+            constraint=models.UniqueConstraint(fields=('usuario_id', 'client_uuid'), name='movimientos_client_uuid_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='trabajo',
+            constraint=models.UniqueConstraint(fields=('usuario_id', 'client_uuid'), name='trabajos_client_uuid_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from .utils import get_usuario_id_from_request
+
+
+class TenantQuerysetMixin:
+    """
+    Mixin para vistas genéricas que filtra por el tenant (usuario_id)
+    del principal autenticado y lo asigna al crear.
+    Las subclases definen `model`.
+    """
+    model = None
+
+    def get_usuario_id(self):
+        return get_usuario_id_from_request(self.request)
+
+    def get_queryset(self):
+        usuario_id = self.get_usuario_id()
+        if usuario_id:
+            return self.model.objects.filter(usuario_id=usuario_id)
+        return self.model.objects.none()
+
+    def perform_create(self, serializer):
+        usuario_id = self.get_usuario_id()
+        if usuario_id:
+            serializer.save(usuario_id=usuario_id)
+        else:
+            serializer.save()
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 class UsuarioManager(BaseUserManager):
@@ -54,6 +55,10 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = 'usuarios'
+        indexes = [
+            # Resolución de rol del personal por nombre
+            models.Index(fields=['nombre']),
+        ]
 
     def __str__(self):
         return self.email
@@ -64,12 +69,19 @@ class AuthToken(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # Se incrementa en cada emisión; los tokens firmados la llevan en el payload
+    generation = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'auth_tokens'
         indexes = [
-            models.Index(fields=['access_token']),
+            # Cubre la validación de tokens opacos: lookup solo por índice
+            models.Index(fields=['access_token', 'is_active', 'expires_at', 'usuario_id']),
             models.Index(fields=['usuario_id']),
+            # Barrido de expirados/inactivos y sync incremental de revocaciones
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
@@ -101,6 +113,10 @@ class Campo(models.Model):
 
     class Meta:
         db_table = 'campos'
+        indexes = [
+            # Sincronización móvil incremental (updated_at > since)
+            models.Index(fields=['usuario_id', 'updated_at']),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -120,6 +136,10 @@ class Cliente(models.Model):
 
     class Meta:
         db_table = 'clientes'
+        indexes = [
+            # Sincronización móvil incremental (updated_at > since)
+            models.Index(fields=['usuario_id', 'updated_at']),
+        ]
 
 
     def __str__(self):
@@ -157,6 +177,12 @@ class Maquina(models.Model):
 
     class Meta:
         db_table = 'maquinas'
+        indexes = [
+            # Rankings por tenant sobre las estadísticas mantenidas (ver estadisticas_service)
+            models.Index(fields=['usuario_id', 'superficie_total_ha']),
+            models.Index(fields=['usuario_id', 'horas_trabajadas']),
+            models.Index(fields=['usuario_id', 'updated_at']),
+        ]
 
 
     def __str__(self):
@@ -178,6 +204,12 @@ class Personal(models.Model):
 
     class Meta:
         db_table = 'personal'
+        indexes = [
+            # Rankings por tenant sobre las estadísticas mantenidas (ver estadisticas_service)
+            models.Index(fields=['usuario_id', 'superficie_total_ha']),
+            models.Index(fields=['usuario_id', 'horas_trabajadas']),
+            models.Index(fields=['usuario_id', 'updated_at']),
+        ]
 
 
     def __str__(self):
@@ -202,12 +234,41 @@ class Trabajo(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     horas_trabajadas = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, null=True, blank=True)
     usuario_id = models.IntegerField(null=True, blank=True, db_index=True)
+    # Totales de trabajo_personal mantenidos con F() (ver trabajo_service.aplicar_delta_trabajo)
+    ha_realizadas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    horas_registradas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # UUID generado por el móvil al crear offline (upsert idempotente en mobile/sync)
+    client_uuid = models.UUIDField(null=True, blank=True, editable=False)
     
     personal = models.ManyToManyField(Personal, through='TrabajoPersonal', related_name='trabajos')
     maquinas = models.ManyToManyField(Maquina, through='TrabajoMaquina', related_name='trabajos')
 
     class Meta:
         db_table = 'trabajos'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario_id', 'client_uuid'], name='trabajos_client_uuid_uniq'),
+        ]
+        indexes = [
+            # Reportes por período (rango sobre fecha_inicio) y calendario
+            # (fecha_inicio < hasta AND fecha_fin >= desde): sirve a los dos
+            models.Index(fields=['usuario_id', 'fecha_inicio', 'fecha_fin']),
+            # Filtros por estado y sincronización móvil incremental (updated_at > since)
+            models.Index(fields=['usuario_id', 'estado']),
+            models.Index(fields=['usuario_id', 'updated_at']),
+        ]
+
+    # Solo se modifican con UPDATE ... F() desde trabajo_service
+    TOTALES_MANTENIDOS = ('ha_realizadas', 'horas_registradas')
+
+    def save(self, *args, **kwargs):
+        # Un save() de una instancia leída antes no debe pisar los totales que
+        # otro request incrementó mientras tanto
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.TOTALES_MANTENIDOS
+            ]
+        super().save(*args, **kwargs)
 
 
 class TrabajoPersonal(models.Model):
@@ -256,6 +317,11 @@ class Costo(models.Model):
 
     class Meta:
         db_table = 'costos'
+        indexes = [
+            # Listados pagados/pendientes y filtros por período del tenant
+            models.Index(fields=['usuario_id', 'pagado']),
+            models.Index(fields=['usuario_id', 'fecha']),
+        ]
 
 
 class Factura(models.Model):
@@ -273,6 +339,11 @@ class Factura(models.Model):
 
     class Meta:
         db_table = 'facturas'
+        indexes = [
+            # Pendientes/vencidas del dashboard y exportación por período
+            models.Index(fields=['usuario_id', 'estado', 'fecha_vencimiento']),
+            models.Index(fields=['usuario_id', 'fecha_emision']),
+        ]
 
 
 class FacturaItem(models.Model):
@@ -329,6 +400,10 @@ class Pago(models.Model):
 
     class Meta:
         db_table = 'pagos'
+        indexes = [
+            # Exportación por período
+            models.Index(fields=['usuario_id', 'fecha']),
+        ]
 
 
 class Movimiento(models.Model):
@@ -349,9 +424,53 @@ class Movimiento(models.Model):
     usuario_id = models.IntegerField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # UUID generado por el móvil al crear offline (upsert idempotente en mobile/sync)
+    client_uuid = models.UUIDField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'movimientos'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario_id', 'client_uuid'], name='movimientos_client_uuid_uniq'),
+        ]
+        indexes = [
+            # Ingresos/gastos por período del tenant
+            models.Index(fields=['usuario_id', 'fecha', 'es_cobro']),
+        ]
+
+
+class ResumenFinancieroMensual(models.Model):
+    """Rollup de movimientos por (usuario, mes, tipo, categoría), mantenido por señales."""
+    usuario_id = models.IntegerField()
+    periodo = models.CharField(max_length=7)  # 'YYYY-MM'
+    es_cobro = models.BooleanField()
+    categoria = models.CharField(max_length=100, blank=True, default='')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'resumen_financiero_mensual'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['usuario_id', 'periodo', 'es_cobro', 'categoria'],
+                name='resumen_financiero_mensual_uniq'
+            ),
+        ]
+
+
+class RegistroEliminado(models.Model):
+    """Tombstone de un registro borrado, para la sincronización incremental del móvil."""
+    usuario_id = models.IntegerField()
+    recurso = models.CharField(max_length=50)  # clave de sync_service.RECURSOS_SYNC
+    objeto_id = models.IntegerField()
+    eliminado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'registros_eliminados'
+        indexes = [
+            models.Index(fields=['usuario_id', 'eliminado_en']),
+            # Purga por retención
+            models.Index(fields=['eliminado_en']),
+        ]
 
 
 class Mantenimiento(models.Model):
@@ -366,6 +485,10 @@ class Mantenimiento(models.Model):
 
     class Meta:
         db_table = 'mantenimientos'
+        indexes = [
+            # Mantenimientos pendientes del dashboard
+            models.Index(fields=['usuario_id', 'estado']),
+        ]
 
 
 class Insumo(models.Model):
@@ -385,4 +508,8 @@ class Insumo(models.Model):
 
     class Meta:
         db_table = 'insumos'
+        indexes = [
+            # Bajo stock: stock_actual <= stock_minimo se evalúa sobre el índice, sin leer filas
+            models.Index(fields=['usuario_id', 'stock_actual', 'stock_minimo']),
+        ]
 
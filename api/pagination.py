@@ -0,0 +1,78 @@
+"""
+Paginación por cursor (keyset) para los listados de Flutter.
+
+El cursor es opaco para el cliente: codifica el orden y los valores de la última
+fila entregada, y la página siguiente se pide con `WHERE (orden, id) > (valores)`.
+Cada página cuesta lo mismo sin importar cuán profundo se esté, y las filas no se
+corren entre páginas cuando se insertan o borran otras.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+# orden -> campos del ORDER BY (siempre terminan en 'id' para desempatar)
+ORDENES_CURSOR = {
+    'id': ('id',),
+    'updated_at': ('updated_at', 'id'),
+}
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def encode_cursor(orden: str, valores) -> str:
+    """Cursor de la fila con `valores` en las columnas de ORDENES_CURSOR[orden]."""
+    valores = [valor.isoformat() if isinstance(valor, datetime) else valor for valor in valores]
+    raw = json.dumps({'o': orden, 'v': valores}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, orden: str) -> list:
+    """Valores de la última fila del cursor; CursorInvalido si no corresponde a `orden`."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        orden_cursor, valores = data['o'], data['v']
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+        raise CursorInvalido('Cursor inválido') from exc
+    if orden_cursor != orden or not isinstance(valores, list) or len(valores) != len(ORDENES_CURSOR[orden]):
+        raise CursorInvalido('El cursor no corresponde al orden pedido')
+    if orden == 'updated_at':
+        try:
+            valores[0] = datetime.fromisoformat(valores[0])
+        except (TypeError, ValueError) as exc:
+            raise CursorInvalido('Cursor inválido') from exc
+    return valores
+
+
+def _despues_de(campos, valores) -> Q:
+    """(c1, c2, ...) > (v1, v2, ...) expandido a ORs: portable y aprovecha el índice."""
+    condicion = Q()
+    for i, campo in enumerate(campos):
+        paso = Q(**{f'{campo}__gt': valores[i]})
+        for previo, valor in zip(campos[:i], valores[:i]):
+            paso &= Q(**{previo: valor})
+        condicion |= paso
+    return condicion
+
+
+def paginar_keyset(queryset, orden: str, cursor: str | None, limit: int):
+    """
+    Página de `limit` filas después de `cursor` (None = primera página).
+    Devuelve (queryset de la página, next_cursor); next_cursor es None en la última.
+    Lee primero solo las columnas del orden de limit + 1 filas (del índice, sin
+    count()) para saber si hay más y armar el cursor; la página queda como queryset
+    por pk para serializarla con serializar_lista.
+    """
+    campos = ORDENES_CURSOR[orden]
+    queryset = queryset.order_by(*campos)
+    claves = queryset.prefetch_related(None)
+    if cursor:
+        claves = claves.filter(_despues_de(campos, decode_cursor(cursor, orden)))
+    claves = list(claves.values_list(*campos)[:limit + 1])
+    next_cursor = encode_cursor(orden, claves[limit - 1]) if len(claves) > limit else None
+    # 'id' es siempre la última columna del orden
+    return queryset.filter(pk__in=[clave[-1] for clave in claves[:limit]]), next_cursor
@@ -0,0 +1,15 @@
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.permissions import BasePermission
+
+
+class IsTenantAuthenticated(BasePermission):
+    """
+    Exige un request autenticado por AccessTokenAuthentication.
+    Responde 401 con el mismo mensaje que usaban las vistas.
+    """
+    message = 'Token de acceso requerido'
+
+    def has_permission(self, request, view):
+        if getattr(request.user, 'usuario_id', None):
+            return True
+        raise NotAuthenticated(self.message)
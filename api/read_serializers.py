@@ -0,0 +1,172 @@
+"""
+Camino de lectura rápido para los listados grandes.
+
+serializar_lista() devuelve lo mismo que `serializer_class(queryset, many=True).data`
+(mismas claves, en el mismo orden, con los mismos valores) pero arma cada fila
+desde values_list() con un conversor precompilado por campo, sin instanciar
+modelos ni recorrer los fields de DRF por fila. El plan (columnas y conversores)
+se deriva de los fields del propio ModelSerializer y se cachea por serializer,
+así que agregar un campo al serializer lo agrega acá también.
+
+Solo aplica a serializers planos: cada campo legible sale de una columna del
+modelo (o de la FK como pk). Con relaciones anidadas, m2m, fuentes con puntos o
+SerializerMethodField se usa el ModelSerializer tal cual. La escritura siempre
+pasa por los ModelSerializer.
+"""
+import decimal
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+
+def _identidad(valor):
+    return valor
+
+
+def _fabrica_decimal(field):
+    if field.localize or field.normalize_output or not getattr(
+        field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING
+    ):
+        return None
+    exponente = decimal.Decimal('.1') ** field.decimal_places if field.decimal_places is not None else None
+
+    def fabrica():
+        # Mismo contexto que DecimalField.quantize, armado una vez por listado
+        contexto = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            contexto.prec = field.max_digits
+
+        def convertir(valor):
+            if not isinstance(valor, decimal.Decimal):
+                valor = decimal.Decimal(str(valor).strip())
+            if exponente is not None:
+                valor = valor.quantize(exponente, rounding=field.rounding, context=contexto)
+            return f'{valor:f}'
+        return convertir
+    return fabrica
+
+
+def _fabrica_datetime(field):
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() != ISO_8601:
+        return None
+
+    def fabrica():
+        zona = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if zona is None:
+            return field.to_representation
+
+        def convertir(valor):
+            valor = valor.astimezone(zona).isoformat()
+            return valor[:-6] + 'Z' if valor.endswith('+00:00') else valor
+        return convertir
+    return fabrica
+
+
+# Tipos de columna cuyo valor ya llega de la base con la representación de DRF
+_NATIVOS = {
+    serializers.BooleanField: {'BooleanField'},
+    serializers.IntegerField: {
+        'AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField',
+        'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField',
+    },
+    serializers.CharField: {'CharField', 'TextField'},
+}
+
+
+def _fabrica(field, columna):
+    """
+    Función sin argumentos que devuelve el conversor valor -> representación del
+    campo (equivalente a field.to_representation para valores no nulos), o None
+    si el campo no tiene atajo (se usa field.to_representation).
+    """
+    for clase, tipos in _NATIVOS.items():
+        if isinstance(field, clase) and columna.get_internal_type() in tipos \
+                and not getattr(field, 'coerce_to_string', False):
+            return lambda: _identidad
+    if isinstance(field, serializers.DecimalField):
+        return _fabrica_decimal(field)
+    if isinstance(field, serializers.DateTimeField):
+        return _fabrica_datetime(field)
+    if isinstance(field, serializers.DateField):
+        if getattr(field, 'format', api_settings.DATE_FORMAT).lower() != ISO_8601:
+            return None
+        return lambda: lambda valor: valor.isoformat()
+    if isinstance(field, serializers.BooleanField):
+        return lambda: bool
+    if isinstance(field, serializers.FloatField):
+        return lambda: float
+    if isinstance(field, serializers.IntegerField) and not getattr(field, 'coerce_to_string', False):
+        return lambda: int
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return lambda: str
+    if isinstance(field, serializers.CharField):
+        return lambda: str
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return lambda: _identidad
+    if type(field) is serializers.ReadOnlyField:
+        return lambda: _identidad
+    return None
+
+
+# Un plan por (serializer, ?fields=, ?expand=): acotado porque los subconjuntos
+# de ?fields= los elige el cliente
+MAX_PLANES = 256
+
+
+@lru_cache(maxsize=MAX_PLANES)
+def _plan(serializer_class, fields, expand):
+    """
+    ((clave, columna, fabrica), ...) o None si el serializer no es plano.
+    `fields`/`expand` van como frozenset: la salida sigue el orden del serializer,
+    no el del request, así que ?fields=a,b y ?fields=b,a comparten plan.
+    """
+    modelo = serializer_class.Meta.model
+    serializer = serializer_class(fields=fields, expand=expand) if fields is not None else serializer_class()
+    plan = []
+    for clave, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField,
+                              serializers.SerializerMethodField)) or '.' in field.source:
+            return None
+        try:
+            columna = modelo._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not columna.concrete or columna.many_to_many:
+            return None
+        if isinstance(field, serializers.RelatedField) and (
+            not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None
+        ):
+            return None
+        fabrica = _fabrica(field, columna)
+        plan.append((clave, columna.name, fabrica or (lambda field=field: field.to_representation)))
+    return tuple(plan)
+
+
+def serializar_lista(queryset, serializer_class, fields=None, expand=()):
+    """
+    Representación de `queryset` idéntica a
+    `serializer_class(queryset, many=True, fields=fields, expand=expand).data`.
+    Por values_list() si el serializer es plano; si no, con el serializer.
+    """
+    plan = _plan(serializer_class, frozenset(fields) if fields is not None else None, frozenset(expand))
+    if plan is None:
+        opciones = {'fields': fields, 'expand': expand} if fields is not None else {}
+        return serializer_class(queryset, many=True, **opciones).data
+
+    claves = [clave for clave, _, _ in plan]
+    conversores = [(indice, fabrica()) for indice, (_, _, fabrica) in enumerate(plan)]
+    conversores = [(indice, convertir) for indice, convertir in conversores if convertir is not _identidad]
+
+    resultado = []
+    for fila in queryset.prefetch_related(None).values_list(*(columna for _, columna, _ in plan)):
+        fila = list(fila)
+        for indice, convertir in conversores:
+            valor = fila[indice]
+            if valor is not None:
+                fila[indice] = convertir(valor)
+        resultado.append(dict(zip(claves, fila)))
+    return resultado
@@ -0,0 +1,178 @@
+"""
+Cache de respuestas de lectura por tenant, invalidado por versión.
+
+Cada (usuario_id, modelo) tiene una versión en el cache de Django (marca de tiempo
+en ns) que se renueva desde las señales post_save/post_delete/m2m_changed (ver
+signals.py). La clave de una respuesta incluye tenant, path, query params
+normalizados y las versiones de los modelos de los que depende, así que cualquier
+escritura invalida en O(1) sin borrar claves y nunca se sirven datos desactualizados.
+
+Las mismas versiones dan los validadores HTTP: ETag (hash de la clave) y
+Last-Modified (la versión más reciente). Un GET condicional que coincide se
+responde 304 sin tocar la base ni serializar.
+
+Las versiones tienen que estar en un cache compartido por todos los procesos
+(Redis, ver CACHES en settings). Con el cache local (LocMemCache) una escritura
+solo invalida el proceso que la atendió, así que el cache de respuestas se apaga
+salvo RESPONSE_CACHE_SINGLE_PROCESS.
+"""
+import hashlib
+import json
+import time
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import connection, transaction
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+_BACKENDS_LOCALES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def cache_compartido() -> bool:
+    """True si el cache de Django lo ven todos los procesos (no es LocMemCache)."""
+    return settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND'] not in _BACKENDS_LOCALES
+
+
+def cache_respuestas_habilitado() -> bool:
+    """RESPONSE_CACHE_ENABLED, y con cache local solo si hay un único proceso."""
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+        return False
+    return cache_compartido() or getattr(settings, 'RESPONSE_CACHE_SINGLE_PROCESS', False)
+
+
+RESPONSE_CACHE_ENABLED = cache_respuestas_habilitado()
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+# Versión compartida por todos los tenants: modelos globales (TipoTrabajo, Usuario)
+GLOBAL_TENANT = '*'
+
+
+def _version_key(usuario_id, label: str) -> str:
+    return f'resp_cache_ver:{usuario_id}:{label}'
+
+
+_ultima_version = 0
+
+
+def _new_version() -> int:
+    # Marca de tiempo: no colisiona con versiones anteriores aunque la clave se
+    # pierda (eviction) y sirve de Last-Modified. Estrictamente creciente en el
+    # proceso aunque el reloj tenga poca resolución
+    global _ultima_version
+    _ultima_version = max(time.time_ns(), _ultima_version + 1)
+    return _ultima_version
+
+
+def get_versions(usuario_id, labels) -> list:
+    """Versiones actuales de los modelos `labels` para el tenant (más la global)."""
+    keys = [_version_key(usuario_id, label) for label in labels]
+    keys.append(_version_key(GLOBAL_TENANT, GLOBAL_TENANT))
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions.append(version)
+    return versions
+
+
+def _bump(usuario_id, label: str) -> None:
+    cache.set(_version_key(usuario_id, label), _new_version(), timeout=None)
+
+
+def bump_tenant_version(usuario_id, *models) -> None:
+    """
+    Invalida las respuestas cacheadas del tenant que dependen de `models`.
+    Las señales lo llaman solas; usarlo tras queryset.update()/bulk_create().
+    Con usuario_id=None se invalida la versión global (todos los tenants).
+    """
+    if usuario_id is None:
+        labels = [(GLOBAL_TENANT, GLOBAL_TENANT)]
+    else:
+        labels = [(usuario_id, model._meta.label_lower) for model in models]
+    for tenant, label in labels:
+        _bump(tenant, label)
+    if connection.in_atomic_block:
+        # Segundo bump al confirmar: descarta lo cacheado por lectores
+        # concurrentes que vieron el estado previo al commit
+        transaction.on_commit(lambda: [_bump(tenant, label) for tenant, label in labels])
+
+
+def _no_modificado(request, etag: str, modificado: int) -> bool:
+    """
+    If-None-Match manda (comparación débil); If-Modified-Since solo se mira si no
+    vino ETag, porque tiene resolución de segundos.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in etags or etag.removeprefix('W/') in etags
+    desde = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    return desde is not None and modificado <= desde
+
+
+def _con_validadores(response, etag: str, modificado: int):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modificado)
+    # El cliente guarda la respuesta pero revalida siempre (es por tenant)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cache_response(*models, timeout=None, per_day=False):
+    """
+    Decorador para GETs de lectura (funciones @api_view o métodos get de APIView).
+
+    - `models`: modelos de los que depende la respuesta. En vistas de clase puede
+      omitirse y se usa `view.cache_models` o `(view.model,)`.
+    - `per_day`: agrega la fecha a la clave (respuestas que dependen de "hoy").
+    Solo se cachean respuestas 200 de requests autenticados. Esas respuestas llevan
+    ETag/Last-Modified y los GET condicionales que coinciden reciben 304.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            request = args[0] if hasattr(args[0], 'query_params') else args[1]
+            usuario_id = getattr(request.user, 'usuario_id', None)
+            if not RESPONSE_CACHE_ENABLED or request.method != 'GET' or not usuario_id:
+                return view_func(*args, **kwargs)
+
+            deps = models
+            if not deps and request is not args[0]:
+                view = args[0]
+                deps = getattr(view, 'cache_models', None) or (view.model,)
+            labels = sorted(model._meta.label_lower for model in deps)
+
+            params = sorted((k, sorted(v)) for k, v in request.query_params.lists())
+            versions = get_versions(usuario_id, labels)
+            raw = json.dumps([
+                request.path, params, labels, versions,
+                date.today().isoformat() if per_day else None
+            ])
+            digest = hashlib.sha1(raw.encode()).hexdigest()
+            key = f'resp_cache:{usuario_id}:{digest}'
+            # Débil: el mismo dato puede salir con otro renderer (JSON / browsable)
+            etag = f'W/"{digest}"'
+            modificado = max(versions) // 1_000_000_000
+
+            if _no_modificado(request, etag, modificado):
+                return _con_validadores(Response(status=status.HTTP_304_NOT_MODIFIED), etag, modificado)
+
+            data = cache.get(key)
+            if data is not None:
+                return _con_validadores(Response(data), etag, modificado)
+
+            response = view_func(*args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout or RESPONSE_CACHE_TIMEOUT)
+                _con_validadores(response, etag, modificado)
+            return response
+        return wrapper
+    return decorator
@@ -1,3 +1,7 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
 from rest_framework import serializers
 from .models import (
     Usuario, Personal, Campo, Cliente, Maquina, CampoCliente, 
@@ -5,6 +9,22 @@ from .models import (
     Movimiento, Mantenimiento, Insumo, TipoTrabajo, Trabajo, 
     TrabajoPersonal, AuthToken
 )
+from .response_cache import bump_tenant_version
+from .sparse_fields import SparseFieldsMixin
+from .services.trabajo_service import aplicar_delta_trabajo, totales_en_bloque
+from .services.estadisticas_service import refrescar_por_trabajo
+
+
+def get_roles_por_nombre(nombres) -> dict:
+    """
+    Mapa nombre -> rol de los usuarios con esos nombres, en una query.
+    `nombres` puede ser una lista o un queryset de values('nombre').
+    Los nombres que corresponden a más de un usuario quedan en None (ambiguos).
+    """
+    roles = {}
+    for nombre, rol in Usuario.objects.filter(nombre__in=nombres).values_list('nombre', 'rol'):
+        roles[nombre] = None if nombre in roles else rol
+    return roles
 
 # --- Auth Serializers ---
 
@@ -71,17 +91,17 @@ class AuthTokenSerializer(serializers.ModelSerializer):
 
 # --- Entidades Serializers ---
 
-class CampoSerializer(serializers.ModelSerializer):
+class CampoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Campo
         fields = '__all__'
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Cliente
         fields = '__all__'
 
-class MaquinaSerializer(serializers.ModelSerializer):
+class MaquinaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     superficie_total_ha = serializers.FloatField(default=0.0, read_only=True)
     horas_trabajadas = serializers.FloatField(default=0.0, read_only=True)
     ultimo_trabajo = serializers.CharField(default='', read_only=True)
@@ -90,7 +110,7 @@ class MaquinaSerializer(serializers.ModelSerializer):
         model = Maquina
         fields = '__all__'
 
-class PersonalSerializer(serializers.ModelSerializer):
+class PersonalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     superficie_total_ha = serializers.FloatField(default=0.0, read_only=True)
     horas_trabajadas = serializers.FloatField(default=0.0, read_only=True)
     trabajos_completados = serializers.IntegerField(default=0, read_only=True)
@@ -122,21 +142,39 @@ class TrabajoPersonalSerializer(serializers.ModelSerializer):
     id_trabajo_personal = serializers.ReadOnlyField(source='id')
 
     def get_rol(self, obj):
-        # Intentar obtener el rol buscando el usuario por nombre
-        try:
-            usuario = Usuario.objects.get(nombre=obj.personal.nombre)
-            return usuario.rol
-        except Usuario.DoesNotExist:
+        # El rol se obtiene buscando el usuario por nombre. El mapa nombre -> rol se
+        # arma una sola vez por pasada de serialización (el context es compartido
+        # por todos los serializers anidados) con los nombres del personal del tenant.
+        if obj.personal is None:
             return None
+        roles = self.context.setdefault('_roles_por_nombre', {})
+        tenant = obj.personal.usuario_id
+        if tenant not in roles:
+            roles[tenant] = get_roles_por_nombre(
+                Personal.objects.filter(usuario_id=tenant).values('nombre')
+            )
+        return roles[tenant].get(obj.personal.nombre)
 
     class Meta:
         model = TrabajoPersonal
         fields = ('id', 'id_trabajo_personal', 'id_personal', 'nombre', 'dni', 'rol', 'hectareas', 'horas_trabajadas', 'fecha', 'hora_inicio', 'hora_fin')
 
+def calcular_horas(hora_inicio, hora_fin) -> float:
+    """Horas entre inicio y fin (redondeadas a 2 decimales); si fin < inicio cruzó la medianoche."""
+    from datetime import datetime, timedelta
+    # Crear datetimes arbitrarios para restar
+    dummy_date = datetime(2000, 1, 1)
+    dt_inicio = datetime.combine(dummy_date, hora_inicio)
+    dt_fin = datetime.combine(dummy_date, hora_fin)
+    if dt_fin < dt_inicio:
+        dt_fin += timedelta(days=1)
+    return round((dt_fin - dt_inicio).total_seconds() / 3600, 2)
+
+
 class RegistrarHorasSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrabajoPersonal
-        fields = ('trabajo', 'personal', 'hectareas', 'horas_trabajadas', 'fecha', 'hora_inicio', 'hora_fin')
+        fields = ('id', 'trabajo', 'personal', 'hectareas', 'horas_trabajadas', 'fecha', 'hora_inicio', 'hora_fin')
 
     def validate(self, data):
         hora_inicio = data.get('hora_inicio')
@@ -144,20 +182,7 @@ class RegistrarHorasSerializer(serializers.ModelSerializer):
         
         # Calcular horas automáticamente si se pasan inicio y fin
         if hora_inicio and hora_fin:
-            from datetime import datetime
-            # Crear datetimes arbitrarios para restar
-            dummy_date = datetime(2000, 1, 1)
-            dt_inicio = datetime.combine(dummy_date, hora_inicio)
-            dt_fin = datetime.combine(dummy_date, hora_fin)
-            
-            # Si el fin es menor que el inicio, asumimos que cruzó la medianoche
-            if dt_fin < dt_inicio:
-                from datetime import timedelta
-                dt_fin += timedelta(days=1)
-                
-            diff = dt_fin - dt_inicio
-            horas = diff.total_seconds() / 3600
-            data['horas_trabajadas'] = round(horas, 2)
+            data['horas_trabajadas'] = calcular_horas(hora_inicio, hora_fin)
         elif 'horas_trabajadas' not in data:
             # Si no se calculan y no se pasan, default a 0
             data['horas_trabajadas'] = 0
@@ -165,7 +190,16 @@ class RegistrarHorasSerializer(serializers.ModelSerializer):
         return data
 
 
-class TrabajoSerializer(serializers.ModelSerializer):
+class RegistroHorasBulkSerializer(RegistrarHorasSerializer):
+    """
+    Fila de trabajos/registrar-horas/bulk/. trabajo y personal llegan como ids y
+    se resuelven en lote en registro_horas_service (sin una query por fila).
+    """
+    trabajo = serializers.IntegerField()
+    personal = serializers.IntegerField()
+
+
+class TrabajoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tipo = serializers.ReadOnlyField(source='id_tipo_trabajo.trabajo')
     campo_nombre = serializers.ReadOnlyField(source='campo.nombre')
     campo_ha = serializers.ReadOnlyField(source='campo.hectareas')
@@ -200,31 +234,103 @@ class TrabajoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trabajo
         fields = '__all__'
+        # Fuera de ?fields= salvo ?expand=personal_detail (ver sparse_fields)
+        expandable_fields = ('personal_detail',)
         extra_kwargs = {
             'personal': {'read_only': True},
             'maquinas': {'read_only': True},
+            'ha_realizadas': {'read_only': True},
+            'horas_registradas': {'read_only': True},
         }
 
+    @staticmethod
+    def _crew_from_payload(id_personal, personal_hectareas):
+        """
+        personal_id -> hectáreas (None si no se informan), o None si no vino crew.
+        personal_hectareas tiene prioridad sobre id_personal: una lista vacía deja el
+        trabajo sin personal.
+        """
+        if personal_hectareas is not None:
+            return {int(item['id']): item.get('ha', 0) for item in personal_hectareas}
+        if id_personal is not None:
+            return {p_id: None for p_id in id_personal}
+        return None
+
+    def _sync_personal(self, trabajo, crew, created=False):
+        """
+        Reconciliar el personal del trabajo con `crew` aplicando solo las diferencias:
+        un delete filtrado para los que salen, un bulk_create para los nuevos y un
+        bulk_update de hectáreas de la fila de asignación (la primera) de los que quedan.
+        Los registros de horas del personal que sigue asignado se conservan. Los
+        totales y las estadísticas se ajustan una vez con el delta agregado.
+        """
+        existentes = {}
+        if not created:
+            for row in TrabajoPersonal.objects.filter(trabajo=trabajo).order_by('id'):
+                existentes.setdefault(row.personal_id, row)
+
+        salen = [p_id for p_id in existentes if p_id not in crew]
+        delta_ha = delta_horas = Decimal('0')
+        if salen:
+            filas_salen = TrabajoPersonal.objects.filter(trabajo=trabajo, personal_id__in=salen)
+            removidas = filas_salen.aggregate(ha=Sum('hectareas'), horas=Sum('horas_trabajadas'))
+            delta_ha -= removidas['ha'] or 0
+            delta_horas -= removidas['horas'] or 0
+            # Sin los receivers por fila (un delta y un recálculo por registro borrado)
+            with totales_en_bloque():
+                filas_salen.delete()
+
+        nuevos = [
+            TrabajoPersonal(
+                trabajo=trabajo,
+                personal_id=p_id,
+                hectareas=ha if ha is not None else 0,
+                usuario_id=trabajo.usuario_id
+            )
+            for p_id, ha in crew.items() if p_id not in existentes
+        ]
+        if nuevos:
+            TrabajoPersonal.objects.bulk_create(nuevos)
+
+        modificados = []
+        hectareas_previas = {}
+        ahora = timezone.now()
+        for p_id, ha in crew.items():
+            row = existentes.get(p_id)
+            if row is not None and ha is not None and row.hectareas != Decimal(str(ha)):
+                hectareas_previas[row.pk] = row.hectareas or Decimal('0')
+                row.hectareas = ha
+                # bulk_update no aplica auto_now: updated_at lo lee el sync incremental
+                row.updated_at = ahora
+                modificados.append(row)
+        if modificados:
+            TrabajoPersonal.objects.bulk_update(modificados, ['hectareas', 'updated_at'])
+
+        if salen or nuevos or modificados:
+            # bulk_create/bulk_update no disparan post_save
+            delta_ha += sum(Decimal(str(row.hectareas or 0)) for row in nuevos)
+            delta_ha += sum(Decimal(str(row.hectareas or 0)) - hectareas_previas[row.pk] for row in modificados)
+            aplicar_delta_trabajo(trabajo.pk, delta_ha, delta_horas)
+            refrescar_por_trabajo(trabajo.pk, personal_ids=salen)
+            bump_tenant_version(trabajo.usuario_id, TrabajoPersonal, Personal, Maquina)
+
     def create(self, validated_data):
         id_personal = validated_data.pop('id_personal', None) or []
         id_maquinas = validated_data.pop('id_maquinas', None) or []
-        personal_hectareas = validated_data.pop('personal_hectareas', None) or []
-        
-        trabajo = Trabajo.objects.create(**validated_data)
+        # En el alta una lista vacía de personal_hectareas no pisa id_personal
+        personal_hectareas = validated_data.pop('personal_hectareas', None) or None
         
-        if id_maquinas:
-            trabajo.maquinas.set(id_maquinas)
+        with transaction.atomic():
+            trabajo = Trabajo.objects.create(**validated_data)
+            
+            if id_maquinas:
+                trabajo.maquinas.set(id_maquinas)
             
-        if personal_hectareas:
-            for item in personal_hectareas:
-                TrabajoPersonal.objects.create(
-                    trabajo=trabajo,
-                    personal_id=item['id'],
-                    hectareas=item.get('ha', 0)
-                )
-        elif id_personal:
-            for p_id in id_personal:
-                TrabajoPersonal.objects.create(trabajo=trabajo, personal_id=p_id)
+            crew = self._crew_from_payload(id_personal, personal_hectareas)
+            if crew:
+                self._sync_personal(trabajo, crew, created=True)
+                # Totales actualizados con F(): releer los valores persistidos
+                trabajo.refresh_from_db(fields=Trabajo.TOTALES_MANTENIDOS)
                 
         return trabajo
 
@@ -233,29 +339,23 @@ class TrabajoSerializer(serializers.ModelSerializer):
         id_maquinas = validated_data.pop('id_maquinas', None)
         personal_hectareas = validated_data.pop('personal_hectareas', None)
         
-        instance = super().update(instance, validated_data)
-        
-        if id_maquinas is not None:
-            instance.maquinas.set(id_maquinas)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
             
-        if personal_hectareas is not None:
-            TrabajoPersonal.objects.filter(trabajo=instance).delete()
-            for item in personal_hectareas:
-                TrabajoPersonal.objects.create(
-                    trabajo=instance,
-                    personal_id=item['id'],
-                    hectareas=item.get('ha', 0)
-                )
-        elif id_personal is not None:
-            TrabajoPersonal.objects.filter(trabajo=instance).delete()
-            for p_id in id_personal:
-                TrabajoPersonal.objects.create(trabajo=instance, personal_id=p_id)
+            if id_maquinas is not None:
+                # set() ya aplica solo las diferencias (un delete y un bulk insert)
+                instance.maquinas.set(id_maquinas)
+            
+            crew = self._crew_from_payload(id_personal, personal_hectareas)
+            if crew is not None:
+                self._sync_personal(instance, crew)
+                instance.refresh_from_db(fields=Trabajo.TOTALES_MANTENIDOS)
                 
         return instance
 
 # --- Finanzas Serializers ---
 
-class CostoSerializer(serializers.ModelSerializer):
+class CostoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Costo
         fields = '__all__'
@@ -266,12 +366,13 @@ class FacturaItemSerializer(serializers.ModelSerializer):
         fields = '__all__'
         extra_kwargs = {'factura': {'required': False}}
 
-class FacturaSerializer(serializers.ModelSerializer):
+class FacturaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = FacturaItemSerializer(many=True, required=False)
 
     class Meta:
         model = Factura
         fields = '__all__'
+        expandable_fields = ('items',)
 
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
@@ -1,11 +1,271 @@
 """
 Servicio de autenticación con tokens personalizados.
 Maneja la generación, validación e invalidación de tokens de acceso.
+
+La resolución token -> usuario_id pasa por un cache de dos niveles:
+un LRU en memoria del proceso con TTL corto y, detrás, el cache de Django.
+El segundo nivel solo se usa si ese cache es compartido (Redis): con LocMemCache
+un logout o una baja solo lo limpiarían en el proceso que los atendió.
+Las claves son el hash SHA-256 del token, nunca el token en claro.
+Junto al usuario_id se cachean el rol y el flag activo del usuario, de modo que
+un cambio de rol o una baja se reflejan como mucho tras AUTH_TOKEN_SHARED_CACHE_TTL.
+
+Tokens firmados (AUTH_TOKEN_FORMAT='signed'): el token lleva usuario_id,
+expiración, fecha de emisión y la generación de la fila en auth_tokens, firmado
+con HMAC (django.core.signing) usando AUTH_TOKEN_SIGNING_KEY, nunca SECRET_KEY.
+Sin una clave propia y segura el formato firmado se rechaza. Se validan contra una
+lista en memoria que se sincroniza con auth_tokens cada AUTH_TOKEN_REVOCATION_REFRESH
+segundos: solo vale la generación activa, y el rol y el estado del usuario salen de
+esa lista (nunca del payload). Una generación que todavía no se vio se busca en la base.
+Los tokens opacos (formato por defecto) siguen aceptándose.
 """
+import hashlib
 import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
 from django.utils import timezone
 from ..models import AuthToken, Usuario
+from ..response_cache import cache_compartido
+
+
+# TTL del LRU local: acota cuánto puede tardar otro proceso en enterarse de un logout
+LOCAL_CACHE_TTL = getattr(settings, 'AUTH_TOKEN_LOCAL_CACHE_TTL', 10)
+LOCAL_CACHE_MAX_SIZE = getattr(settings, 'AUTH_TOKEN_LOCAL_CACHE_MAX_SIZE', 2048)
+SHARED_CACHE_TTL = getattr(settings, 'AUTH_TOKEN_SHARED_CACHE_TTL', 300)
+
+TOKEN_FORMAT = getattr(settings, 'AUTH_TOKEN_FORMAT', 'opaque')
+SIGNING_SALT = 'api.auth_token'
+REVOCATION_REFRESH = getattr(settings, 'AUTH_TOKEN_REVOCATION_REFRESH', 5)
+REVOCATION_FULL_RELOAD = getattr(settings, 'AUTH_TOKEN_REVOCATION_FULL_RELOAD', 300)
+# Margen para filas que aún no eran visibles (commit en curso) al sincronizar
+REVOCATION_SKEW = 5
+
+PURGE_INTERVAL = getattr(settings, 'AUTH_TOKEN_PURGE_INTERVAL', 3600)
+PURGE_BATCH_SIZE = getattr(settings, 'AUTH_TOKEN_PURGE_BATCH_SIZE', 1000)
+# Las filas inactivas se conservan un rato para que todos los procesos vean la revocación
+INACTIVE_TOKEN_RETENTION = timedelta(hours=1)
+
+
+class _TokenLRUCache:
+    """LRU thread-safe con TTL: token_hash -> (entrada, cached_until)."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            entry, cached_until = item
+            if cached_until < now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: tuple):
+        with self._lock:
+            self._data[key] = (entry, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _RevocationList:
+    """
+    Estado de auth_tokens necesario para validar tokens firmados sin ir a la base.
+
+    - active: usuario_id -> (generación, rol, activo) de su fila activa y vigente.
+    - revoked: pares (usuario_id, generación) de filas inactivas aún no expiradas.
+
+    Un token firmado (u, g) es válido solo si g es la generación activa del usuario.
+    Si no hay datos del usuario (fila creada después del último sync) la decisión
+    queda para una consulta a la base.
+    La sincronización es incremental por updated_at, con recarga completa periódica;
+    un cambio de rol o una baja revoca los tokens y por lo tanto toca updated_at.
+    """
+
+    def __init__(self, refresh_interval: float, full_reload_interval: float):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._active = {}
+        self._revoked = set()
+        self._synced_at = None  # datetime (reloj de la base) del último sync
+        self._checked_at = float('-inf')
+        self._full_loaded_at = float('-inf')
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.refresh_interval:
+                return
+            started_at = timezone.now()
+            full = self._synced_at is None or now - self._full_loaded_at >= self.full_reload_interval
+            rows = AuthToken.objects.all()
+            if full:
+                rows = rows.filter(Q(expires_at__gt=started_at) | Q(expires_at__isnull=True))
+            else:
+                rows = rows.filter(updated_at__gte=self._synced_at - timedelta(seconds=REVOCATION_SKEW))
+            usuario = Usuario.objects.filter(pk=OuterRef('usuario_id'))
+            rows = rows.annotate(
+                usuario_rol=Subquery(usuario.values('rol')[:1]),
+                usuario_activo=Subquery(usuario.values('is_active')[:1]),
+            ).values_list('usuario_id', 'generation', 'is_active', 'usuario_rol', 'usuario_activo')
+
+            active = {} if full else self._active
+            revoked = set() if full else self._revoked
+            for usuario_id, generation, is_active, rol, activo in rows:
+                if is_active:
+                    active[usuario_id] = (generation, rol, activo)
+                    revoked.discard((usuario_id, generation))
+                else:
+                    revoked.add((usuario_id, generation))
+                    if active.get(usuario_id, (None,))[0] == generation:
+                        del active[usuario_id]
+
+            self._active = active
+            self._revoked = revoked
+            self._synced_at = started_at
+            self._checked_at = now
+            if full:
+                self._full_loaded_at = now
+
+    def lookup(self, usuario_id: int, generation: int) -> tuple | bool | None:
+        """
+        (rol, activo) si g es la generación activa del usuario; False si está
+        revocada o no es la activa; None si no hay datos del usuario.
+        """
+        self._sync()
+        if (usuario_id, generation) in self._revoked:
+            return False
+        current = self._active.get(usuario_id)
+        if current is None:
+            return None
+        if current[0] != generation:
+            return False
+        return current[1], current[2]
+
+    def activate(self, usuario_id: int, generation: int, rol: str | None, activo: bool | None):
+        with self._lock:
+            self._active[usuario_id] = (generation, rol, activo)
+
+    def revoke(self, usuario_id: int, generation: int):
+        with self._lock:
+            self._revoked.add((usuario_id, generation))
+            if self._active.get(usuario_id, (None,))[0] == generation:
+                del self._active[usuario_id]
+
+
+_local_cache = _TokenLRUCache(LOCAL_CACHE_MAX_SIZE, LOCAL_CACHE_TTL)
+_revocations = _RevocationList(REVOCATION_REFRESH, REVOCATION_FULL_RELOAD)
+_last_purge_at = time.monotonic()
+_purge_lock = threading.Lock()
+
+
+def _hash_token(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode('utf-8')).hexdigest()
+
+
+def _shared_cache_key(token_hash: str) -> str:
+    return f'auth_token_{token_hash}'
+
+
+def _is_expired(expires_at_ts: float | None) -> bool:
+    return expires_at_ts is not None and expires_at_ts < time.time()
+
+
+def evict_token(access_token: str) -> None:
+    """Elimina un token de ambos niveles de cache."""
+    if not access_token:
+        return
+    token_hash = _hash_token(access_token)
+    _local_cache.delete(token_hash)
+    cache.delete(_shared_cache_key(token_hash))
+
+
+def _evict_token_on_commit(access_token: str) -> None:
+    """
+    Saca el token del cache ahora y otra vez al confirmar la transacción: un
+    request concurrente que lo resolvió antes del commit (fila todavía activa)
+    pudo volver a cachearlo por hasta AUTH_TOKEN_SHARED_CACHE_TTL.
+    """
+    evict_token(access_token)
+    transaction.on_commit(lambda: evict_token(access_token))
+
+
+def clear_token_cache() -> None:
+    """Vacía el LRU local y la lista de revocación del proceso (útil en tests)."""
+    _local_cache.clear()
+    _revocations.reset()
+
+
+def is_signed_token(access_token: str) -> bool:
+    """Los tokens opacos son urlsafe (sin ':'); los firmados tienen la forma payload:firma."""
+    return ':' in access_token
+
+
+def _signing_key() -> str | None:
+    """
+    Clave de AUTH_TOKEN_SIGNING_KEY, o None si no sirve para firmar: vacía,
+    generada por startproject ('django-insecure-...') o igual a SECRET_KEY.
+    """
+    key = getattr(settings, 'AUTH_TOKEN_SIGNING_KEY', '')
+    if not key or key.startswith('django-insecure') or key == settings.SECRET_KEY:
+        return None
+    return key
+
+
+def _sign_token(usuario_id: int, generation: int, expires_at) -> str:
+    key = _signing_key()
+    if key is None:
+        raise ImproperlyConfigured(
+            'Los tokens firmados requieren AUTH_TOKEN_SIGNING_KEY propia y segura '
+            '(distinta de SECRET_KEY).'
+        )
+    payload = {
+        'u': usuario_id,
+        'g': generation,
+        'e': int(expires_at.timestamp()),
+        'i': int(time.time()),
+    }
+    return signing.dumps(payload, key=key, salt=SIGNING_SALT)
+
+
+def _load_signed_token(access_token: str) -> dict | None:
+    key = _signing_key()
+    if key is None:
+        return None
+    try:
+        return signing.loads(access_token, key=key, salt=SIGNING_SALT)
+    except signing.BadSignature:
+        return None
 
 
 def generate_access_token() -> str:
@@ -13,43 +273,160 @@ def generate_access_token() -> str:
     return secrets.token_urlsafe(32)
 
 
-def create_auth_token(usuario_id: int, expires_in_days: int = 30) -> AuthToken:
+def create_auth_token(usuario_id: int, expires_in_days: int = 30, rol: str | None = None,
+                      signed: bool | None = None) -> AuthToken:
     """
     Crea o actualiza un token de acceso para un usuario.
     Si ya existe un token para el usuario, lo actualiza con un nuevo token.
+    El formato (firmado u opaco) lo decide AUTH_TOKEN_FORMAT salvo que se indique `signed`.
     """
-    token = generate_access_token()
+    if signed is None:
+        signed = TOKEN_FORMAT == 'signed'
     expires_at = timezone.now() + timedelta(days=expires_in_days)
-    
+
+    # El token anterior deja de existir al sobrescribirse la fila: sacarlo del cache
+    generation = 0
+    existing_ids = []
+    for token_id, old_token, old_generation in AuthToken.objects.filter(usuario_id=usuario_id).values_list('id', 'access_token', 'generation'):
+        _evict_token_on_commit(old_token)
+        _revocations.revoke(usuario_id, old_generation)
+        generation = max(generation, old_generation)
+        existing_ids.append(token_id)
+    generation += 1
+
+    # Una fila por usuario: las duplicadas (datos viejos) harían fallar update_or_create
+    if len(existing_ids) > 1:
+        AuthToken.objects.filter(pk__in=sorted(existing_ids)[:-1]).delete()
+
+    if signed:
+        token = _sign_token(usuario_id, generation, expires_at)
+    else:
+        token = generate_access_token()
+
     # Usar update_or_create para actualizar si existe o crear si no existe
     auth_token, created = AuthToken.objects.update_or_create(
         usuario_id=usuario_id,
         defaults={
             'access_token': token,
             'expires_at': expires_at,
-            'is_active': True
+            'is_active': True,
+            'generation': generation,
         }
     )
+    if signed:
+        # El rol y el estado se leen de la base: el parámetro `rol` es del llamador
+        usuario = Usuario.objects.filter(pk=usuario_id).values_list('rol', 'is_active').first()
+        if usuario is not None:
+            _revocations.activate(usuario_id, generation, *usuario)
+    maybe_purge_expired_tokens()
     return auth_token
 
 
-def get_usuario_id_from_token(access_token: str) -> int | None:
-    """Obtiene el usuario_id desde un access_token"""
-    try:
-        auth_token = AuthToken.objects.get(
-            access_token=access_token,
-            is_active=True
-        )
-        # Verificar expiración
-        if auth_token.expires_at and auth_token.expires_at < timezone.now():
+def get_token_owner(access_token: str) -> tuple[int, str | None, bool | None] | None:
+    """
+    Resuelve un access_token a (usuario_id, rol, activo) del usuario dueño.
+    Consulta el LRU local, luego el cache de Django y, si no está, la base de datos
+    con una única query (los datos del usuario se traen con subconsultas).
+    """
+    if not access_token:
+        return None
+
+    if is_signed_token(access_token):
+        return _get_signed_token_owner(access_token)
+
+    token_hash = _hash_token(access_token)
+
+    # 1. LRU del proceso
+    entry = _local_cache.get(token_hash)
+    compartido = cache_compartido()
+    if entry is None and compartido:
+        # 2. Cache de Django
+        entry = cache.get(_shared_cache_key(token_hash))
+        if entry is not None:
+            _local_cache.set(token_hash, entry)
+
+    if entry is not None:
+        usuario_id, rol, activo, expires_at_ts = entry
+        if _is_expired(expires_at_ts):
+            evict_token(access_token)
             return None
-        return auth_token.usuario_id
-    except AuthToken.DoesNotExist:
+        return usuario_id, rol, activo
+
+    # 3. Base de datos
+    usuario = Usuario.objects.filter(pk=OuterRef('usuario_id'))
+    rows = list(
+        AuthToken.objects.filter(access_token=access_token, is_active=True)
+        .annotate(
+            usuario_rol=Subquery(usuario.values('rol')[:1]),
+            usuario_activo=Subquery(usuario.values('is_active')[:1]),
+        )
+        .values_list('usuario_id', 'usuario_rol', 'usuario_activo', 'expires_at')[:1]
+    )
+    if not rows:
+        return None
+
+    usuario_id, rol, activo, expires_at = rows[0]
+    expires_at_ts = expires_at.timestamp() if expires_at else None
+    # Verificar expiración
+    if _is_expired(expires_at_ts):
+        return None
+
+    entry = (usuario_id, rol, activo, expires_at_ts)
+    if compartido:
+        timeout = SHARED_CACHE_TTL
+        if expires_at_ts is not None:
+            timeout = max(1, min(timeout, int(expires_at_ts - time.time())))
+        cache.set(_shared_cache_key(token_hash), entry, timeout=timeout)
+    _local_cache.set(token_hash, entry)
+    return usuario_id, rol, activo
+
+
+def _get_signed_token_owner(access_token: str) -> tuple[int, str | None, bool] | None:
+    """
+    Valida firma, expiración y generación de un token firmado. Sin queries salvo el
+    sync periódico, o una lectura de auth_tokens si el usuario todavía no se vio.
+    """
+    payload = _load_signed_token(access_token)
+    if payload is None:
+        return None
+    if payload['e'] < time.time():
+        return None
+    usuario_id, generation = payload['u'], payload['g']
+    estado = _revocations.lookup(usuario_id, generation)
+    if estado is False:
         return None
+    if estado is None:
+        usuario = Usuario.objects.filter(pk=OuterRef('usuario_id'))
+        rows = list(
+            AuthToken.objects.filter(usuario_id=usuario_id, generation=generation,
+                                     access_token=access_token, is_active=True)
+            .annotate(
+                usuario_rol=Subquery(usuario.values('rol')[:1]),
+                usuario_activo=Subquery(usuario.values('is_active')[:1]),
+            )
+            .values_list('usuario_rol', 'usuario_activo')[:1]
+        )
+        if not rows:
+            return None
+        estado = rows[0]
+        _revocations.activate(usuario_id, generation, *estado)
+    rol, activo = estado
+    return usuario_id, rol, activo
+
+
+def get_usuario_id_from_token(access_token: str) -> int | None:
+    """Obtiene el usuario_id desde un access_token"""
+    owner = get_token_owner(access_token)
+    return owner[0] if owner else None
 
 
 def invalidate_token(access_token: str) -> bool:
     """Invalida un token (logout)"""
+    _evict_token_on_commit(access_token)
+    if access_token and is_signed_token(access_token):
+        payload = _load_signed_token(access_token)
+        if payload is not None:
+            _revocations.revoke(payload['u'], payload['g'])
     try:
         auth_token = AuthToken.objects.get(access_token=access_token)
         auth_token.is_active = False
@@ -57,3 +434,56 @@ def invalidate_token(access_token: str) -> bool:
         return True
     except AuthToken.DoesNotExist:
         return False
+
+
+def revoke_user_tokens(usuario_id: int) -> int:
+    """
+    Revoca los tokens vigentes de un usuario (baja o cambio de rol): los firmados
+    se validan con el rol cacheado en la lista de revocación. Las filas quedan
+    inactivas y los demás procesos las levantan en el próximo sync de revocaciones.
+    """
+    activos = AuthToken.objects.filter(usuario_id=usuario_id, is_active=True)
+    for access_token, generation in activos.values_list('access_token', 'generation'):
+        _evict_token_on_commit(access_token)
+        _revocations.revoke(usuario_id, generation)
+    # update() no toca auto_now: updated_at es lo que lee el sync incremental
+    return activos.update(is_active=False, updated_at=timezone.now())
+
+
+def purge_expired_tokens(batch_size: int = PURGE_BATCH_SIZE, max_batches: int | None = None) -> int:
+    """
+    Borra tokens expirados y tokens inactivos (pasada la retención) en lotes
+    acotados, para no bloquear la tabla. Devuelve la cantidad de filas borradas.
+    """
+    now = timezone.now()
+    stale = (
+        Q(expires_at__lt=now)
+        | Q(is_active=False, updated_at__lt=now - INACTIVE_TOKEN_RETENTION)
+    )
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(AuthToken.objects.filter(stale).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += AuthToken.objects.filter(pk__in=ids).delete()[0]
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def maybe_purge_expired_tokens() -> int:
+    """
+    Job periódico en proceso: como mucho una vez cada AUTH_TOKEN_PURGE_INTERVAL
+    segundos corre un único lote del barrido. Se invoca al emitir tokens (login).
+    """
+    global _last_purge_at
+    now = time.monotonic()
+    if now - _last_purge_at < PURGE_INTERVAL or not _purge_lock.acquire(blocking=False):
+        return 0
+    try:
+        _last_purge_at = now
+        return purge_expired_tokens(max_batches=1)
+    finally:
+        _purge_lock.release()
@@ -0,0 +1,110 @@
+"""
+Servicio de agregación para el dashboard.
+Calcula las métricas de cada tabla con una única query de agregación
+condicional (Count/Sum con filter=), en lugar de un count()/aggregate() por métrica.
+"""
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ..models import (
+    Trabajo, Factura, Mantenimiento, Insumo,
+    Campo, Maquina, Personal, Cliente, ResumenFinancieroMensual
+)
+
+
+def _sum(field: str, filter: Q | None = None):
+    """Sum que devuelve 0 en lugar de None cuando no hay filas."""
+    return Coalesce(
+        Sum(field, filter=filter),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+
+
+def get_trabajos_metrics(usuario_id: int) -> dict:
+    return Trabajo.objects.filter(usuario_id=usuario_id).aggregate(
+        total=Count('id'),
+        pendientes=Count('id', filter=Q(estado='Pendiente')),
+        en_curso=Count('id', filter=Q(estado='En curso')),
+        completados=Count('id', filter=Q(estado='Completado')),
+    )
+
+
+def get_movimientos_metrics(usuario_id: int, desde=None) -> dict:
+    """
+    Ingresos/gastos totales y, si se indica `desde` (primer día de un mes), los
+    acumulados desde ese mes. Lee el rollup mensual, no la tabla de movimientos.
+    """
+    metrics = {
+        'ingresos_totales': _sum('total', Q(es_cobro=True)),
+        'gastos_totales': _sum('total', Q(es_cobro=False)),
+    }
+    if desde is not None:
+        periodo_desde = desde.strftime('%Y-%m')
+        metrics['ingresos_periodo'] = _sum('total', Q(es_cobro=True, periodo__gte=periodo_desde))
+        metrics['gastos_periodo'] = _sum('total', Q(es_cobro=False, periodo__gte=periodo_desde))
+    return ResumenFinancieroMensual.objects.filter(usuario_id=usuario_id).aggregate(**metrics)
+
+
+def get_facturas_metrics(usuario_id: int, hoy) -> dict:
+    return Factura.objects.filter(usuario_id=usuario_id).aggregate(
+        pendientes=Count('id', filter=Q(estado='Pendiente')),
+        vencidas=Count('id', filter=Q(estado='Pendiente', fecha_vencimiento__lt=hoy)),
+    )
+
+
+def get_mantenimientos_pendientes(usuario_id: int) -> int:
+    return Mantenimiento.objects.filter(usuario_id=usuario_id, estado='Pendiente').count()
+
+
+def get_insumos_bajo_stock(usuario_id: int) -> int:
+    return Insumo.objects.filter(usuario_id=usuario_id, stock_actual__lte=F('stock_minimo')).count()
+
+
+def get_campos_metrics(usuario_id: int) -> dict:
+    return Campo.objects.filter(usuario_id=usuario_id).aggregate(
+        total=Count('id'),
+        superficie_total_ha=_sum('hectareas'),
+    )
+
+
+def get_dashboard_resumen(usuario_id: int) -> dict:
+    """Resumen del dashboard: una query por tabla (5 en total)."""
+    now = timezone.now()
+    first_day_of_month = now.date().replace(day=1)
+
+    trabajos = get_trabajos_metrics(usuario_id)
+    movimientos = get_movimientos_metrics(usuario_id, desde=first_day_of_month)
+    facturas = get_facturas_metrics(usuario_id, now.date())
+
+    return {
+        "trabajos_pendientes": trabajos['pendientes'],
+        "trabajos_en_curso": trabajos['en_curso'],
+        "trabajos_completados": trabajos['completados'],
+        "ingresos_mes": movimientos['ingresos_periodo'],
+        "gastos_mes": movimientos['gastos_periodo'],
+        "balance_mes": movimientos['ingresos_periodo'] - movimientos['gastos_periodo'],
+        "facturas_pendientes": facturas['pendientes'],
+        "facturas_vencidas": facturas['vencidas'],
+        "mantenimientos_pendientes": get_mantenimientos_pendientes(usuario_id),
+        "insumos_bajo_stock": get_insumos_bajo_stock(usuario_id),
+    }
+
+
+def get_dashboard_estadisticas(usuario_id: int) -> dict:
+    """Estadísticas generales: una query por tabla (6 en total)."""
+    campos = get_campos_metrics(usuario_id)
+    movimientos = get_movimientos_metrics(usuario_id)
+
+    return {
+        "total_trabajos": get_trabajos_metrics(usuario_id)['total'],
+        "total_campos": campos['total'],
+        "total_maquinas": Maquina.objects.filter(usuario_id=usuario_id).count(),
+        "total_personal": Personal.objects.filter(usuario_id=usuario_id).count(),
+        "total_clientes": Cliente.objects.filter(usuario_id=usuario_id).count(),
+        "superficie_total_ha": campos['superficie_total_ha'],
+        "ingresos_totales": movimientos['ingresos_totales'],
+        "gastos_totales": movimientos['gastos_totales'],
+        "balance_total": movimientos['ingresos_totales'] - movimientos['gastos_totales'],
+    }
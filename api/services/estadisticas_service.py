@@ -0,0 +1,146 @@
+"""
+Estadísticas de Personal y Maquina (superficie_total_ha, horas_trabajadas,
+trabajos_completados, ultimo_trabajo) mantenidas de forma incremental.
+
+- Registros de horas editados: deltas con F() (un UPDATE).
+- Altas/bajas de personal o máquinas en un trabajo y cambios de estado del
+  trabajo: recálculo acotado a las filas afectadas con un UPDATE con subqueries.
+- recalcular_tenant: recompute masivo de un tenant (o de todos).
+
+Todos los UPDATE ponen updated_at (update() no aplica auto_now): es lo que lee la
+sincronización incremental del móvil.
+
+Máquinas: la superficie y las horas son la suma de los totales (ha_realizadas,
+horas_registradas) de los trabajos en los que participa.
+"""
+from decimal import Decimal
+from django.db.models import CharField, F, Func, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+from ..models import Personal, Maquina, Trabajo, TrabajoPersonal, TrabajoMaquina
+from .trabajo_service import reconcile_trabajo_totals
+
+ESTADO_COMPLETADO = 'Completado'
+
+
+class _SqlSum(Func):
+    function = 'SUM'
+
+
+class _SqlCountDistinct(Func):
+    function = 'COUNT'
+    template = '%(function)s(DISTINCT %(expressions)s)'
+
+
+def _etiqueta_trabajo():
+    """'Siembra - Campo Maestro': lo que se guarda en ultimo_trabajo."""
+    return Concat(
+        Coalesce('id_tipo_trabajo__trabajo', Value('Trabajo')),
+        Value(' - '),
+        Coalesce('campo__nombre', Value('Sin campo')),
+        output_field=CharField()
+    )
+
+
+def _ultimo_trabajo(trabajo_ids):
+    return Subquery(
+        Trabajo.objects
+        .filter(pk__in=trabajo_ids)
+        .order_by(F('fecha_inicio').desc(nulls_last=True), '-id')
+        .annotate(etiqueta=_etiqueta_trabajo())
+        .values('etiqueta')[:1]
+    )
+
+
+def _suma(queryset, campo):
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(t=_SqlSum(F(campo))).values('t')[:1]),
+        Value(Decimal('0'))
+    )
+
+
+def recalcular_personal(queryset) -> int:
+    """Recalcula las cuatro estadísticas de `queryset` (Personal) en un solo UPDATE."""
+    registros = TrabajoPersonal.objects.filter(personal_id=OuterRef('pk'))
+    completados = (
+        registros.filter(trabajo__estado=ESTADO_COMPLETADO)
+        .order_by()
+        .annotate(n=_SqlCountDistinct(F('trabajo_id')))
+        .values('n')[:1]
+    )
+    trabajos = TrabajoPersonal.objects.filter(personal_id=OuterRef(OuterRef('pk'))).values('trabajo_id')
+    return queryset.update(
+        superficie_total_ha=_suma(registros, 'hectareas'),
+        horas_trabajadas=_suma(registros, 'horas_trabajadas'),
+        trabajos_completados=Coalesce(Subquery(completados), Value(0)),
+        ultimo_trabajo=_ultimo_trabajo(trabajos),
+        updated_at=timezone.now(),
+    )
+
+
+def recalcular_maquinas(queryset) -> int:
+    """Recalcula las estadísticas de `queryset` (Maquina) en un solo UPDATE."""
+    trabajos_ids = TrabajoMaquina.objects.filter(maquina_id=OuterRef(OuterRef('pk'))).values('trabajo_id')
+    trabajos = Trabajo.objects.filter(pk__in=trabajos_ids)
+    return queryset.update(
+        superficie_total_ha=_suma(trabajos, 'ha_realizadas'),
+        horas_trabajadas=_suma(trabajos, 'horas_registradas'),
+        ultimo_trabajo=_ultimo_trabajo(trabajos_ids),
+        updated_at=timezone.now(),
+    )
+
+
+def aplicar_delta_registro(trabajo_id, personal_id, hectareas=0, horas=0) -> None:
+    """
+    Propaga la variación de hectáreas/horas de un registro de trabajo_personal
+    al operario y a las máquinas del trabajo, con UPDATE ... F().
+    """
+    hectareas = Decimal(str(hectareas or 0))
+    horas = Decimal(str(horas or 0))
+    if not hectareas and not horas:
+        return
+    delta = {
+        'superficie_total_ha': Coalesce(F('superficie_total_ha'), Value(Decimal('0'))) + hectareas,
+        'horas_trabajadas': Coalesce(F('horas_trabajadas'), Value(Decimal('0'))) + horas,
+        'updated_at': timezone.now(),
+    }
+    if personal_id is not None:
+        Personal.objects.filter(pk=personal_id).update(**delta)
+    if trabajo_id is not None:
+        Maquina.objects.filter(
+            pk__in=TrabajoMaquina.objects.filter(trabajo_id=trabajo_id).values('maquina_id')
+        ).update(**delta)
+
+
+def refrescar_por_trabajo(trabajo_id, personal_ids=()) -> None:
+    """
+    Recalcula personal y máquinas de un trabajo (cambio de estado, tipo, campo o
+    fecha). `personal_ids`: operarios que ya no tienen registros en el trabajo.
+    """
+    refrescar_por_trabajos([trabajo_id], personal_ids)
+
+
+def refrescar_por_trabajos(trabajo_ids, personal_ids=()) -> None:
+    """refrescar_por_trabajo para varios trabajos con un UPDATE por tabla."""
+    recalcular_personal(Personal.objects.filter(
+        Q(pk__in=TrabajoPersonal.objects.filter(trabajo_id__in=trabajo_ids).values('personal_id'))
+        | Q(pk__in=list(personal_ids))
+    ))
+    recalcular_maquinas(Maquina.objects.filter(
+        pk__in=TrabajoMaquina.objects.filter(trabajo_id__in=trabajo_ids).values('maquina_id')
+    ))
+
+
+def recalcular_tenant(usuario_id: int | None = None) -> tuple[int, int]:
+    """
+    Recompute masivo (comando recompute_estadisticas): reconcilia primero los
+    totales de los trabajos, de los que dependen las máquinas, y después recalcula
+    personal y máquinas con un UPDATE cada uno. Devuelve (personal, maquinas).
+    """
+    reconcile_trabajo_totals(usuario_id=usuario_id)
+    personal = Personal.objects.all()
+    maquinas = Maquina.objects.all()
+    if usuario_id is not None:
+        personal = personal.filter(usuario_id=usuario_id)
+        maquinas = maquinas.filter(usuario_id=usuario_id)
+    return recalcular_personal(personal), recalcular_maquinas(maquinas)
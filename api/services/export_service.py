@@ -0,0 +1,213 @@
+"""
+Exportación en streaming (CSV / XLSX) de movimientos, costos, facturas y pagos.
+Las filas se leen por lotes con values_list y se escriben a medida que llegan,
+así la memoria no depende de la cantidad de filas y el primer byte sale enseguida.
+
+El texto cargado por usuarios (descripciones, nombres, observaciones) que empieza
+como una fórmula se exporta con un apóstrofo adelante: Excel no lo evalúa.
+"""
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from ..models import Movimiento, Costo, Factura, Pago
+
+EXPORT_CHUNK_SIZE = 2000
+
+# recurso -> modelo, campo de fecha, campo usado por ?categoria= y columnas (campo, encabezado)
+EXPORTS = {
+    'movimientos': {
+        'model': Movimiento,
+        'fecha': 'fecha',
+        'categoria': 'categoria',
+        'columnas': [
+            ('id', 'ID'), ('fecha', 'Fecha'), ('categoria', 'Categoría'), ('descripcion', 'Descripción'),
+            ('monto', 'Monto'), ('es_cobro', 'Es cobro'), ('pagado', 'Pagado'), ('forma_pago', 'Forma de pago'),
+            ('metodo_pago', 'Método de pago'), ('destinatario', 'Destinatario'), ('cobrar_a', 'Cobrar a'),
+            ('fecha_pago_limite', 'Fecha límite de pago'), ('fecha_pago', 'Fecha de pago'),
+            ('id_trabajo_id', 'ID trabajo'), ('id_factura_id', 'ID factura'),
+        ],
+    },
+    'costos': {
+        'model': Costo,
+        'fecha': 'fecha',
+        'categoria': 'categoria',
+        'columnas': [
+            ('id', 'ID'), ('fecha', 'Fecha'), ('categoria', 'Categoría'), ('descripcion', 'Descripción'),
+            ('monto', 'Monto'), ('destinatario', 'Destinatario'), ('pagado', 'Pagado'),
+            ('forma_pago', 'Forma de pago'), ('fecha_pago_limite', 'Fecha límite de pago'),
+            ('es_cobro', 'Es cobro'), ('cobrar_a', 'Cobrar a'), ('id_trabajo_id', 'ID trabajo'),
+        ],
+    },
+    'facturas': {
+        'model': Factura,
+        'fecha': 'fecha_emision',
+        'categoria': 'estado',
+        'columnas': [
+            ('id', 'ID'), ('numero', 'Número'), ('cliente__nombre', 'Cliente'), ('fecha_emision', 'Fecha de emisión'),
+            ('fecha_vencimiento', 'Fecha de vencimiento'), ('monto_total', 'Monto total'),
+            ('monto_pagado', 'Monto pagado'), ('estado', 'Estado'), ('observaciones', 'Observaciones'),
+        ],
+    },
+    'pagos': {
+        'model': Pago,
+        'fecha': 'fecha',
+        'categoria': 'metodo_pago',
+        'columnas': [
+            ('id', 'ID'), ('fecha', 'Fecha'), ('monto', 'Monto'), ('metodo_pago', 'Método de pago'),
+            ('descripcion', 'Descripción'), ('id_factura__numero', 'Factura'),
+        ],
+    },
+}
+
+
+def iter_export_rows(queryset, campos, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Tuplas de `campos` (el primero debe ser 'id') por lotes de `chunk_size`,
+    paginando por id (keyset). A diferencia de iterator(), mantiene la memoria
+    acotada también en MySQL, donde mysqlclient carga el resultado completo del cursor.
+    """
+    ultimo_id = 0
+    while True:
+        lote = list(queryset.filter(id__gt=ultimo_id).order_by('id').values_list(*campos)[:chunk_size])
+        if not lote:
+            return
+        yield from lote
+        ultimo_id = lote[-1][0]
+
+
+def export_queryset(recurso: str, usuario_id: int, inicio=None, fin=None, categoria=None):
+    """Queryset del recurso filtrado por tenant, rango [inicio, fin) y categoría."""
+    config = EXPORTS[recurso]
+    queryset = config['model'].objects.filter(usuario_id=usuario_id)
+    if inicio is not None:
+        queryset = queryset.filter(**{f"{config['fecha']}__gte": inicio})
+    if fin is not None:
+        queryset = queryset.filter(**{f"{config['fecha']}__lt": fin})
+    if categoria:
+        queryset = queryset.filter(**{config['categoria']: categoria})
+    return queryset
+
+
+# Inicios con los que Excel/LibreOffice interpretan una celda como fórmula
+_INICIOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _neutralizar_formula(valor):
+    """Texto que empieza como fórmula -> con apóstrofo adelante; el resto sin cambios."""
+    if isinstance(valor, str) and valor.startswith(_INICIOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve lo escrito en lugar de guardarlo."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(encabezados, filas):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel detecte UTF-8 (acentos en categorías y descripciones)
+    yield '\ufeff' + writer.writerow(encabezados)
+    for fila in filas:
+        yield writer.writerow([_neutralizar_formula(valor) for valor in fila])
+
+
+class _ZipStream:
+    """Destino no seekable para zipfile: acumula bytes que el generador vacía."""
+    def __init__(self):
+        self._partes = []
+
+    def write(self, data):
+        self._partes.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b''.join(self._partes)
+        self._partes.clear()
+        return data
+
+
+_XML_INVALIDO = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_PARTES = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Datos" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_celda(valor) -> str:
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, bool):
+        return f'<c t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c><v>{valor}</v></c>'
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    texto = escape(_XML_INVALIDO.sub('', str(_neutralizar_formula(valor))))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _xlsx_fila(valores) -> str:
+    return '<row>' + ''.join(_xlsx_celda(v) for v in valores) + '</row>'
+
+
+def stream_xlsx(encabezados, filas, filas_por_flush: int = 500):
+    """
+    Escribe un .xlsx mínimo (una hoja, inline strings) directamente sobre el
+    stream de respuesta: zipfile soporta destinos no seekable con data descriptors.
+    """
+    destino = _ZipStream()
+    with zipfile.ZipFile(destino, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, contenido in _XLSX_PARTES.items():
+            zf.writestr(nombre, contenido)
+        yield destino.pop()
+
+        with zf.open('xl/worksheets/sheet1.xml', mode='w') as hoja:
+            hoja.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            hoja.write(_xlsx_fila(encabezados).encode('utf-8'))
+            for i, fila in enumerate(filas, start=1):
+                hoja.write(_xlsx_fila(fila).encode('utf-8'))
+                if i % filas_por_flush == 0:
+                    data = destino.pop()
+                    if data:
+                        yield data
+            hoja.write(b'</sheetData></worksheet>')
+    yield destino.pop()
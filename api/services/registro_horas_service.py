@@ -0,0 +1,84 @@
+"""
+Registro de horas en lote (planilla de fin de día de una cuadrilla): varias filas
+de trabajo_personal, de uno o más trabajos, en una sola transacción.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from ..models import Trabajo, TrabajoPersonal, Personal, Maquina
+from ..response_cache import bump_tenant_version
+from .trabajo_service import aplicar_delta_trabajo, excede_hectareas, totales_en_bloque
+from .estadisticas_service import aplicar_delta_registro, recalcular_personal
+
+MAX_REGISTROS_BULK = 500
+
+MENSAJE_TOPE_HECTAREAS = "Se excede de horas del total declarado para el campo en el que trabaja"
+
+
+def registrar_horas_bulk(usuario_id: int, filas) -> tuple[list, dict]:
+    """
+    Persiste filas ya validadas por RegistroHorasBulkSerializer.
+
+    - Trabajos (bloqueados con select_for_update) y personal del tenant: una query cada uno.
+    - Tope de hectáreas por trabajo: contador ha_realizadas más lo acumulado en el
+      lote, en el orden de las filas (igual que si llegaran de a una).
+    - Un bulk_create (o un INSERT por fila si la base no devuelve las pk de un
+      INSERT múltiple, como MySQL) y un UPDATE de totales por trabajo.
+
+    `filas`: [(indice, datos)]. Devuelve (creados [(indice, registro)], errores {indice: {...}}).
+    """
+    creados, errores = [], {}
+    with transaction.atomic():
+        trabajos = (
+            Trabajo.objects.select_for_update().select_related('campo')
+            .filter(usuario_id=usuario_id, pk__in={datos['trabajo'] for _, datos in filas})
+            .in_bulk()
+        )
+        personal_ids = set(
+            Personal.objects
+            .filter(usuario_id=usuario_id, pk__in={datos['personal'] for _, datos in filas})
+            .values_list('pk', flat=True)
+        )
+
+        acumulado = defaultdict(Decimal)
+        for indice, datos in filas:
+            datos = dict(datos)
+            trabajo = trabajos.get(datos.pop('trabajo'))
+            if trabajo is None:
+                errores[indice] = {'trabajo': ['Trabajo no encontrado.']}
+                continue
+            personal_id = datos.pop('personal')
+            if personal_id not in personal_ids:
+                errores[indice] = {'personal': ['Personal no encontrado.']}
+                continue
+            hectareas = Decimal(str(datos.get('hectareas') or 0))
+            if hectareas and excede_hectareas(trabajo, acumulado[trabajo.pk] + hectareas)[0]:
+                errores[indice] = {'detail': MENSAJE_TOPE_HECTAREAS}
+                continue
+            acumulado[trabajo.pk] += hectareas
+            creados.append((indice, TrabajoPersonal(
+                trabajo=trabajo, personal_id=personal_id, usuario_id=usuario_id, **datos
+            )))
+
+        if not creados:
+            return creados, errores
+
+        registros = [registro for _, registro in creados]
+        if connection.features.can_return_rows_from_bulk_insert:
+            TrabajoPersonal.objects.bulk_create(registros)
+        else:
+            # Sin RETURNING bulk_create deja id=None y la respuesta lleva las pk
+            with totales_en_bloque():
+                for registro in registros:
+                    registro.save(force_insert=True)
+
+        # Los receivers por fila no aplican: totales, estadísticas y cache a mano
+        horas = defaultdict(Decimal)
+        for registro in registros:
+            horas[registro.trabajo_id] += Decimal(str(registro.horas_trabajadas or 0))
+        for trabajo_id in horas:
+            aplicar_delta_trabajo(trabajo_id, acumulado[trabajo_id], horas[trabajo_id])
+            aplicar_delta_registro(trabajo_id, None, acumulado[trabajo_id], horas[trabajo_id])
+        recalcular_personal(Personal.objects.filter(pk__in={r.personal_id for r in registros}))
+        bump_tenant_version(usuario_id, TrabajoPersonal, Personal, Maquina)
+    return creados, errores
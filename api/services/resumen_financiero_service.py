@@ -0,0 +1,143 @@
+"""
+Rollup mensual de movimientos financieros.
+Mantiene la tabla resumen_financiero_mensual con suma y cantidad por
+(usuario_id, periodo 'YYYY-MM', es_cobro, categoria) de forma incremental,
+para que los reportes lean O(meses) filas en vez de O(movimientos).
+"""
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from ..models import Movimiento, ResumenFinancieroMensual
+
+# Campos de Movimiento que afectan al rollup
+CAMPOS_RESUMEN = ('usuario_id', 'fecha', 'es_cobro', 'categoria', 'monto')
+
+
+def _clave(usuario_id, fecha, es_cobro, categoria) -> dict | None:
+    """Clave del rollup; None si el movimiento no entra en ningún período."""
+    if usuario_id is None or fecha is None or es_cobro is None:
+        return None
+    return {
+        'usuario_id': usuario_id,
+        'periodo': str(fecha)[:7],
+        'es_cobro': bool(es_cobro),
+        'categoria': categoria or '',
+    }
+
+
+def aplicar_movimiento(valores: dict, signo: int) -> None:
+    """
+    Suma (signo=1) o resta (signo=-1) la contribución de un movimiento al rollup.
+    `valores` debe contener los campos de CAMPOS_RESUMEN.
+    """
+    clave = _clave(valores['usuario_id'], valores['fecha'], valores['es_cobro'], valores['categoria'])
+    if clave is None:
+        return
+    _aplicar(clave, Decimal(str(valores['monto'] or 0)) * signo, signo)
+
+
+def aplicar_movimientos(cambios) -> None:
+    """
+    Versión en lote de aplicar_movimiento para escrituras que no disparan señales
+    (bulk_create/bulk_update): agrupa [(valores, signo)] por clave y hace un UPDATE por clave.
+    """
+    deltas = {}
+    for valores, signo in cambios:
+        clave = _clave(valores['usuario_id'], valores['fecha'], valores['es_cobro'], valores['categoria'])
+        if clave is None:
+            continue
+        key = tuple(clave.items())
+        total, cantidad = deltas.get(key, (Decimal('0'), 0))
+        deltas[key] = (total + Decimal(str(valores['monto'] or 0)) * signo, cantidad + signo)
+    for key, (total, cantidad) in deltas.items():
+        if total or cantidad:
+            _aplicar(dict(key), total, cantidad)
+
+
+def _aplicar(clave: dict, monto: Decimal, cantidad: int) -> None:
+    with transaction.atomic():
+        actualizadas = ResumenFinancieroMensual.objects.filter(**clave).update(
+            total=F('total') + monto,
+            cantidad=F('cantidad') + cantidad
+        )
+        if actualizadas:
+            return
+        try:
+            with transaction.atomic():
+                ResumenFinancieroMensual.objects.create(total=monto, cantidad=cantidad, **clave)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el update y el create
+            ResumenFinancieroMensual.objects.filter(**clave).update(
+                total=F('total') + monto,
+                cantidad=F('cantidad') + cantidad
+            )
+
+
+def valores_movimiento(movimiento: Movimiento) -> dict:
+    return {campo: getattr(movimiento, campo) for campo in CAMPOS_RESUMEN}
+
+
+def rebuild_resumen_financiero(usuario_id: int | None = None) -> int:
+    """
+    Recalcula el rollup desde movimientos (backfill o corrección tras updates masivos).
+    Devuelve la cantidad de filas generadas.
+    """
+    movimientos = Movimiento.objects.filter(
+        usuario_id__isnull=False, fecha__isnull=False, es_cobro__isnull=False
+    )
+    resumen = ResumenFinancieroMensual.objects.all()
+    if usuario_id is not None:
+        movimientos = movimientos.filter(usuario_id=usuario_id)
+        resumen = resumen.filter(usuario_id=usuario_id)
+
+    agregados = (
+        movimientos
+        .annotate(mes=TruncMonth('fecha'), cat=Coalesce('categoria', Value('')))
+        .values('usuario_id', 'mes', 'es_cobro', 'cat')
+        .annotate(total=Coalesce(Sum('monto'), Decimal('0')), cantidad=Count('id'))
+        .order_by()
+    )
+    filas = {}
+    for fila in agregados:
+        clave = (fila['usuario_id'], fila['mes'].strftime('%Y-%m'), fila['es_cobro'], fila['cat'])
+        # '' y NULL comparten categoría en el rollup
+        previa = filas.get(clave)
+        if previa:
+            previa.total += fila['total']
+            previa.cantidad += fila['cantidad']
+            continue
+        filas[clave] = ResumenFinancieroMensual(
+            usuario_id=clave[0], periodo=clave[1], es_cobro=clave[2], categoria=clave[3],
+            total=fila['total'], cantidad=fila['cantidad']
+        )
+
+    with transaction.atomic():
+        resumen.delete()
+        ResumenFinancieroMensual.objects.bulk_create(filas.values(), batch_size=1000)
+    return len(filas)
+
+
+def get_totales_por_categoria(usuario_id: int, periodo: str) -> list[dict]:
+    """
+    Totales agrupados por (es_cobro, categoria) para un período 'YYYY' o 'YYYY-MM'.
+    Para períodos más finos (un día) se agrega directamente sobre movimientos.
+    """
+    if len(periodo) <= 7:
+        return list(
+            ResumenFinancieroMensual.objects
+            .filter(usuario_id=usuario_id, periodo__startswith=periodo)
+            .values('es_cobro', 'categoria')
+            .annotate(total=Sum('total'))
+            .order_by()
+        )
+    return [
+        {'es_cobro': fila['es_cobro'], 'categoria': fila['categoria'] or '', 'total': fila['total'] or Decimal('0')}
+        for fila in (
+            Movimiento.objects
+            .filter(usuario_id=usuario_id, fecha__startswith=periodo, es_cobro__isnull=False)
+            .values('es_cobro', 'categoria')
+            .annotate(total=Sum('monto'))
+            .order_by()
+        )
+    ]
@@ -0,0 +1,173 @@
+"""
+Series temporales para los gráficos: ingresos, gastos, balance, trabajos
+completados y hectáreas trabajadas agrupados en buckets (día, semana, mes o
+campaña agrícola) con una query por métrica (group-by con Trunc*).
+
+Fechas de cada métrica: los trabajos completados cuentan en su fecha_fin (o en
+fecha_inicio si no la tienen) y las hectáreas en la fecha del registro, o en la
+fecha_inicio del trabajo para las filas de asignación de cuadrilla (fecha NULL).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek, TruncMonth
+from ..models import Movimiento, Trabajo, TrabajoPersonal, ResumenFinancieroMensual
+from ..utils import filtro_rango_fechas
+
+AGRUPACIONES = ('dia', 'semana', 'mes', 'campana')
+MAX_BUCKETS = 400
+
+# La campaña agrícola va de julio a junio: '2024/2025' = 2024-07-01 .. 2025-06-30
+MES_INICIO_CAMPANA = 7
+
+_TRUNC = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+    'campana': TruncMonth,  # se agrega por campaña en Python sobre los meses
+}
+
+
+def inicio_bucket(fecha: date, agrupacion: str) -> date:
+    if agrupacion == 'dia':
+        return fecha
+    if agrupacion == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if agrupacion == 'mes':
+        return fecha.replace(day=1)
+    year = fecha.year if fecha.month >= MES_INICIO_CAMPANA else fecha.year - 1
+    return date(year, MES_INICIO_CAMPANA, 1)
+
+
+def _siguiente_bucket(inicio: date, agrupacion: str) -> date:
+    if agrupacion == 'dia':
+        return inicio + timedelta(days=1)
+    if agrupacion == 'semana':
+        return inicio + timedelta(days=7)
+    if agrupacion == 'mes':
+        return date(inicio.year + 1, 1, 1) if inicio.month == 12 else date(inicio.year, inicio.month + 1, 1)
+    return date(inicio.year + 1, inicio.month, 1)
+
+
+def _etiqueta(inicio: date, agrupacion: str) -> str:
+    if agrupacion == 'mes':
+        return inicio.strftime('%Y-%m')
+    if agrupacion == 'campana':
+        return f'{inicio.year}/{inicio.year + 1}'
+    return inicio.isoformat()
+
+
+def _buckets(inicio: date, fin: date, agrupacion: str) -> list[date]:
+    """Inicios de bucket que cubren [inicio, fin). ValueError si son demasiados."""
+    buckets = []
+    actual = inicio_bucket(inicio, agrupacion)
+    while actual < fin:
+        buckets.append(actual)
+        if len(buckets) > MAX_BUCKETS:
+            raise ValueError(f'El rango genera más de {MAX_BUCKETS} buckets')
+        actual = _siguiente_bucket(actual, agrupacion)
+    return buckets
+
+
+def rango_buckets(inicio: date, fin: date, agrupacion: str) -> tuple[date, date]:
+    """
+    [inicio, fin) ampliado a buckets completos: del inicio del primer bucket al
+    fin del último, para que los de los bordes no queden con datos parciales.
+    """
+    ultimo = inicio_bucket(max(fin - timedelta(days=1), inicio), agrupacion)
+    return inicio_bucket(inicio, agrupacion), _siguiente_bucket(ultimo, agrupacion)
+
+
+def _finanzas(usuario_id: int, inicio: date, fin: date, agrupacion: str):
+    """Filas (fecha_bucket, es_cobro, total). Usa el rollup mensual si el rango está alineado a meses."""
+    if agrupacion in ('mes', 'campana') and inicio.day == 1 and fin.day == 1:
+        filas = (
+            ResumenFinancieroMensual.objects
+            .filter(usuario_id=usuario_id, periodo__gte=inicio.strftime('%Y-%m'), periodo__lt=fin.strftime('%Y-%m'))
+            .values('periodo', 'es_cobro')
+            .annotate(suma=Sum('total'))
+            .order_by()
+        )
+        for fila in filas:
+            year, month = fila['periodo'].split('-')
+            yield date(int(year), int(month), 1), fila['es_cobro'], fila['suma']
+        return
+
+    filas = (
+        Movimiento.objects
+        .filter(usuario_id=usuario_id, es_cobro__isnull=False, **filtro_rango_fechas('fecha', inicio, fin))
+        .annotate(bucket=_TRUNC[agrupacion]('fecha'))
+        .values('bucket', 'es_cobro')
+        .annotate(suma=Sum('monto'))
+        .order_by()
+    )
+    for fila in filas:
+        yield fila['bucket'], fila['es_cobro'], fila['suma']
+
+
+def get_series(usuario_id: int, inicio: date, fin: date, agrupacion: str = 'mes') -> list[dict]:
+    """
+    Serie de buckets que cubren [inicio, fin) con todas las métricas; los datos se
+    leen de los buckets completos (ver rango_buckets) y los buckets sin datos van
+    en cero. Tres queries: finanzas, trabajos completados y hectáreas.
+    """
+    if agrupacion not in AGRUPACIONES:
+        raise ValueError(f'Agrupación inválida: {agrupacion}')
+
+    inicio, fin = rango_buckets(inicio, fin, agrupacion)
+    buckets = _buckets(inicio, fin, agrupacion)
+    series = {
+        b: {
+            'periodo': _etiqueta(b, agrupacion),
+            'inicio': b,
+            'ingresos': Decimal('0'),
+            'gastos': Decimal('0'),
+            'balance': Decimal('0'),
+            'trabajos_completados': 0,
+            'hectareas_trabajadas': Decimal('0'),
+        }
+        for b in buckets
+    }
+
+    def bucket_de(fecha):
+        return series.get(inicio_bucket(fecha, agrupacion))
+
+    for fecha, es_cobro, suma in _finanzas(usuario_id, inicio, fin, agrupacion):
+        fila = bucket_de(fecha)
+        if fila is None or suma is None:
+            continue
+        fila['ingresos' if es_cobro else 'gastos'] += suma
+
+    trabajos = (
+        Trabajo.objects
+        .filter(usuario_id=usuario_id, estado='Completado')
+        .annotate(fecha_completado=Coalesce('fecha_fin', 'fecha_inicio'))
+        .filter(**filtro_rango_fechas('fecha_completado', inicio, fin))
+        .annotate(bucket=_TRUNC[agrupacion]('fecha_completado'))
+        .values('bucket')
+        .annotate(cantidad=Count('id'))
+        .order_by()
+    )
+    for t in trabajos:
+        fila = bucket_de(t['bucket'])
+        if fila is not None:
+            fila['trabajos_completados'] += t['cantidad']
+
+    hectareas = (
+        TrabajoPersonal.objects
+        .filter(usuario_id=usuario_id)
+        .annotate(fecha_registro=Coalesce('fecha', 'trabajo__fecha_inicio'))
+        .filter(**filtro_rango_fechas('fecha_registro', inicio, fin))
+        .annotate(bucket=_TRUNC[agrupacion]('fecha_registro'))
+        .values('bucket')
+        .annotate(ha=Sum('hectareas'))
+        .order_by()
+    )
+    for h in hectareas:
+        fila = bucket_de(h['bucket'])
+        if fila is not None and h['ha'] is not None:
+            fila['hectareas_trabajadas'] += h['ha']
+
+    for fila in series.values():
+        fila['balance'] = fila['ingresos'] - fila['gastos']
+    return list(series.values())
@@ -0,0 +1,425 @@
+"""
+Sincronización con el móvil.
+
+Descendente (servidor -> móvil):
+El cliente guarda el `sync_token` de la última respuesta y lo manda como
+?since=; el servidor devuelve solo las filas con updated_at posterior y los ids
+borrados desde entonces (tombstones en registros_eliminados). El token va firmado
+con django.core.signing; también se acepta un timestamp ISO 8601.
+
+Ascendente (móvil -> servidor): ver aplicar_cambios.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from uuid import UUID
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import (
+    Trabajo, Campo, Maquina, Personal, Cliente, Movimiento, RegistroEliminado, TipoTrabajo,
+    TrabajoPersonal
+)
+from ..response_cache import bump_tenant_version
+from .estadisticas_service import refrescar_por_trabajos
+from .resumen_financiero_service import aplicar_movimientos, valores_movimiento
+
+# recurso de la respuesta -> modelo sincronizado (todos con usuario_id y updated_at)
+RECURSOS_SYNC = {
+    'trabajos': Trabajo,
+    'campos': Campo,
+    'maquinas': Maquina,
+    'personal': Personal,
+    'clientes': Cliente,
+}
+RECURSO_POR_MODELO = {model: recurso for recurso, model in RECURSOS_SYNC.items()}
+# Datos de otros modelos que la respuesta de trabajos copia (campo_nombre, campo_ha,
+# tipo, nombre/dni de personal_detail). El sync descendente solo mira
+# Trabajo.updated_at: si cambian, los trabajos que los muestran se marcan modificados.
+CAMPOS_COPIADOS_EN_TRABAJO = {
+    Campo: ('nombre', 'hectareas'),
+    TipoTrabajo: ('trabajo',),
+    Personal: ('nombre', 'dni'),
+}
+
+SYNC_SALT = 'api.mobile_sync'
+# Filas cuyo commit estaba en curso al generar el token tienen updated_at anterior a
+# él: se relee este margen hacia atrás (el cliente aplica por id, repetir es inocuo)
+SYNC_SOLAPAMIENTO = timedelta(seconds=getattr(settings, 'SYNC_SOLAPAMIENTO_SEGUNDOS', 30))
+# Pasada la retención los tombstones se purgan: un since más viejo fuerza sync completa
+TOMBSTONE_RETENTION = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+PURGE_BATCH_SIZE = 1000
+
+
+def make_sync_token(momento: datetime) -> str:
+    return signing.dumps({'t': momento.isoformat()}, salt=SYNC_SALT)
+
+
+def parse_since(valor: str | None) -> datetime | None:
+    """Token de sync o timestamp ISO 8601 -> datetime aware. ValueError si es inválido."""
+    if not valor:
+        return None
+    try:
+        momento = datetime.fromisoformat(signing.loads(valor, salt=SYNC_SALT)['t'])
+    except (signing.BadSignature, KeyError, TypeError):
+        # '+' del offset llega como espacio si el cliente no lo codificó
+        momento = datetime.fromisoformat(valor.strip().replace(' ', '+'))
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento, dt_timezone.utc)
+    return momento
+
+
+def registrar_eliminado(instance) -> None:
+    """Tombstone para un objeto sincronizado que se borró (señal post_delete)."""
+    recurso = RECURSO_POR_MODELO.get(type(instance))
+    if recurso is None or instance.usuario_id is None:
+        return
+    RegistroEliminado.objects.create(usuario_id=instance.usuario_id, recurso=recurso, objeto_id=instance.pk)
+
+
+def tocar_trabajos_relacionados(instance) -> int:
+    """Actualiza updated_at de los trabajos que muestran datos de `instance` (ver CAMPOS_COPIADOS_EN_TRABAJO)."""
+    if isinstance(instance, Personal):
+        filtro = Q(pk__in=TrabajoPersonal.objects.filter(personal_id=instance.pk).values('trabajo_id'))
+    elif isinstance(instance, Campo):
+        filtro = Q(campo_id=instance.pk)
+    else:
+        filtro = Q(id_tipo_trabajo_id=instance.pk)
+    return Trabajo.objects.filter(filtro).update(updated_at=timezone.now())
+
+
+def get_cambios(usuario_id: int, since: datetime | None):
+    """
+    Querysets de cambios por recurso e ids eliminados desde `since`.
+    Devuelve (querysets, eliminados, completo, momento); `momento` es el valor del
+    próximo token y `completo` indica snapshot entero (el cliente reemplaza sus datos).
+    """
+    momento = timezone.now()
+    completo = since is None or since < momento - TOMBSTONE_RETENTION
+
+    querysets = {}
+    for recurso, model in RECURSOS_SYNC.items():
+        queryset = model.objects.filter(usuario_id=usuario_id)
+        if not completo:
+            # Índice (usuario_id, updated_at)
+            queryset = queryset.filter(updated_at__gt=since - SYNC_SOLAPAMIENTO)
+        querysets[recurso] = queryset.order_by('id')
+
+    eliminados = {recurso: [] for recurso in RECURSOS_SYNC}
+    if not completo:
+        filas = (
+            RegistroEliminado.objects
+            .filter(usuario_id=usuario_id, eliminado_en__gt=since - SYNC_SOLAPAMIENTO)
+            .values_list('recurso', 'objeto_id')
+        )
+        for recurso, objeto_id in filas:
+            if recurso in eliminados:
+                eliminados[recurso].append(objeto_id)
+    return querysets, eliminados, completo, momento
+
+
+def purge_registros_eliminados(batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Borra en lotes los tombstones más viejos que la retención. Devuelve filas borradas."""
+    limite = timezone.now() - TOMBSTONE_RETENTION
+    deleted = 0
+    while True:
+        ids = list(RegistroEliminado.objects.filter(eliminado_en__lt=limite).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += RegistroEliminado.objects.filter(pk__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return deleted
+
+
+# --- Sincronización ascendente (móvil -> servidor) ---
+
+# Campos que el móvil puede crear/modificar, por recurso. Los movimientos van después
+# de los trabajos: pueden referenciar un trabajo creado offline con id_trabajo_uuid.
+CAMPOS_UPSTREAM = {
+    'trabajos': (Trabajo, (
+        'cultivo', 'fecha_inicio', 'fecha_fin', 'campo', 'id_tipo_trabajo', 'estado', 'observaciones',
+        'a_terceros', 'cobrado', 'monto_cobrado', 'cliente', 'servicio_contratado',
+        'rinde_cosecha', 'humedad_cosecha',
+    )),
+    'movimientos': (Movimiento, (
+        'monto', 'fecha', 'descripcion', 'categoria', 'pagado', 'forma_pago', 'metodo_pago',
+        'es_cobro', 'destinatario', 'cobrar_a', 'fecha_pago_limite', 'fecha_pago', 'id_trabajo',
+    )),
+}
+MAX_CAMBIOS_SYNC = 1000
+# Transacción (savepoint si ya hay una abierta) que se repite ante un choque de client_uuid
+INTENTOS_UPSERT = 2
+# ER_LOCK_DEADLOCK: en MySQL dos inserts concurrentes del mismo client_uuid bajo gap
+# locks suelen terminar en deadlock (no en IntegrityError) y la víctima se deshace entera
+MYSQL_DEADLOCK = 1213
+# Cambios de trabajo que afectan estadísticas de personal y máquinas
+_CAMPOS_ESTADISTICAS = {'estado', 'fecha_inicio', 'id_tipo_trabajo_id', 'campo_id'}
+
+
+class _FilaInvalida(Exception):
+    def __init__(self, errores):
+        super().__init__(errores)
+        self.errores = errores
+
+
+def _convertir(model, permitidos, datos: dict) -> dict:
+    """Valores del móvil -> {attname: valor} validados con field.clean; las FKs quedan como ids."""
+    valores, errores = {}, {}
+    for nombre, valor in datos.items():
+        if nombre not in permitidos:
+            continue
+        field = model._meta.get_field(nombre)
+        try:
+            if field.many_to_one:
+                # La existencia (y el tenant) se valida en lote en _validar_fks
+                valores[field.attname] = None if valor in (None, '') else int(valor)
+            else:
+                valores[field.attname] = field.clean(valor, None)
+        except ValidationError as exc:
+            errores[nombre] = exc.messages
+        except (TypeError, ValueError):
+            errores[nombre] = ['Valor inválido.']
+    if errores:
+        raise _FilaInvalida(errores)
+    return valores
+
+
+def _parse_cambio(model, permitidos, cambio) -> dict:
+    if not isinstance(cambio, dict):
+        raise _FilaInvalida({'non_field_errors': ['Se espera un objeto.']})
+    try:
+        uuid = UUID(str(cambio['uuid'])) if cambio.get('uuid') else None
+        pk = int(cambio['id']) if cambio.get('id') else None
+    except (TypeError, ValueError):
+        raise _FilaInvalida({'uuid': ['uuid o id inválido.']})
+    if uuid is None and pk is None:
+        raise _FilaInvalida({'uuid': ['Se requiere uuid (o id para registros creados en el servidor).']})
+    try:
+        cliente_updated_at = parse_since(cambio.get('updated_at'))
+    except ValueError:
+        cliente_updated_at = None
+    if cliente_updated_at is None:
+        raise _FilaInvalida({'updated_at': ['Se requiere updated_at ISO 8601.']})
+
+    original = None
+    if isinstance(cambio.get('original'), dict):
+        try:
+            original = _convertir(model, permitidos, cambio['original'])
+        except _FilaInvalida:
+            original = None
+    return {
+        'uuid': uuid,
+        'id': pk,
+        'updated_at': cliente_updated_at,
+        'valores': _convertir(model, permitidos, cambio),
+        'original': original,
+        'id_trabajo_uuid': cambio.get('id_trabajo_uuid'),
+    }
+
+
+def _validar_fks(model, usuario_id, filas) -> None:
+    """Una query por FK: ids inexistentes o de otro tenant se marcan como error de la fila."""
+    for field in model._meta.concrete_fields:
+        if not field.many_to_one:
+            continue
+        ids = {f['valores'][field.attname] for f in filas if f['valores'].get(field.attname) is not None}
+        if not ids:
+            continue
+        relacionados = field.related_model.objects.filter(pk__in=ids)
+        if any(f.name == 'usuario_id' for f in field.related_model._meta.concrete_fields):
+            relacionados = relacionados.filter(usuario_id=usuario_id)
+        validos = set(relacionados.values_list('pk', flat=True))
+        for fila in filas:
+            valor = fila['valores'].get(field.attname)
+            if valor is not None and valor not in validos:
+                fila.setdefault('errores', {})[field.name] = ['No existe.']
+
+
+def _existentes(model, usuario_id, uuids, ids):
+    """Filas del lote que ya están en el servidor, bloqueadas hasta el commit."""
+    return (
+        model.objects.select_for_update()
+        .filter(usuario_id=usuario_id)
+        .filter(Q(client_uuid__in=uuids) | Q(pk__in=ids))
+    )
+
+
+def _upsert(recurso, usuario_id, cambios, resultado) -> None:
+    model, permitidos = CAMPOS_UPSTREAM[recurso]
+    filas = []
+    for indice, cambio in enumerate(cambios):
+        try:
+            fila = _parse_cambio(model, permitidos, cambio)
+        except _FilaInvalida as exc:
+            uuid = cambio.get('uuid') if isinstance(cambio, dict) else None
+            resultado['errores'].append({'recurso': recurso, 'indice': indice, 'uuid': uuid, 'errores': exc.errores})
+            continue
+        fila['indice'] = indice
+        filas.append(fila)
+
+    if recurso == 'movimientos':
+        uuids_trabajo = {f['id_trabajo_uuid'] for f in filas if f['id_trabajo_uuid']}
+        if uuids_trabajo:
+            por_uuid = dict(
+                Trabajo.objects.filter(usuario_id=usuario_id, client_uuid__in=_uuids_validos(uuids_trabajo))
+                .values_list('client_uuid', 'id')
+            )
+            for fila in filas:
+                if fila['id_trabajo_uuid']:
+                    trabajo_id = por_uuid.get(_uuid_o_none(fila['id_trabajo_uuid']))
+                    if trabajo_id is None:
+                        fila.setdefault('errores', {})['id_trabajo_uuid'] = ['No existe.']
+                    fila['valores']['id_trabajo_id'] = trabajo_id
+    _validar_fks(model, usuario_id, filas)
+
+    # Si el mismo registro viene varias veces en el lote gana la versión más nueva
+    vigentes = {}
+    for fila in filas:
+        if fila.get('errores'):
+            resultado['errores'].append({
+                'recurso': recurso, 'indice': fila['indice'], 'uuid': str(fila['uuid']) if fila['uuid'] else None,
+                'errores': fila['errores']
+            })
+            continue
+        clave = ('uuid', fila['uuid']) if fila['uuid'] else ('id', fila['id'])
+        if clave not in vigentes or fila['updated_at'] >= vigentes[clave]['updated_at']:
+            vigentes[clave] = fila
+    filas = list(vigentes.values())
+
+    uuids = {f['uuid'] for f in filas if f['uuid']}
+    ids = {f['id'] for f in filas if f['id']}
+    por_uuid, por_id = {}, {}
+    for obj in _existentes(model, usuario_id, uuids, ids):
+        por_id[obj.pk] = obj
+        if obj.client_uuid:
+            por_uuid[obj.client_uuid] = obj
+
+    ahora = timezone.now()
+    nuevos, modificados, campos_modificados = [], [], set()
+    previos, aplicados_por_id = {}, {}
+    for fila in filas:
+        obj = por_uuid.get(fila['uuid']) or por_id.get(fila['id'])
+        if obj is None:
+            if fila['uuid'] is None:
+                resultado['errores'].append({
+                    'recurso': recurso, 'indice': fila['indice'], 'uuid': None, 'errores': {'id': ['No existe.']}
+                })
+                continue
+            nuevos.append(model(usuario_id=usuario_id, client_uuid=fila['uuid'], **fila['valores']))
+            continue
+
+        # Last-writer-wins por campo: si el servidor es más nuevo, el cambio del móvil
+        # solo se aplica en los campos que el servidor no tocó (valor == original)
+        servidor_mas_nuevo = obj.updated_at > fila['updated_at']
+        original = fila['original'] or {}
+        aplicados, en_conflicto = {}, {}
+        for attname, valor in fila['valores'].items():
+            actual = getattr(obj, attname)
+            if actual == valor:
+                continue
+            if not servidor_mas_nuevo or (attname in original and original[attname] == actual):
+                aplicados[attname] = valor
+            else:
+                en_conflicto[attname] = actual
+        if en_conflicto:
+            resultado['conflictos'].append({
+                'recurso': recurso, 'uuid': str(fila['uuid']) if fila['uuid'] else None,
+                'id': obj.pk, 'servidor': en_conflicto
+            })
+        if aplicados:
+            if model is Movimiento:
+                previos[obj.pk] = valores_movimiento(obj)
+            aplicados_por_id[obj.pk] = set(aplicados)
+            for attname, valor in aplicados.items():
+                setattr(obj, attname, valor)
+            obj.updated_at = ahora  # bulk_update no aplica auto_now
+            campos_modificados.update(aplicados)
+            modificados.append(obj)
+
+    if nuevos:
+        model.objects.bulk_create(nuevos)
+    if modificados:
+        model.objects.bulk_update(modificados, sorted(campos_modificados) + ['updated_at'])
+
+    if uuids:
+        resultado['mapeo'][recurso] = {
+            str(uuid): pk for uuid, pk in
+            model.objects.filter(usuario_id=usuario_id, client_uuid__in=uuids).values_list('client_uuid', 'id')
+        }
+    resultado['sincronizados'][recurso] = len(nuevos) + len(modificados)
+    if not nuevos and not modificados:
+        return
+
+    # bulk_create/bulk_update no disparan señales: rollup, estadísticas y cache a mano
+    if model is Movimiento:
+        aplicar_movimientos(
+            [(valores_movimiento(obj), 1) for obj in nuevos]
+            + [(previos[obj.pk], -1) for obj in modificados]
+            + [(valores_movimiento(obj), 1) for obj in modificados]
+        )
+        bump_tenant_version(usuario_id, Movimiento)
+    else:
+        refrescar = [obj.pk for obj in modificados if aplicados_por_id[obj.pk] & _CAMPOS_ESTADISTICAS]
+        if refrescar:
+            refrescar_por_trabajos(refrescar)
+        bump_tenant_version(usuario_id, Trabajo, Personal, Maquina)
+
+
+def _transaccion_propia() -> bool:
+    """True si aplicar_cambios abre la transacción más externa (no un savepoint)."""
+    return not transaction.get_connection().in_atomic_block
+
+
+def _es_deadlock(exc: OperationalError) -> bool:
+    return bool(exc.args) and exc.args[0] == MYSQL_DEADLOCK
+
+
+def _uuid_o_none(valor):
+    try:
+        return UUID(str(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+def _uuids_validos(valores) -> set:
+    return {u for u in map(_uuid_o_none, valores) if u is not None}
+
+
+def aplicar_cambios(usuario_id: int, payload: dict) -> dict:
+    """
+    Aplica en una transacción los cambios offline del móvil ({recurso: [cambio, ...]}).
+
+    Cada cambio trae `uuid` (generado en el móvil; o `id` si el registro nació en el
+    servidor), `updated_at` del móvil, los campos modificados y opcionalmente
+    `original` (valores previos a la edición, para el merge por campo). Es idempotente:
+    reenviar el mismo lote no duplica (upsert por (usuario_id, client_uuid)).
+    Devuelve mapeo uuid -> id, conflictos (valores del servidor que ganaron), errores
+    por fila y cantidad de registros escritos por recurso.
+    """
+    total = sum(len(payload.get(recurso) or []) for recurso in CAMPOS_UPSTREAM)
+    if total > MAX_CAMBIOS_SYNC:
+        raise ValueError(f'Máximo {MAX_CAMBIOS_SYNC} cambios por request')
+
+    # Tras un deadlock MySQL ya deshizo la transacción: solo se puede repetir si es nuestra
+    reintenta_deadlock = _transaccion_propia()
+    for intento in range(INTENTOS_UPSERT):
+        resultado = {'mapeo': {}, 'conflictos': [], 'errores': [], 'sincronizados': {}}
+        try:
+            with transaction.atomic():
+                for recurso in CAMPOS_UPSTREAM:
+                    cambios = payload.get(recurso) or []
+                    if not isinstance(cambios, list):
+                        raise ValueError(f'{recurso} debe ser una lista')
+                    _upsert(recurso, usuario_id, cambios, resultado)
+            return resultado
+        except IntegrityError:
+            # Un reintento concurrente del mismo lote insertó los mismos client_uuid entre
+            # la lectura y el bulk_create: con sus filas ya commiteadas, el lote se vuelve
+            # a aplicar y esos registros pasan por el camino de update (merge por campo)
+            if intento == INTENTOS_UPSERT - 1:
+                raise
+        except OperationalError as exc:
+            # La misma carrera resuelta por InnoDB como deadlock: se repite igual
+            if not (reintenta_deadlock and _es_deadlock(exc)) or intento == INTENTOS_UPSERT - 1:
+                raise
@@ -0,0 +1,171 @@
+"""
+Trabajos: relaciones precargadas para serializar listados sin N+1 y totales
+denormalizados (ha_realizadas, horas_registradas) mantenidos con F() para que
+el tope de hectáreas sea una sola lectura de fila bloqueada.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, OuterRef, Prefetch, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ..models import Trabajo, TrabajoPersonal
+
+
+def trabajos_para_listado(queryset, relaciones=None):
+    """
+    Precarga campo, tipo, personal, máquinas y personal_detail de TrabajoSerializer.
+    Con `relaciones` (salida recortada, ver sparse_fields) solo las que se usan.
+    """
+    def usa(relacion):
+        return relaciones is None or relacion in relaciones
+
+    joins = [relacion for relacion in ('campo', 'id_tipo_trabajo') if usa(relacion)]
+    prefetch = [relacion for relacion in ('personal', 'maquinas') if usa(relacion)]
+    if usa('trabajopersonal_set'):
+        prefetch.append(
+            Prefetch('trabajopersonal_set', queryset=TrabajoPersonal.objects.select_related('personal'))
+        )
+    # select_related() sin argumentos seguiría todas las FKs
+    if joins:
+        queryset = queryset.select_related(*joins)
+    return queryset.prefetch_related(*prefetch)
+
+
+MAX_DIAS_CALENDARIO = 366
+
+
+def get_calendario(usuario_id: int, inicio, fin) -> list[dict]:
+    """
+    Trabajos activos en [inicio, fin) agrupados por día, para la pantalla de planificación.
+
+    Un trabajo está activo el día d si fecha_inicio <= d y (fecha_fin >= d o no tiene
+    fecha_fin). Una sola query proyectada (índice usuario_id, fecha_inicio, fecha_fin);
+    los días sin trabajos se omiten.
+    """
+    filas = (
+        Trabajo.objects
+        .filter(usuario_id=usuario_id, fecha_inicio__lt=fin)
+        .filter(Q(fecha_fin__gte=inicio) | Q(fecha_fin__isnull=True))
+        .annotate(cantidad_personal=Count('personal', distinct=True))
+        .values(
+            'id', 'fecha_inicio', 'fecha_fin', 'estado', 'campo_id',
+            'campo__nombre', 'id_tipo_trabajo__trabajo', 'cantidad_personal'
+        )
+        .order_by('fecha_inicio', 'id')
+    )
+
+    dias = {}
+    for fila in filas:
+        compacta = {
+            'id': fila['id'],
+            'campo_id': fila['campo_id'],
+            'campo': fila['campo__nombre'],
+            'tipo': fila['id_tipo_trabajo__trabajo'],
+            'estado': fila['estado'],
+            'personal': fila['cantidad_personal'],
+        }
+        dia = max(fila['fecha_inicio'], inicio)
+        ultimo = min(fila['fecha_fin'] or fin, fin - timedelta(days=1))
+        while dia <= ultimo:
+            dias.setdefault(dia, []).append(compacta)
+            dia += timedelta(days=1)
+    return [{'fecha': dia, 'trabajos': dias[dia]} for dia in sorted(dias)]
+
+
+def get_progreso(trabajo) -> tuple[float, float]:
+    """(ha_realizadas, porcentaje_progreso) del trabajo, desde el contador mantenido."""
+    ha_realizadas = float(trabajo.ha_realizadas or 0.0)
+    total_ha_campo = float(trabajo.campo.hectareas) if trabajo.campo and trabajo.campo.hectareas else 0.0
+
+    porcentaje = 0.0
+    if total_ha_campo > 0:
+        porcentaje = round((ha_realizadas / total_ha_campo) * 100, 2)
+    return ha_realizadas, porcentaje
+
+
+def aplicar_delta_trabajo(trabajo_id, hectareas=0, horas=0) -> None:
+    """
+    Suma (o resta) hectáreas y horas a los totales del trabajo con un UPDATE atómico.
+    Actualiza updated_at aunque el delta sea cero: el personal del trabajo cambió y
+    la sincronización incremental del móvil tiene que volver a enviarlo.
+    """
+    if trabajo_id is None:
+        return
+    Trabajo.objects.filter(pk=trabajo_id).update(
+        ha_realizadas=F('ha_realizadas') + Decimal(str(hectareas or 0)),
+        horas_registradas=F('horas_registradas') + Decimal(str(horas or 0)),
+        updated_at=timezone.now()
+    )
+
+
+_totales_por_fila = ContextVar('totales_por_fila', default=True)
+
+
+def totales_por_fila() -> bool:
+    """False dentro de totales_en_bloque(): los receivers de trabajo_personal no aplican deltas."""
+    return _totales_por_fila.get()
+
+
+@contextmanager
+def totales_en_bloque():
+    """
+    Apaga los receivers por fila de trabajo_personal (totales del trabajo y
+    estadísticas). Para borrados/ediciones en bloque que aplican el delta agregado
+    una sola vez (aplicar_delta_trabajo + refrescar_por_trabajo).
+    """
+    token = _totales_por_fila.set(False)
+    try:
+        yield
+    finally:
+        _totales_por_fila.reset(token)
+
+
+def tocar_trabajo(trabajo_id) -> None:
+    """Marca el trabajo como modificado (cambio de máquinas) para la sincronización móvil."""
+    if trabajo_id is not None:
+        Trabajo.objects.filter(pk=trabajo_id).update(updated_at=timezone.now())
+
+
+def lock_trabajo(trabajo_id):
+    """Trabajo (con su campo) bloqueado con select_for_update; usar dentro de transaction.atomic."""
+    return Trabajo.objects.select_for_update().select_related('campo').get(pk=trabajo_id)
+
+
+def excede_hectareas(trabajo, hectareas, liberadas=0) -> tuple[bool, float, float]:
+    """
+    Verifica el tope "hectáreas trabajadas <= hectáreas del campo" con el contador
+    del trabajo (ya bloqueado). `liberadas` son las hectáreas del registro que se
+    está editando. Devuelve (excede, total_resultante, limite); sin campo o con
+    límite 0 nunca excede.
+    """
+    limite = float(trabajo.campo.hectareas or 0) if trabajo.campo else 0.0
+    total = float(trabajo.ha_realizadas or 0) - float(liberadas or 0) + float(hectareas or 0)
+    return limite > 0 and total > limite, total, limite
+
+
+def reconcile_trabajo_totals(usuario_id: int | None = None) -> int:
+    """
+    Recalcula ha_realizadas y horas_registradas desde trabajo_personal (corrige
+    desvíos por escrituras que no pasan por las señales). Devuelve filas corregidas.
+    """
+    ha = TrabajoPersonal.objects.filter(trabajo=OuterRef('pk')).order_by().values('trabajo').annotate(t=Sum('hectareas')).values('t')
+    horas = TrabajoPersonal.objects.filter(trabajo=OuterRef('pk')).order_by().values('trabajo').annotate(t=Sum('horas_trabajadas')).values('t')
+    decimal = DecimalField(max_digits=12, decimal_places=2)
+    trabajos = Trabajo.objects.all()
+    if usuario_id is not None:
+        trabajos = trabajos.filter(usuario_id=usuario_id)
+    desviados = (
+        trabajos
+        .annotate(
+            ha_real=Coalesce(Subquery(ha), Value(Decimal('0')), output_field=decimal),
+            horas_real=Coalesce(Subquery(horas), Value(Decimal('0')), output_field=decimal),
+        )
+        .exclude(ha_realizadas=F('ha_real'), horas_registradas=F('horas_real'))
+        .values_list('pk', flat=True)
+    )
+    return Trabajo.objects.filter(pk__in=list(desviados)).update(
+        ha_realizadas=Coalesce(Subquery(ha), Value(Decimal('0')), output_field=decimal),
+        horas_registradas=Coalesce(Subquery(horas), Value(Decimal('0')), output_field=decimal),
+    )
@@ -1124,9 +1124,10 @@ def call_function(function_name: str, arguments: Dict, usuario_id: Optional[int]
                 queryset = queryset.filter(estado=arguments['estado'])
             
             limit = arguments.get('limit', 10)
-            trabajos = queryset[:limit]
-            
             from ..serializers import TrabajoSerializer
+            from .trabajo_service import trabajos_para_listado
+            trabajos = trabajos_para_listado(queryset)[:limit]
+            
             serializer = TrabajoSerializer(trabajos, many=True)
             # Convertir Decimal a float para serialización JSON
             data = []
@@ -0,0 +1,287 @@
+from decimal import Decimal
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import (
+    Movimiento, Trabajo, TrabajoPersonal, TrabajoMaquina, Personal, Maquina,
+    Usuario, AuthToken, ResumenFinancieroMensual, RegistroEliminado
+)
+from .response_cache import bump_tenant_version
+from .services.auth_token_service import revoke_user_tokens
+from .services.trabajo_service import aplicar_delta_trabajo, tocar_trabajo, totales_por_fila
+from .services.sync_service import (
+    CAMPOS_COPIADOS_EN_TRABAJO, RECURSO_POR_MODELO, registrar_eliminado, tocar_trabajos_relacionados
+)
+from .services.estadisticas_service import (
+    aplicar_delta_registro, recalcular_personal, recalcular_maquinas, refrescar_por_trabajo
+)
+from .services.resumen_financiero_service import (
+    CAMPOS_RESUMEN, aplicar_movimiento, valores_movimiento
+)
+
+
+@receiver(pre_save, sender=Movimiento)
+def movimiento_pre_save(sender, instance, raw=False, **kwargs):
+    # Guardar los valores persistidos para poder restar la contribución anterior
+    instance._resumen_previo = None
+    if raw or instance.pk is None:
+        return
+    instance._resumen_previo = (
+        Movimiento.objects.filter(pk=instance.pk).values(*CAMPOS_RESUMEN).first()
+    )
+
+
+@receiver(post_save, sender=Movimiento)
+def movimiento_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previo = getattr(instance, '_resumen_previo', None)
+    actual = valores_movimiento(instance)
+    if previo == actual:
+        return
+    if previo:
+        aplicar_movimiento(previo, -1)
+    aplicar_movimiento(actual, 1)
+
+
+@receiver(post_delete, sender=Movimiento)
+def movimiento_post_delete(sender, instance, **kwargs):
+    aplicar_movimiento(valores_movimiento(instance), -1)
+
+
+
+# --- Tokens de acceso: baja o cambio de rol del usuario ---
+
+_CAMPOS_TOKEN_USUARIO = ('is_active', 'rol')
+
+
+@receiver(pre_save, sender=Usuario)
+def usuario_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._token_previo = None
+    if raw or instance.pk is None or (update_fields and not set(update_fields) & set(_CAMPOS_TOKEN_USUARIO)):
+        return
+    instance._token_previo = (
+        Usuario.objects.filter(pk=instance.pk).values_list(*_CAMPOS_TOKEN_USUARIO).first()
+    )
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_post_save(sender, instance, created, raw=False, **kwargs):
+    previo = getattr(instance, '_token_previo', None)
+    if raw or created or previo is None:
+        return
+    if previo != tuple(getattr(instance, campo) for campo in _CAMPOS_TOKEN_USUARIO):
+        # Un token firmado sigue válido con el rol viejo hasta expirar: revocarlo
+        revoke_user_tokens(instance.pk)
+
+
+# --- Totales denormalizados de Trabajo (ha_realizadas, horas_registradas) ---
+
+@receiver(pre_save, sender=TrabajoPersonal)
+def trabajo_personal_pre_save(sender, instance, raw=False, **kwargs):
+    instance._totales_previos = None
+    if raw or instance.pk is None or not totales_por_fila():
+        return
+    instance._totales_previos = (
+        TrabajoPersonal.objects.filter(pk=instance.pk)
+        .values_list('trabajo_id', 'hectareas', 'horas_trabajadas', 'personal_id').first()
+    )
+
+
+@receiver(post_save, sender=TrabajoPersonal)
+def trabajo_personal_post_save(sender, instance, raw=False, **kwargs):
+    if raw or not totales_por_fila():
+        return
+    actual = (instance.trabajo_id, instance.hectareas, instance.horas_trabajadas)
+    previo = getattr(instance, '_totales_previos', None)
+    if previo and previo[0] == actual[0]:
+        delta_ha = Decimal(str(actual[1] or 0)) - (previo[1] or 0)
+        delta_horas = Decimal(str(actual[2] or 0)) - (previo[2] or 0)
+        aplicar_delta_trabajo(actual[0], delta_ha, delta_horas)
+        if previo[3] == instance.personal_id:
+            aplicar_delta_registro(actual[0], instance.personal_id, delta_ha, delta_horas)
+        else:
+            aplicar_delta_registro(actual[0], None, delta_ha, delta_horas)
+            recalcular_personal(Personal.objects.filter(pk__in=[previo[3], instance.personal_id]))
+    else:
+        if previo:
+            aplicar_delta_trabajo(previo[0], -(previo[1] or 0), -(previo[2] or 0))
+            aplicar_delta_registro(previo[0], None, -(previo[1] or 0), -(previo[2] or 0))
+        aplicar_delta_trabajo(*actual)
+        aplicar_delta_registro(actual[0], None, actual[1], actual[2])
+        # Alta (o cambio de trabajo): puede cambiar trabajos_completados y ultimo_trabajo
+        ids = {instance.personal_id, previo[3] if previo else None} - {None}
+        recalcular_personal(Personal.objects.filter(pk__in=ids))
+    bump_tenant_version(instance.usuario_id, Personal, Maquina)
+
+
+@receiver(post_delete, sender=TrabajoPersonal)
+def trabajo_personal_post_delete(sender, instance, **kwargs):
+    if not totales_por_fila():
+        return
+    hectareas = -Decimal(str(instance.hectareas or 0))
+    horas = -Decimal(str(instance.horas_trabajadas or 0))
+    aplicar_delta_trabajo(instance.trabajo_id, hectareas, horas)
+    aplicar_delta_registro(instance.trabajo_id, None, hectareas, horas)
+    if instance.personal_id is not None:
+        recalcular_personal(Personal.objects.filter(pk=instance.personal_id))
+    bump_tenant_version(instance.usuario_id, Personal, Maquina)
+
+
+# --- Estadísticas de personal y máquinas (ver estadisticas_service) ---
+
+_CAMPOS_ESTADISTICAS_TRABAJO = ('estado', 'fecha_inicio', 'id_tipo_trabajo_id', 'campo_id')
+
+
+@receiver(pre_save, sender=Trabajo)
+def trabajo_pre_save(sender, instance, raw=False, **kwargs):
+    instance._estadisticas_previas = None
+    if raw or instance.pk is None:
+        return
+    instance._estadisticas_previas = (
+        Trabajo.objects.filter(pk=instance.pk).values_list(*_CAMPOS_ESTADISTICAS_TRABAJO).first()
+    )
+
+
+@receiver(post_save, sender=Trabajo)
+def trabajo_post_save(sender, instance, created, raw=False, **kwargs):
+    previo = getattr(instance, '_estadisticas_previas', None)
+    if raw or created or previo is None:
+        return
+    actual = tuple(getattr(instance, campo) for campo in _CAMPOS_ESTADISTICAS_TRABAJO)
+    if actual != previo:
+        # Transición de estado (trabajos_completados) o cambio de la etiqueta/orden de ultimo_trabajo
+        refrescar_por_trabajo(instance.pk)
+        bump_tenant_version(instance.usuario_id, Personal, Maquina)
+
+
+def _recalcular_maquina(maquina_id, usuario_id):
+    recalcular_maquinas(Maquina.objects.filter(pk=maquina_id))
+    bump_tenant_version(usuario_id, Maquina)
+
+
+@receiver(post_save, sender=TrabajoMaquina)
+def trabajo_maquina_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tocar_trabajo(instance.trabajo_id)
+    if instance.maquina_id is not None:
+        _recalcular_maquina(instance.maquina_id, _tenant_de(instance))
+
+
+@receiver(post_delete, sender=TrabajoMaquina)
+def trabajo_maquina_post_delete(sender, instance, **kwargs):
+    # remove()/clear()/set() borran la tabla intermedia con un delete() de queryset
+    tocar_trabajo(instance.trabajo_id)
+    if instance.maquina_id is not None:
+        _recalcular_maquina(instance.maquina_id, _tenant_de(instance))
+
+
+@receiver(m2m_changed, sender=TrabajoMaquina)
+def trabajo_maquina_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # add()/set() insertan con bulk_create, sin post_save
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        maquinas = [instance.pk]
+        Trabajo.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+    else:
+        maquinas = list(pk_set)
+        tocar_trabajo(instance.pk)
+    recalcular_maquinas(Maquina.objects.filter(pk__in=maquinas))
+    bump_tenant_version(_tenant_de(instance), Maquina)
+
+
+# --- Tombstones para la sincronización incremental del móvil (ver sync_service) ---
+# Los receivers de post_delete se conectan por modelo: uno sin sender desactiva el
+# borrado rápido (un DELETE sin leer filas) de queryset.delete() en todos los modelos.
+
+def sync_post_delete(sender, instance, **kwargs):
+    registrar_eliminado(instance)
+
+
+for _model in RECURSO_POR_MODELO:
+    post_delete.connect(sync_post_delete, sender=_model)
+
+
+def copiados_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    campos = CAMPOS_COPIADOS_EN_TRABAJO[sender]
+    instance._copiados_previos = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(campos):
+        return
+    instance._copiados_previos = sender.objects.filter(pk=instance.pk).values_list(*campos).first()
+
+
+def copiados_post_save(sender, instance, created, raw=False, **kwargs):
+    previo = getattr(instance, '_copiados_previos', None)
+    if raw or created or previo is None:
+        return
+    if tuple(getattr(instance, campo) for campo in CAMPOS_COPIADOS_EN_TRABAJO[sender]) != previo:
+        # Renombre de campo, tipo u operario: los trabajos que lo muestran vuelven al sync
+        tocar_trabajos_relacionados(instance)
+
+
+for _model in CAMPOS_COPIADOS_EN_TRABAJO:
+    pre_save.connect(copiados_pre_save, sender=_model)
+    post_save.connect(copiados_post_save, sender=_model)
+
+
+# --- Versiones del cache de respuestas ---
+
+# Modelos que no afectan respuestas cacheadas (o derivados de otro modelo que ya invalida)
+_SIN_VERSION = (AuthToken, ResumenFinancieroMensual, RegistroEliminado)
+_CON_VERSION = [m for m in apps.get_app_config('api').get_models() if not issubclass(m, _SIN_VERSION)]
+
+
+def _tenant_de(instance):
+    """usuario_id del objeto, o el de su primer padre con tenant; None = global."""
+    if hasattr(instance, 'usuario_id'):
+        return instance.usuario_id
+    for field in instance._meta.concrete_fields:
+        if not field.many_to_one:
+            continue
+        try:
+            padre = getattr(instance, field.name)
+        except ObjectDoesNotExist:
+            continue
+        if padre is not None and getattr(padre, 'usuario_id', None) is not None:
+            return padre.usuario_id
+    return None
+
+
+def _invalidar(sender, instance):
+    if sender._meta.app_label != 'api' or issubclass(sender, _SIN_VERSION):
+        return
+    bump_tenant_version(_tenant_de(instance), sender)
+
+
+@receiver(post_save)
+def cache_version_post_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if sender is Usuario and update_fields and set(update_fields) <= {'last_login'}:
+        # El login actualiza last_login; no cambia ninguna respuesta
+        return
+    _invalidar(sender, instance)
+
+
+def cache_version_post_delete(sender, instance, **kwargs):
+    _invalidar(sender, instance)
+
+
+for _model in _CON_VERSION:
+    post_delete.connect(cache_version_post_delete, sender=_model)
+
+
+@receiver(m2m_changed)
+def cache_version_m2m_changed(sender, instance, action, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if sender._meta.app_label != 'api':
+        return
+    usuario_id = _tenant_de(instance)
+    bump_tenant_version(usuario_id, sender, type(instance))
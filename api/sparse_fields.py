@@ -0,0 +1,116 @@
+"""
+Sparse fieldsets para los listados: ?fields=id,nombre&expand=personal_detail.
+
+`?fields=` recorta la salida del serializer a esas claves y la proyección baja al
+ORM con .only(), así las columnas que la pantalla no muestra (observaciones,
+detalles, descripcion) no se leen. Las relaciones anidadas (Meta.expandable_fields)
+quedan fuera de una respuesta recortada salvo que se pidan en `?expand=`, y sin
+ellas tampoco se hacen sus JOINs/prefetch. Sin `?fields=` la respuesta es la
+completa de siempre.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+class CamposInvalidos(ValueError):
+    pass
+
+
+class SparseFieldsMixin:
+    """
+    Serializer que acepta fields=[...] y expand=[...] (validados y proyectados en
+    aplicar_fieldsets). Con fields=None la salida es la completa.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        conservar = {*fields, *expand}
+        for nombre in list(self.fields):
+            if nombre not in conservar:
+                self.fields.pop(nombre)
+
+
+def _lista(valor) -> list:
+    return [nombre.strip() for nombre in (valor or '').split(',') if nombre.strip()]
+
+
+def _proyeccion(modelo, campos) -> tuple[set | None, set]:
+    """
+    Columnas (para .only()) y relaciones (select_related/prefetch) que leen `campos`.
+    Columnas None si alguno no sale de una columna (SerializerMethodField, propiedad):
+    entonces se leen todas.
+    """
+    inversas = {rel.get_accessor_name(): rel for rel in modelo._meta.related_objects}
+    columnas, relaciones = {modelo._meta.pk.name}, set()
+    for campo in campos:
+        raiz, *resto = campo.source.split('.')
+        if raiz in inversas:
+            relaciones.add(raiz)
+            continue
+        try:
+            field = modelo._meta.get_field(raiz)
+        except FieldDoesNotExist:
+            columnas = None
+            continue
+        if field.many_to_many or field.one_to_many:
+            relaciones.add(raiz)
+        elif field.is_relation:
+            if resto:
+                relaciones.add(raiz)
+            if columnas is not None:
+                columnas.add(raiz)
+                if resto:
+                    columnas.add('__'.join([raiz, *resto]))
+        elif columnas is not None:
+            columnas.add(raiz)
+    return columnas, relaciones
+
+
+def aplicar_fieldsets(request, queryset, serializer_class, preparar=None, extras=None):
+    """
+    Lee ?fields=/?expand= del request, los valida contra `serializer_class` y
+    proyecta `queryset` a las columnas que necesita la salida recortada.
+
+    - `preparar(queryset, relaciones)`: agrega select_related/prefetch de las
+      relaciones usadas (None = todas, respuesta completa).
+    - `extras`: claves que agrega la vista por fuera del serializer -> columnas que leen.
+
+    Devuelve (queryset, kwargs para el serializer). CamposInvalidos si se piden
+    campos que no existen o que no se pueden expandir.
+    """
+    extras = extras or {}
+    fields = _lista(request.query_params.get('fields')) or None
+    expand = _lista(request.query_params.get('expand'))
+
+    serializer_fields = serializer_class().fields
+    expandibles = getattr(serializer_class.Meta, 'expandable_fields', ())
+    desconocidos = [
+        nombre for nombre in fields or ()
+        if nombre not in extras and (nombre not in serializer_fields or serializer_fields[nombre].write_only)
+    ]
+    if desconocidos:
+        raise CamposInvalidos(f"Campos desconocidos: {', '.join(desconocidos)}")
+    no_expandibles = [nombre for nombre in expand if nombre not in expandibles]
+    if no_expandibles:
+        disponibles = ', '.join(expandibles) or 'ninguno'
+        raise CamposInvalidos(f"No se puede expandir: {', '.join(no_expandibles)} (disponibles: {disponibles})")
+
+    opciones = {'fields': fields, 'expand': expand}
+    if fields is None:
+        return (preparar(queryset, None) if preparar else queryset), opciones
+
+    salida = [serializer_fields[nombre] for nombre in {*fields, *expand} if nombre in serializer_fields]
+    columnas, relaciones = _proyeccion(serializer_class.Meta.model, salida)
+    for columna in (c for nombre in fields for c in extras.get(nombre, ())):
+        raiz = columna.split('__')[0]
+        if raiz != columna:
+            relaciones.add(raiz)
+        if columnas is not None:
+            columnas.update((raiz, columna))
+
+    if preparar:
+        queryset = preparar(queryset, relaciones)
+    if columnas is not None:
+        queryset = queryset.only(*columnas)
+    return queryset, opciones
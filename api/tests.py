@@ -1,16 +1,46 @@
-from datetime import date
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+import csv
+import gzip
+import json
+import time
 from unittest.mock import patch
 import uuid
+import zipfile
 
-from django.test import TestCase
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
+from .middleware import CompresionMiddleware
 from .models import (
     Usuario, Personal, Campo, Cliente, Maquina, CampoCliente,
     TipoTrabajo, Trabajo, TrabajoPersonal, Costo, Factura, FacturaItem,
-    Credito, CuotaCredito, Pago, Movimiento, Mantenimiento, Insumo
+    Credito, CuotaCredito, Pago, Movimiento, Mantenimiento, Insumo, AuthToken,
+    ResumenFinancieroMensual
+)
+from .services.auth_token_service import (
+    create_auth_token, get_usuario_id_from_token, get_token_owner, clear_token_cache,
+    invalidate_token, _hash_token, _local_cache, _shared_cache_key
+)
+from .services.dashboard_service import get_dashboard_resumen, get_dashboard_estadisticas
+from .services.sync_service import _existentes
+from .read_serializers import _plan, serializar_lista
+from .response_cache import cache_respuestas_habilitado
+from .serializers import (
+    CampoSerializer, ClienteSerializer, CostoSerializer, MaquinaSerializer,
+    MovimientoSerializer, PersonalSerializer, TrabajoSerializer
 )
-from .services.auth_token_service import create_auth_token
 
 
 class GesAgroEndpointTestCase(TestCase):
@@ -146,6 +176,8 @@ class GesAgroEndpointTestCase(TestCase):
         )
 
     def setUp(self):
+        clear_token_cache()
+        cache.clear()
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token.access_token}')
 
@@ -192,6 +224,852 @@ class GesAgroEndpointTestCase(TestCase):
         down_resp = temp_client.get(self._url('campos/'))
         self.assertEqual(down_resp.status_code, 401)
 
+    def test_token_resolution_is_cached(self):
+        temp_token = create_auth_token(self.user.id)
+        self.assertEqual(get_usuario_id_from_token(temp_token.access_token), self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_usuario_id_from_token(temp_token.access_token), self.user.id)
+
+        # Con LocMemCache (no compartido entre procesos) no se usa el segundo nivel
+        self.assertIsNone(cache.get(_shared_cache_key(_hash_token(temp_token.access_token))))
+
+        # Emitir un token nuevo invalida el anterior aunque esté en cache
+        new_token = create_auth_token(self.user.id)
+        self.assertIsNone(get_usuario_id_from_token(temp_token.access_token))
+        self.assertEqual(get_usuario_id_from_token(new_token.access_token), self.user.id)
+
+        # Un request concurrente que resolvió el token antes del commit del logout
+        # lo vuelve a cachear: se saca otra vez al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_token(new_token.access_token)
+            _local_cache.set(_hash_token(new_token.access_token), (self.user.id, self.user.rol, True, None))
+        self.assertIsNone(get_usuario_id_from_token(new_token.access_token))
+
+    @override_settings(AUTH_TOKEN_SIGNING_KEY='clave-de-firma-de-tests')
+    def test_signed_and_opaque_tokens(self):
+        signed_token = create_auth_token(self.user.id, signed=True)
+        self.assertIn(':', signed_token.access_token)
+        self.assertEqual(get_usuario_id_from_token(signed_token.access_token), self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_token_owner(signed_token.access_token), (self.user.id, self.user.rol, True))
+
+        payload, signature = signed_token.access_token.rsplit(':', 1)
+        self.assertIsNone(get_usuario_id_from_token(f'{payload}:{signature[::-1]}'))
+
+        opaque_token = create_auth_token(self.user.id, signed=False)
+        self.assertNotIn(':', opaque_token.access_token)
+        self.assertEqual(get_usuario_id_from_token(opaque_token.access_token), self.user.id)
+        # El token firmado anterior quedó reemplazado por la nueva generación
+        self.assertIsNone(get_usuario_id_from_token(signed_token.access_token))
+
+    @override_settings(AUTH_TOKEN_SIGNING_KEY='clave-de-firma-de-tests')
+    def test_token_firmado_no_se_puede_falsificar(self):
+        firmado = create_auth_token(self.user.id, signed=True)
+        generacion = AuthToken.objects.get(usuario_id=self.user.id).generation
+        futuro = int(time.time()) + 3600
+
+        def forjar(key, **extra):
+            payload = {'u': self.user.id, 'g': generacion, 'e': futuro, 'i': int(time.time()), **extra}
+            return signing.dumps(payload, key=key, salt='api.auth_token')
+
+        # SECRET_KEY es pública: un token firmado con ella no vale
+        self.assertIsNone(get_token_owner(forjar(settings.SECRET_KEY)))
+        # Con la clave correcta solo vale la generación activa, y el rol no sale del payload
+        self.assertIsNone(get_token_owner(forjar('clave-de-firma-de-tests', g=generacion + 100)))
+        clear_token_cache()
+        self.assertIsNone(get_token_owner(forjar('clave-de-firma-de-tests', g=generacion + 100)))
+        self.assertEqual(
+            get_token_owner(forjar('clave-de-firma-de-tests', r='admin')),
+            (self.user.id, self.user.rol, True),
+        )
+        # Sin clave propia el formato firmado se rechaza
+        with override_settings(AUTH_TOKEN_SIGNING_KEY=''):
+            self.assertIsNone(get_token_owner(firmado.access_token))
+            with self.assertRaises(ImproperlyConfigured):
+                create_auth_token(self.user.id, signed=True)
+        with override_settings(AUTH_TOKEN_SIGNING_KEY=settings.SECRET_KEY):
+            self.assertIsNone(get_token_owner(firmado.access_token))
+
+    @override_settings(AUTH_TOKEN_SIGNING_KEY='clave-de-firma-de-tests')
+    def test_baja_o_cambio_de_rol_revoca_token_firmado(self):
+        usuario = Usuario.objects.create_user(email=self._unique_email(), password='x', nombre='Temporal', rol='Contable')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {create_auth_token(usuario.id, signed=True).access_token}')
+        self.assertEqual(client.get(self._url('campos/')).status_code, 200)
+
+        usuario.rol = 'Administrador'
+        usuario.save()
+        self.assertEqual(client.get(self._url('campos/')).status_code, 401)
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {create_auth_token(usuario.id, signed=True).access_token}')
+        self.assertEqual(client.get(self._url('campos/')).status_code, 200)
+        usuario.is_active = False
+        usuario.save()
+        self.assertEqual(client.get(self._url('campos/')).status_code, 401)
+        # Otro proceso lo ve por el sync de revocaciones contra auth_tokens
+        clear_token_cache()
+        self.assertEqual(client.get(self._url('campos/')).status_code, 401)
+
+    def test_purge_auth_tokens_command(self):
+        past = timezone.now() - timedelta(days=2)
+        AuthToken.objects.create(access_token='expirado', usuario_id=9001, expires_at=past)
+        inactivo = AuthToken.objects.create(access_token='inactivo', usuario_id=9002, is_active=False)
+        AuthToken.objects.filter(pk=inactivo.pk).update(updated_at=past)
+        AuthToken.objects.create(access_token='recien-revocado', usuario_id=9003, is_active=False)
+
+        call_command('purge_auth_tokens', batch_size=1, stdout=StringIO())
+
+        remaining = set(AuthToken.objects.values_list('access_token', flat=True))
+        self.assertNotIn('expirado', remaining)
+        self.assertNotIn('inactivo', remaining)
+        self.assertIn('recien-revocado', remaining)
+        self.assertIn(self.token.access_token, remaining)
+
+        # Sin receivers de post_delete para AuthToken el borrado es un solo DELETE
+        with self.assertNumQueries(1):
+            AuthToken.objects.filter(access_token='recien-revocado').delete()
+
+    def test_token_resolved_once_per_request(self):
+        with patch('api.authentication.get_token_owner', wraps=get_token_owner) as owner_mock:
+            resp = self.client.patch(self._url(f'trabajos/{self.trabajo.id}/update/'), {'estado': 'En curso'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(owner_mock.call_count, 1)
+
+        anon_resp = APIClient().get(self._url('campos/'))
+        self.assertEqual(anon_resp.status_code, 401)
+        self.assertEqual(anon_resp.data['detail'], 'Token de acceso requerido')
+
+    def test_dashboard_aggregation_queries(self):
+        with self.assertNumQueries(5):
+            resumen = get_dashboard_resumen(self.user.id)
+        with self.assertNumQueries(6):
+            estadisticas = get_dashboard_estadisticas(self.user.id)
+
+        self.assertEqual(resumen['ingresos_mes'], Decimal('220'))
+        self.assertEqual(resumen['balance_mes'], Decimal('110'))
+        self.assertEqual(resumen['mantenimientos_pendientes'], 1)
+        self.assertEqual(estadisticas['balance_total'], Decimal('110'))
+        self.assertEqual(estadisticas['total_campos'], 1)
+
+        resp = self.client.get(self._url('dashboard/resumen/'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, resumen)
+
+    def test_response_cache_por_tenant(self):
+        url = self._url('flutter/campos/lista/')
+        first = self.client.get(url, {'limit': 10, 'skip': 0})
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, {'skip': 0, 'limit': 10})
+        self.assertEqual(cached.data, first.data)
+
+        # Una escritura del tenant invalida la versión y la respuesta se recalcula
+        Campo.objects.create(nombre='Campo Nuevo', hectareas=10, usuario_id=self.user.id)
+        fresh = self.client.get(url, {'limit': 10, 'skip': 0})
+        self.assertEqual(fresh.data['pagination']['total'], first.data['pagination']['total'] + 1)
+
+        # Escrituras de otro tenant no invalidan
+        Campo.objects.create(nombre='Campo Ajeno', hectareas=10, usuario_id=self.user.id + 1000)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'limit': 10, 'skip': 0})
+
+        # Con cache local (por proceso) solo se cachea si hay un único proceso
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}}
+        with override_settings(CACHES=local, RESPONSE_CACHE_SINGLE_PROCESS=False):
+            self.assertFalse(cache_respuestas_habilitado())
+        with override_settings(CACHES=local, RESPONSE_CACHE_SINGLE_PROCESS=True):
+            self.assertTrue(cache_respuestas_habilitado())
+        with override_settings(CACHES=redis, RESPONSE_CACHE_SINGLE_PROCESS=False):
+            self.assertTrue(cache_respuestas_habilitado())
+
+    def test_serializar_lista_identico_a_model_serializer(self):
+        Costo.objects.create(monto=Decimal('10.5'), fecha=date.today(), usuario_id=self.user.id)
+        Costo.objects.create(usuario_id=self.user.id)  # nulos
+        Movimiento.objects.create(
+            monto=Decimal('3.333'), fecha=date.today(), client_uuid=uuid.uuid4(),
+            id_trabajo=self.trabajo, usuario_id=self.user.id
+        )
+        Campo.objects.create(nombre='Lote', latitud=Decimal('-34.6'), usuario_id=self.user.id)
+        renderer = JSONRenderer()
+        for modelo, serializer_class in [
+            (Costo, CostoSerializer), (Movimiento, MovimientoSerializer), (Campo, CampoSerializer),
+            (Personal, PersonalSerializer), (Maquina, MaquinaSerializer), (Cliente, ClienteSerializer),
+            (Trabajo, TrabajoSerializer),  # no es plano: usa el serializer
+        ]:
+            queryset = modelo.objects.filter(usuario_id=self.user.id).order_by('id')
+            self.assertEqual(
+                renderer.render(serializar_lista(queryset, serializer_class)),
+                renderer.render(serializer_class(queryset, many=True).data),
+                modelo.__name__
+            )
+        queryset = Personal.objects.filter(usuario_id=self.user.id)
+        with self.assertNumQueries(1):
+            data = serializar_lista(queryset, PersonalSerializer, fields=['nombre', 'horas_trabajadas'])
+        self.assertEqual(data, PersonalSerializer(queryset, many=True, fields=['nombre', 'horas_trabajadas']).data)
+        # El orden de ?fields= no crea otro plan
+        planes = _plan.cache_info().currsize
+        self.assertEqual(serializar_lista(queryset, PersonalSerializer, fields=['horas_trabajadas', 'nombre']), data)
+        self.assertEqual(_plan.cache_info().currsize, planes)
+
+    def test_get_condicional_etag(self):
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        for ruta in ('personal/', f'personal/{self.personal.id}/', 'maquinas/', 'trabajos/',
+                     f'trabajos/detalle/{self.trabajo.id}/', 'flutter/campos/lista/'):
+            resp = self.client.get(self._url(ruta))
+            self.assertEqual(resp.status_code, 200, ruta)
+            self.assertTrue(resp['ETag'].startswith('W/"'), ruta)
+            with self.assertNumQueries(0):
+                resp = self.client.get(self._url(ruta), HTTP_IF_NONE_MATCH=resp['ETag'])
+            self.assertEqual(resp.status_code, 304, ruta)
+            self.assertEqual(resp.content, b'')
+
+        url = self._url('personal/')
+        primera = self.client.get(url)
+        # Otros params son otra representación
+        self.assertNotEqual(self.client.get(url, {'x': 1})['ETag'], primera['ETag'])
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=primera['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)
+
+        # Una escritura cambia el ETag y el GET condicional vuelve a traer el cuerpo
+        Personal.objects.create(nombre='Operario Dos', usuario_id=self.user.id)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], primera['ETag'])
+        self.assertEqual(len(resp.data), len(primera.data) + 1)
+
+    def test_renderer_y_compresion(self):
+        Personal.objects.bulk_create([
+            Personal(nombre=f'Operario {i} ñandú ', usuario_id=self.user.id) for i in range(50)
+        ])
+        url = self._url('mobile/sync/')
+        plano = self.client.get(url)
+        self.assertEqual(plano.status_code, 200)
+        self.assertNotIn('Content-Encoding', plano)
+        # Mismos bytes que el JSONRenderer de DRF
+        self.assertEqual(plano.content, JSONRenderer().render(plano.data))
+
+        comprimido = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(comprimido['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', comprimido['Vary'])
+        cuerpo = gzip.decompress(comprimido.content)
+        self.assertLess(len(comprimido.content), len(cuerpo) // 3)
+        self.assertEqual(json.loads(cuerpo)['data']['personal'], json.loads(plano.content)['data']['personal'])
+
+        # Respuestas chicas (y gzip;q=0) van sin comprimir
+        chica = self.client.get(self._url(f'personal/{self.personal.id}/'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', chica)
+        self.assertNotIn('Content-Encoding', self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0'))
+
+        # BREACH: el relleno aleatorio de gzip cambia el largo entre respuestas iguales
+        largos = {len(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip').content) for _ in range(5)}
+        self.assertGreater(len(largos), 1)
+        # ...y login (token en el cuerpo) o respuestas que varían por Cookie no se comprimen
+        with patch('api.middleware.COMPRESSION_MIN_BYTES', 0):
+            login = self.client.post(
+                self._url('auth/login/'), {'email': self.user.email, 'password': self.password},
+                format='json', HTTP_ACCEPT_ENCODING='gzip'
+            )
+            self.assertIn('access_token', login.data)
+            self.assertNotIn('Content-Encoding', login)
+            response = HttpResponse(b'x' * 2000, headers={'Vary': 'Cookie'})
+            request = RequestFactory().get('/api/campos/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertNotIn('Content-Encoding', CompresionMiddleware(lambda r: response)(request))
+
+    def test_trabajos_listado_sin_n_mas_1(self):
+        for i in range(5):
+            trabajo = Trabajo.objects.create(
+                id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, fecha_inicio=date.today(),
+                usuario_id=self.user.id
+            )
+            trabajo.maquinas.set([self.maquina])
+
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        with self.assertNumQueries(5):
+            resp = self.client.get(self._url('trabajos/'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data), 6)
+        con_personal = next(t for t in resp.data if t['id'] == self.trabajo.id)
+        self.assertEqual(con_personal['ha_realizadas'], 8.0)
+        self.assertEqual(con_personal['porcentaje_progreso'], round(8 / 55.5 * 100, 2))
+        self.assertEqual(con_personal['personal_detail'][0]['nombre'], 'Operario Test')
+        self.assertEqual(resp.data[-1]['maquinas'], [self.maquina.id])
+
+    def test_roles_personal_en_una_query(self):
+        Usuario.objects.create_user(email=self._unique_email(), password='x', nombre='Capataz', rol='Contable')
+        for nombre in ('Capataz', 'Tractorista', 'Ayudante'):
+            personal = Personal.objects.create(nombre=nombre, usuario_id=self.user.id)
+            TrabajoPersonal.objects.create(trabajo=self.trabajo, personal=personal, usuario_id=self.user.id)
+
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        with self.assertNumQueries(5):
+            resp = self.client.get(self._url('trabajos/'))
+        roles = {p['nombre']: p['rol'] for p in resp.data[0]['personal_detail']}
+        self.assertEqual(roles['Capataz'], 'Contable')
+        self.assertIsNone(roles['Tractorista'])
+
+    def test_sparse_fieldsets(self):
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self._url('trabajos/'), {'fields': 'id,estado,campo_nombre'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(set(resp.data[0]), {'id', 'estado', 'campo_nombre'})
+        # Una sola query, sin columnas TEXT ni prefetch de personal/máquinas
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('observaciones', selects[0])
+        self.assertNotIn('"campos"."detalles"', selects[0])
+
+        resp = self.client.get(self._url('trabajos/'), {
+            'fields': 'id,porcentaje_progreso', 'expand': 'personal_detail'
+        })
+        self.assertEqual(set(resp.data[0]), {'id', 'porcentaje_progreso', 'personal_detail'})
+        self.assertEqual(resp.data[0]['porcentaje_progreso'], round(8 / 55.5 * 100, 2))
+        self.assertEqual(resp.data[0]['personal_detail'][0]['nombre'], 'Operario Test')
+
+        Trabajo.objects.create(id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, usuario_id=self.user.id)
+        # Claves del cursor (updated_at, id) y página proyectada a las columnas pedidas
+        with self.assertNumQueries(2):
+            resp = self.client.get(self._url('flutter/trabajos/lista/'), {
+                'fields': 'id,tipo', 'cursor': '', 'orden': 'updated_at', 'limit': 1
+            })
+        self.assertEqual(resp.data['data'], [{'id': self.trabajo.id, 'tipo': 'Siembra'}])
+        self.assertTrue(resp.data['pagination']['has_more'])
+
+        resp = self.client.get(self._url('personal/'), {'fields': 'nombre,telefono'})
+        self.assertEqual(resp.data, [{'nombre': 'Operario Test', 'telefono': self.personal.telefono}])
+        self.assertEqual(self.client.get(self._url('personal/'), {'fields': 'nombre,sueldo'}).status_code, 400)
+        self.assertEqual(self.client.get(self._url('trabajos/'), {'expand': 'estado'}).status_code, 400)
+
+    def test_trabajo_update_reconcilia_personal(self):
+        horas = TrabajoPersonal.objects.create(
+            trabajo=self.trabajo, personal=self.personal, hectareas=2, horas_trabajadas=5,
+            fecha=date.today(), usuario_id=self.user.id
+        )
+        nuevo = Personal.objects.create(nombre='Operario Nuevo', usuario_id=self.user.id)
+        url = self._url(f'trabajos/{self.trabajo.id}/update/')
+        marca = timezone.now() - timedelta(days=1)
+        TrabajoPersonal.objects.filter(pk=self.trabajo_personal.pk).update(updated_at=marca)
+
+        resp = self.client.patch(url, {
+            'personal_hectareas': [{'id': self.personal.id, 'ha': 10}, {'id': nuevo.id, 'ha': 3}]
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        filas = {tp.id: tp for tp in TrabajoPersonal.objects.filter(trabajo=self.trabajo)}
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(filas[self.trabajo_personal.id].hectareas, Decimal('10'))
+        # La edición de hectáreas (bulk_update) mueve updated_at para el sync incremental
+        self.assertGreater(filas[self.trabajo_personal.id].updated_at, marca)
+        self.assertEqual(filas[horas.id].horas_trabajadas, Decimal('5'))
+        alta = next(tp for tp in filas.values() if tp.personal_id == nuevo.id)
+        self.assertEqual((alta.hectareas, alta.usuario_id), (Decimal('3'), self.user.id))
+
+        resp = self.client.patch(url, {'id_personal': [nuevo.id]}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            list(TrabajoPersonal.objects.filter(trabajo=self.trabajo).values_list('id', flat=True)),
+            [alta.id]
+        )
+
+        # Cambio de cuadrilla: 10 salen y 10 entran con una cantidad fija de queries
+        salientes = [Personal.objects.create(nombre=f'Saliente {i}', usuario_id=self.user.id) for i in range(10)]
+        entrantes = [Personal.objects.create(nombre=f'Entrante {i}', usuario_id=self.user.id) for i in range(10)]
+        self.client.patch(url, {
+            'personal_hectareas': [{'id': p.id, 'ha': 1} for p in salientes]
+        }, format='json')
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        with self.assertNumQueries(19):
+            resp = self.client.patch(url, {
+                'personal_hectareas': [{'id': p.id, 'ha': 2} for p in entrantes]
+            }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['ha_realizadas'], '20.00')
+        self.assertEqual({p['nombre'] for p in resp.data['personal_detail']}, {p.nombre for p in entrantes})
+        self.assertEqual(Personal.objects.get(pk=salientes[0].pk).superficie_total_ha, Decimal('0'))
+        self.assertEqual(Personal.objects.get(pk=entrantes[0].pk).superficie_total_ha, Decimal('2'))
+
+        # El serializer devuelve los totales que actualizó con F(), no los de memoria
+        serializer = TrabajoSerializer(
+            self.trabajo, data={'personal_hectareas': [{'id': nuevo.id, 'ha': 4}]}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.save().ha_realizadas, Decimal('4'))
+
+        # personal_hectareas vacío deja el trabajo sin personal aunque venga id_personal
+        resp = self.client.patch(url, {'personal_hectareas': [], 'id_personal': [nuevo.id]}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(TrabajoPersonal.objects.filter(trabajo=self.trabajo).exists())
+
+    def test_totales_trabajo_y_tope_de_hectareas(self):
+        def totales():
+            self.trabajo.refresh_from_db()
+            return self.trabajo.ha_realizadas, self.trabajo.horas_registradas
+
+        self.assertEqual(totales(), (Decimal('8'), Decimal('2')))
+
+        resp = self.client.post(self._url('trabajos/registrar-horas/'), {
+            'trabajo': self.trabajo.id, 'personal': self.personal.id, 'hectareas': 40, 'horas_trabajadas': 3
+        }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(totales(), (Decimal('48'), Decimal('5')))
+
+        # 48 + 10 > 55.5: el tope se valida contra el contador, sin re-agregar
+        resp = self.client.post(self._url('trabajos/registrar-horas/'), {
+            'trabajo': self.trabajo.id, 'personal': self.personal.id, 'hectareas': 10
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('detail', resp.data)
+
+        resp = self.client.patch(self._url(f'trabajos-personal/{self.trabajo_personal.id}/update/'), {'hectareas': 16}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.patch(self._url(f'trabajos-personal/{self.trabajo_personal.id}/update/'), {'hectareas': 15}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(totales()[0], Decimal('55'))
+
+        # Un save() del trabajo con datos viejos no pisa los totales
+        self.trabajo.ha_realizadas = Decimal('0')
+        self.trabajo.estado = 'En curso'
+        self.trabajo.save()
+        self.assertEqual(totales()[0], Decimal('55'))
+
+        Trabajo.objects.filter(pk=self.trabajo.pk).update(ha_realizadas=0)
+        out = StringIO()
+        call_command('reconcile_trabajo_totals', stdout=out)
+        self.assertIn('1 trabajos corregidos', out.getvalue())
+        self.assertEqual(totales(), (Decimal('55'), Decimal('5')))
+
+    def test_registrar_horas_bulk(self):
+        otro_trabajo = Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, estado='En curso', usuario_id=self.user.id
+        )
+        fila = {'trabajo': self.trabajo.id, 'personal': self.personal.id, 'fecha': str(date.today())}
+        registros = [
+            dict(fila, hectareas=20, hora_inicio='08:00', hora_fin='12:30'),
+            dict(fila, hectareas=20, horas_trabajadas=2),
+            dict(fila, hectareas=10),  # 8 + 20 + 20 + 10 > 55.5
+            dict(fila, trabajo=otro_trabajo.id, hectareas=5, hora_inicio='22:00', hora_fin='01:00'),
+            dict(fila, trabajo=999999),
+            dict(fila, hectareas='abc'),
+        ]
+
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        # Lecturas, un INSERT y dos UPDATE por trabajo: no depende de la cantidad de filas
+        with self.assertNumQueries(10):
+            resp = self.client.post(self._url('trabajos/registrar-horas/bulk/'), registros, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.data['creados'], resp.data['rechazados']), (3, 3))
+        estados = [r['estado'] for r in resp.data['resultados']]
+        self.assertEqual(estados, ['creado', 'creado', 'rechazado', 'creado', 'rechazado', 'rechazado'])
+        self.assertEqual(resp.data['resultados'][0]['registro']['horas_trabajadas'], '4.50')
+        self.assertIn('detail', resp.data['resultados'][2]['errores'])
+        self.assertIn('trabajo', resp.data['resultados'][4]['errores'])
+        self.assertIn('hectareas', resp.data['resultados'][5]['errores'])
+
+        self.trabajo.refresh_from_db()
+        otro_trabajo.refresh_from_db()
+        self.personal.refresh_from_db()
+        self.assertEqual((self.trabajo.ha_realizadas, self.trabajo.horas_registradas), (Decimal('48'), Decimal('8.5')))
+        self.assertEqual(otro_trabajo.horas_registradas, Decimal('3'))
+        self.assertEqual(self.personal.horas_trabajadas, Decimal('11.5'))
+
+        # Sin RETURNING en INSERT múltiple (MySQL) las filas se insertan de a una y llevan su id
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            resp = self.client.post(
+                self._url('trabajos/registrar-horas/bulk/'),
+                [dict(fila, trabajo=otro_trabajo.id, horas_trabajadas=1)] * 2, format='json'
+            )
+        ids = [r['registro']['id'] for r in resp.data['resultados']]
+        self.assertNotIn(None, ids)
+        self.assertEqual(
+            TrabajoPersonal.objects.filter(pk__in=ids, trabajo=otro_trabajo).count(), 2
+        )
+        otro_trabajo.refresh_from_db()
+        self.assertEqual(otro_trabajo.horas_registradas, Decimal('5'))
+
+        resp = self.client.post(self._url('trabajos/registrar-horas/bulk/'), {'registros': [fila]}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        resp = self.client.post(self._url('trabajos/registrar-horas/bulk/'), {'registros': []}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_estadisticas_personal_y_maquinas(self):
+        def stats():
+            self.personal.refresh_from_db()
+            self.maquina.refresh_from_db()
+            return (
+                self.personal.superficie_total_ha, self.personal.horas_trabajadas,
+                self.personal.trabajos_completados, self.maquina.superficie_total_ha,
+                self.maquina.horas_trabajadas
+            )
+
+        self.assertEqual(stats(), (Decimal('8'), Decimal('2'), 0, Decimal('0'), Decimal('0')))
+        self.assertEqual(self.personal.ultimo_trabajo, 'Siembra - Campo Maestro')
+
+        self.trabajo.maquinas.add(self.maquina)
+        self.assertEqual(stats()[3:], (Decimal('8'), Decimal('2')))
+        self.assertEqual(self.maquina.ultimo_trabajo, 'Siembra - Campo Maestro')
+
+        # Los cambios de estadísticas mueven updated_at: el sync incremental los entrega
+        marca = timezone.now() - timedelta(days=1)
+        Personal.objects.filter(pk=self.personal.pk).update(updated_at=marca)
+        Maquina.objects.filter(pk=self.maquina.pk).update(updated_at=marca)
+        self.trabajo_personal.hectareas = 10
+        self.trabajo_personal.save()
+        self.personal.refresh_from_db()
+        self.maquina.refresh_from_db()
+        self.assertGreater(self.personal.updated_at, marca)
+        self.assertGreater(self.maquina.updated_at, marca)
+        extra = TrabajoPersonal.objects.create(
+            trabajo=self.trabajo, personal=self.personal, hectareas=5, horas_trabajadas=1,
+            usuario_id=self.user.id
+        )
+        self.assertEqual(stats(), (Decimal('15'), Decimal('3'), 0, Decimal('15'), Decimal('3')))
+
+        # Transición de estado: el trabajo cuenta una sola vez aunque tenga dos registros
+        self.trabajo.estado = 'Completado'
+        self.trabajo.save()
+        self.assertEqual(stats()[2], 1)
+        self.trabajo.estado = 'En curso'
+        self.trabajo.save()
+        self.assertEqual(stats()[2], 0)
+
+        extra.delete()
+        self.trabajo.maquinas.remove(self.maquina)
+        self.assertEqual(stats(), (Decimal('10'), Decimal('2'), 0, Decimal('0'), Decimal('0')))
+
+        Personal.objects.filter(pk=self.personal.pk).update(superficie_total_ha=0, ultimo_trabajo=None)
+        out = StringIO()
+        call_command('recompute_estadisticas', usuario_id=self.user.id, stdout=out)
+        self.assertIn('1 personal y 1 máquinas recalculados', out.getvalue())
+        self.assertEqual(stats()[0], Decimal('10'))
+        self.assertEqual(self.personal.ultimo_trabajo, 'Siembra - Campo Maestro')
+
+    def test_planes_de_consulta_sin_full_scans(self):
+        """EXPLAIN de las queries de los endpoints principales: ninguna tabla de tenant se recorre completa."""
+        if connection.vendor not in ('sqlite', 'mysql'):
+            self.skipTest(f'EXPLAIN sin soporte en el test para {connection.vendor}')
+        tablas_tenant = {
+            model._meta.db_table for model in (
+                Campo, Cliente, Maquina, Personal, Trabajo, TrabajoPersonal, Costo, Factura,
+                Pago, Movimiento, Mantenimiento, Insumo, Credito, ResumenFinancieroMensual
+            )
+        }
+        endpoints = [
+            'campos/', 'clientes/', 'maquinas/', 'personal/', 'trabajos/', 'costos/',
+            'costos/pagados/', 'costos/pendientes/', 'facturas/', 'pagos/', 'movimientos/',
+            'mantenimientos/', 'insumos/', 'dashboard/resumen/', 'dashboard/estadisticas/',
+            'reportes/trabajos/?periodo=2024-03', 'reportes/financiero/', 'reportes/series/',
+            'trabajos/calendario/', 'flutter/trabajos/lista/', 'flutter/facturas/lista/', 'mobile/sync/',
+        ]
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        cache.clear()
+        with CaptureQueriesContext(connection) as capturadas:
+            for path in endpoints:
+                self.assertEqual(self.client.get(self._url(path)).status_code, 200, path)
+
+        scans = []
+        with connection.cursor() as cursor:
+            for query in capturadas.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                for tabla in self._tablas_recorridas(cursor, query['sql']):
+                    if tabla in tablas_tenant:
+                        scans.append(f"{tabla} <- {query['sql'][:200]}")
+        self.assertEqual(scans, [])
+
+    @staticmethod
+    def _tablas_recorridas(cursor, sql):
+        """Tablas que el plan de `sql` recorre completas: SCAN en SQLite, access_type ALL en MySQL."""
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            pasos = [fila[-1].split() for fila in cursor.fetchall()]
+            return [paso[1] for paso in pasos if paso[0] == 'SCAN']
+        cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+        tablas = []
+        pendientes = [json.loads(cursor.fetchone()[0])]
+        while pendientes:
+            nodo = pendientes.pop()
+            if isinstance(nodo, list):
+                pendientes.extend(nodo)
+            elif isinstance(nodo, dict):
+                if nodo.get('access_type') == 'ALL':
+                    tablas.append(nodo.get('table_name'))
+                pendientes.extend(nodo.values())
+        return tablas
+
+    def test_reporte_trabajos_rango(self):
+        Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, fecha_inicio=date(2024, 3, 31),
+            estado='Completado', monto_cobrado=500, usuario_id=self.user.id
+        )
+        Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, fecha_inicio=date(2024, 4, 1),
+            estado='En curso', usuario_id=self.user.id
+        )
+
+        self.client.get(self._url('reportes/trabajos/'))  # sincroniza revocaciones de tokens
+        with self.assertNumQueries(3):
+            resp = self.client.get(self._url('reportes/trabajos/'), {'periodo': '2024-03'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['total_trabajos'], 1)
+        self.assertEqual(resp.data['trabajos_por_tipo'], {'Siembra': 1})
+        self.assertEqual(resp.data['trabajos_por_estado']['Completado'], 1)
+        self.assertEqual(resp.data['ingresos_totales'], Decimal('500'))
+
+        resp = self.client.get(self._url('reportes/trabajos/'), {'desde': '2024-03-31', 'hasta': '2024-04-01'})
+        self.assertEqual(resp.data['total_trabajos'], 2)
+        self.assertEqual(resp.data['superficie_total_ha'], Decimal('111'))
+
+        resp = self.client.get(self._url('reportes/trabajos/'), {'desde': '31/03/2024'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_calendario_trabajos(self):
+        cerrado = Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, fecha_inicio=date(2024, 2, 27),
+            fecha_fin=date(2024, 3, 2), estado='Completado', usuario_id=self.user.id
+        )
+        abierto = Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, campo=self.campo, fecha_inicio=date(2024, 3, 2),
+            estado='En curso', usuario_id=self.user.id
+        )
+        TrabajoPersonal.objects.create(trabajo=abierto, personal=self.personal, usuario_id=self.user.id)
+        TrabajoPersonal.objects.create(trabajo=abierto, personal=self.personal, usuario_id=self.user.id)
+        Trabajo.objects.create(fecha_inicio=date(2024, 1, 1), fecha_fin=date(2024, 2, 28), usuario_id=self.user.id)
+
+        self.client.get(self._url('campos/'))  # sincroniza revocaciones de tokens
+        with self.assertNumQueries(1):
+            resp = self.client.get(self._url('trabajos/calendario/'), {'desde': '2024-03-01', 'hasta': '2024-03-03'})
+        self.assertEqual(resp.status_code, 200)
+        dias = {str(d['fecha']): [t['id'] for t in d['trabajos']] for d in resp.data['dias']}
+        self.assertEqual(dias, {
+            '2024-03-01': [cerrado.id],
+            '2024-03-02': [cerrado.id, abierto.id],
+            '2024-03-03': [abierto.id],
+        })
+        fila = resp.data['dias'][-1]['trabajos'][0]
+        self.assertEqual(
+            (fila['campo'], fila['tipo'], fila['estado'], fila['personal']),
+            ('Campo Maestro', 'Siembra', 'En curso', 1)
+        )
+
+        resp = self.client.get(self._url('trabajos/calendario/'), {'desde': '2024-01-01', 'hasta': '2026-01-01'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_flutter_paginacion_por_cursor(self):
+        for i in range(5):
+            Costo.objects.create(monto=i, fecha=date.today(), usuario_id=self.user.id)
+        url = self._url('flutter/costos/lista/')
+        esperados = list(Costo.objects.filter(usuario_id=self.user.id).order_by('id').values_list('id', flat=True))
+
+        self.client.get(url, {'cursor': ''})  # sincroniza revocaciones de tokens
+        vistos, cursor, paginas = [], '', 0
+        while cursor is not None:
+            # Claves del orden y página (values_list, sin instanciar modelos)
+            with self.assertNumQueries(2):
+                resp = self.client.get(url, {'cursor': cursor, 'limit': 3})
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('total', resp.data['pagination'])
+            vistos += [c['id'] for c in resp.data['data']]
+            cursor = resp.data['pagination']['next_cursor']
+            paginas += 1
+        self.assertEqual(vistos, esperados)
+        self.assertEqual(paginas, 3)
+
+        # El contrato skip/limit sigue igual, ahora con orden estable
+        resp = self.client.get(url, {'skip': 3, 'limit': 3})
+        self.assertEqual([c['id'] for c in resp.data['data']], esperados[3:6])
+        self.assertEqual(resp.data['pagination']['total'], len(esperados))
+
+        resp = self.client.get(url, {'cursor': '', 'total': '1'})
+        self.assertEqual(resp.data['pagination']['total'], len(esperados))
+        self.assertEqual(self.client.get(url, {'cursor': 'no-es-un-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': '', 'orden': 'updated_at'}).status_code, 400)
+
+        url = self._url('flutter/trabajos/lista/')
+        nuevo = Trabajo.objects.create(estado='Pendiente', usuario_id=self.user.id)
+        primera = self.client.get(url, {'cursor': '', 'orden': 'updated_at', 'limit': 1})
+        self.assertEqual(primera.data['data'][0]['id'], self.trabajo.id)
+        segunda = self.client.get(url, {
+            'cursor': primera.data['pagination']['next_cursor'], 'orden': 'updated_at', 'limit': 1
+        })
+        self.assertEqual(segunda.data['data'][0]['id'], nuevo.id)
+        self.assertIsNone(segunda.data['pagination']['next_cursor'])
+        # Un cursor de otro orden se rechaza
+        otro = self.client.get(self._url('flutter/costos/lista/'), {'cursor': '', 'limit': 1})
+        resp = self.client.get(url, {'cursor': otro.data['pagination']['next_cursor'], 'orden': 'updated_at'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_mobile_sync_incremental(self):
+        url = self._url('mobile/sync/')
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        inicial = resp.data['data']
+        self.assertTrue(inicial['completo'])
+        self.assertEqual([t['id'] for t in inicial['trabajos']], [self.trabajo.id])
+
+        # Sin cambios: el delta solo trae lo tocado dentro del margen de solapamiento
+        with patch('api.services.sync_service.SYNC_SOLAPAMIENTO', timedelta(0)):
+            resp = self.client.get(url, {'since': inicial['sync_token']})
+            delta = resp.data['data']
+            self.assertFalse(delta['completo'])
+            self.assertEqual(
+                [len(delta[r]) for r in ('trabajos', 'campos', 'maquinas', 'personal', 'clientes')],
+                [0, 0, 0, 0, 0]
+            )
+
+            campo = Campo.objects.create(nombre='Lote Nuevo', usuario_id=self.user.id)
+            cliente_id = self.cliente.id
+            self.cliente.delete()
+            # Un cambio de máquinas del trabajo también lo vuelve a enviar
+            self.trabajo.maquinas.add(self.maquina)
+            resp = self.client.get(url, {'since': delta['sync_token']})
+            delta = resp.data['data']
+            self.assertEqual([c['id'] for c in delta['campos']], [campo.id])
+            self.assertEqual([t['id'] for t in delta['trabajos']], [self.trabajo.id])
+            self.assertEqual(delta['eliminados']['clientes'], [cliente_id])
+
+            # Renombrar un operario o el tipo reenvía los trabajos que copian esos datos
+            self.personal.nombre = 'Operario Renombrado'
+            self.personal.save()
+            resp = self.client.get(url, {'since': delta['sync_token']})
+            delta = resp.data['data']
+            self.assertEqual([t['id'] for t in delta['trabajos']], [self.trabajo.id])
+            self.assertIn('Operario Renombrado', [p['nombre'] for p in delta['trabajos'][0]['personal_detail']])
+            self.tipo_trabajo.trabajo = 'Cosecha'
+            self.tipo_trabajo.save()
+            resp = self.client.get(url, {'since': delta['sync_token']})
+            delta = resp.data['data']
+            self.assertEqual([t['tipo'] for t in delta['trabajos']], ['Cosecha'])
+            # Un guardado que no cambia esos datos no reenvía nada
+            self.personal.save()
+            resp = self.client.get(url, {'since': delta['sync_token']})
+            self.assertEqual(resp.data['data']['trabajos'], [])
+
+        resp = self.client.get(url, {'since': (timezone.now() - timedelta(days=365)).isoformat()})
+        self.assertTrue(resp.data['data']['completo'])
+        self.assertEqual(self.client.get(url, {'since': 'ayer'}).status_code, 400)
+
+    def test_reporte_series(self):
+        Movimiento.objects.create(monto=50, fecha=date(2024, 2, 10), es_cobro=True, usuario_id=self.user.id)
+        Movimiento.objects.create(monto=20, fecha=date(2024, 8, 5), es_cobro=False, usuario_id=self.user.id)
+        Movimiento.objects.create(monto=30, fecha=date(2023, 10, 2), es_cobro=True, usuario_id=self.user.id)
+        Movimiento.objects.create(monto=5, fecha=date(2024, 7, 30), es_cobro=False, usuario_id=self.user.id)
+        Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, fecha_inicio=date(2024, 8, 1),
+            estado='Completado', usuario_id=self.user.id
+        )
+
+        self.client.get(self._url('reportes/series/'))  # sincroniza revocaciones de tokens
+        with self.assertNumQueries(3):
+            resp = self.client.get(self._url('reportes/series/'), {'periodo': '2024', 'agrupacion': 'mes'})
+        self.assertEqual(resp.status_code, 200)
+        series = resp.data['series']
+        self.assertEqual(len(series), 12)
+        self.assertEqual(series[1]['periodo'], '2024-02')
+        self.assertEqual(series[1]['ingresos'], Decimal('50'))
+        self.assertEqual(series[7]['balance'], Decimal('-20'))
+        self.assertEqual(series[7]['trabajos_completados'], 1)
+
+        resp = self.client.get(self._url('reportes/series/'), {'periodo': '2024', 'agrupacion': 'campana'})
+        self.assertEqual([b['periodo'] for b in resp.data['series']], ['2023/2024', '2024/2025'])
+        # Los buckets de los bordes son campañas completas, no solo la parte dentro de 2024
+        self.assertEqual((resp.data['desde'], resp.data['hasta']), (date(2023, 7, 1), date(2025, 6, 30)))
+        self.assertEqual(resp.data['series'][0]['ingresos'], Decimal('80'))
+        self.assertEqual(resp.data['series'][1]['gastos'], Decimal('25'))
+
+        resp = self.client.get(self._url('reportes/series/'), {'desde': '2024-08-01', 'hasta': '2024-08-14', 'agrupacion': 'semana'})
+        self.assertEqual(resp.data['series'][0]['inicio'], date(2024, 7, 29))
+        self.assertEqual(resp.data['series'][0]['gastos'], Decimal('5'))
+        self.assertEqual(resp.data['series'][1]['gastos'], Decimal('20'))
+        self.assertEqual(resp.data['hasta'], date(2024, 8, 18))
+
+        # Un completado cuenta en su fecha_fin; la cuadrilla asignada (fecha NULL), en el inicio del trabajo
+        largo = Trabajo.objects.create(
+            id_tipo_trabajo=self.tipo_trabajo, fecha_inicio=date(2024, 4, 20), fecha_fin=date(2024, 5, 3),
+            estado='Completado', usuario_id=self.user.id
+        )
+        TrabajoPersonal.objects.create(trabajo=largo, personal=self.personal, hectareas=12, usuario_id=self.user.id)
+        resp = self.client.get(self._url('reportes/series/'), {'periodo': '2024', 'agrupacion': 'mes'})
+        series = resp.data['series']
+        self.assertEqual((series[3]['trabajos_completados'], series[4]['trabajos_completados']), (0, 1))
+        self.assertEqual(series[3]['hectareas_trabajadas'], Decimal('12'))
+
+        resp = self.client.get(self._url('reportes/series/'), {'agrupacion': 'hora'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_exportar_streaming(self):
+        Movimiento.objects.create(
+            monto=75, fecha=date(2024, 5, 2), categoria='Venta', descripcion='Soja, lote "B"',
+            es_cobro=True, usuario_id=self.user.id
+        )
+        resp = self.client.get(self._url('exportar/movimientos/'), {'categoria': 'Venta', 'periodo': '2024'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        lineas = b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lineas), 2)
+        self.assertTrue(lineas[0].startswith('ID,Fecha,Categoría'))
+        self.assertIn('"Soja, lote ""B"""', lineas[1])
+
+        # Texto que Excel tomaría como fórmula sale con apóstrofo; los montos negativos no se tocan
+        Movimiento.objects.create(
+            monto=-5, fecha=date(2024, 5, 3), categoria='Venta', descripcion='=HYPERLINK("http://x")',
+            destinatario='@SUMA(A1)', es_cobro=True, usuario_id=self.user.id
+        )
+        resp = self.client.get(self._url('exportar/movimientos/'), {'categoria': 'Venta', 'periodo': '2024'})
+        fila = next(csv.reader(b''.join(resp.streaming_content).decode('utf-8-sig').splitlines()[2:]))
+        self.assertEqual((fila[3], fila[4], fila[9]), ('\'=HYPERLINK("http://x")', '-5.00', "'@SUMA(A1)"))
+
+        Factura.objects.filter(usuario_id=self.user.id).update(observaciones='+1-1')
+        resp = self.client.get(self._url('exportar/facturas/'), {'formato': 'xlsx'})
+        self.assertEqual(resp.status_code, 200)
+        with zipfile.ZipFile(BytesIO(b''.join(resp.streaming_content))) as xlsx:
+            hoja = xlsx.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(hoja.count('<row>'), 2)
+        self.assertIn('F-0000', hoja)
+        self.assertIn("<t xml:space=\"preserve\">'+1-1</t>", hoja)
+
+        self.assertEqual(self.client.get(self._url('exportar/usuarios/')).status_code, 404)
+        self.assertEqual(self.client.get(self._url('exportar/pagos/'), {'formato': 'pdf'}).status_code, 400)
+
+    def test_resumen_financiero_incremental(self):
+        periodo = date.today().strftime('%Y-%m')
+
+        def fila(categoria):
+            return ResumenFinancieroMensual.objects.get(
+                usuario_id=self.user.id, periodo=periodo, es_cobro=False, categoria=categoria
+            )
+
+        mov = Movimiento.objects.create(
+            monto=40, fecha=date.today(), categoria='Compra', es_cobro=False, usuario_id=self.user.id
+        )
+        self.assertEqual((fila('Compra').total, fila('Compra').cantidad), (Decimal('150'), 2))
+
+        mov.categoria = 'Combustible'
+        mov.monto = 60
+        mov.save()
+        self.assertEqual((fila('Compra').total, fila('Compra').cantidad), (Decimal('110'), 1))
+        self.assertEqual(fila('Combustible').total, Decimal('60'))
+
+        resp = self.client.get(self._url('reportes/financiero/'), {'periodo': periodo})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['gastos']['total'], Decimal('170'))
+        self.assertEqual(resp.data['gastos']['por_categoria']['Combustible'], Decimal('60'))
+        self.assertEqual(resp.data['balance'], Decimal('50'))
+
+        mov.delete()
+        self.assertEqual(fila('Combustible').cantidad, 0)
+
+        esperado = {
+            (f.periodo, f.es_cobro, f.categoria): (f.total, f.cantidad)
+            for f in ResumenFinancieroMensual.objects.filter(usuario_id=self.user.id, cantidad__gt=0)
+        }
+        out = StringIO()
+        call_command('rebuild_resumen_financiero', stdout=out)
+        reconstruido = {
+            (f.periodo, f.es_cobro, f.categoria): (f.total, f.cantidad)
+            for f in ResumenFinancieroMensual.objects.filter(usuario_id=self.user.id)
+        }
+        self.assertEqual(reconstruido, esperado)
+
     def test_read_endpoints(self):
         cases = [
             ('auth/test/', {}),
@@ -478,6 +1356,101 @@ class GesAgroEndpointTestCase(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data.get('sincronizados', {}).get('trabajos'), 0)
 
+    def test_mobile_sync_upsert_idempotente(self):
+        url = self._url('mobile/sync/')
+        uuid_trabajo = str(uuid.uuid4())
+        uuid_mov = str(uuid.uuid4())
+        editado = timezone.now().isoformat()
+        payload = {
+            'trabajos': [{
+                'uuid': uuid_trabajo, 'updated_at': editado, 'campo': self.campo.id,
+                'id_tipo_trabajo': self.tipo_trabajo.id, 'estado': 'En curso', 'fecha_inicio': '2024-03-05'
+            }],
+            'movimientos': [
+                {'uuid': uuid_mov, 'updated_at': editado, 'monto': '120.50', 'fecha': '2024-03-05',
+                 'es_cobro': False, 'categoria': 'Combustible', 'id_trabajo_uuid': uuid_trabajo},
+                {'uuid': str(uuid.uuid4()), 'updated_at': editado, 'monto': 'mucho'},
+                {'uuid': str(uuid.uuid4()), 'updated_at': editado, 'id_trabajo': 999999},
+            ],
+        }
+        resp = self.client.post(url, payload, format='json')
+        self.assertEqual(resp.status_code, 200)
+        trabajo_id = resp.data['mapeo']['trabajos'][uuid_trabajo]
+        movimiento = Movimiento.objects.get(pk=resp.data['mapeo']['movimientos'][uuid_mov])
+        self.assertEqual(movimiento.id_trabajo_id, trabajo_id)
+        self.assertEqual(resp.data['sincronizados'], {'trabajos': 1, 'movimientos': 1})
+        self.assertEqual(sorted(e['indice'] for e in resp.data['errores']), [1, 2])
+        self.assertEqual(
+            ResumenFinancieroMensual.objects.get(usuario_id=self.user.id, periodo='2024-03', categoria='Combustible').total,
+            Decimal('120.50')
+        )
+
+        # Reintento del mismo lote: no duplica ni reescribe
+        resp = self.client.post(url, payload, format='json')
+        self.assertEqual(resp.data['mapeo']['trabajos'][uuid_trabajo], trabajo_id)
+        self.assertEqual(resp.data['sincronizados'], {'trabajos': 0, 'movimientos': 0})
+        self.assertEqual(Trabajo.objects.filter(client_uuid=uuid_trabajo).count(), 1)
+        self.assertEqual(Movimiento.objects.filter(usuario_id=self.user.id, categoria='Combustible').count(), 1)
+
+        # El servidor editó el trabajo después que el móvil: merge por campo
+        Trabajo.objects.filter(pk=trabajo_id).update(observaciones='Servidor', updated_at=timezone.now())
+        viejo = (timezone.now() - timedelta(hours=1)).isoformat()
+        resp = self.client.post(url, {'trabajos': [{
+            'uuid': uuid_trabajo, 'updated_at': viejo,
+            'observaciones': 'Móvil', 'estado': 'Completado',
+            'original': {'observaciones': None, 'estado': 'En curso'},
+        }]}, format='json')
+        self.assertEqual(resp.data['conflictos'], [
+            {'recurso': 'trabajos', 'uuid': uuid_trabajo, 'id': trabajo_id, 'servidor': {'observaciones': 'Servidor'}}
+        ])
+        trabajo = Trabajo.objects.get(pk=trabajo_id)
+        self.assertEqual((trabajo.observaciones, trabajo.estado), ('Servidor', 'Completado'))
+
+        # Dos reintentos concurrentes: el otro request insertó el registro después de
+        # nuestra lectura; el choque con la constraint se reintenta como update
+        uuid_carrera = str(uuid.uuid4())
+        Movimiento.objects.create(
+            monto=10, fecha=date(2024, 3, 6), categoria='Carrera', es_cobro=False,
+            usuario_id=self.user.id, client_uuid=uuid_carrera
+        )
+        lecturas = []
+
+        def existentes(model, *args):
+            if model is not Movimiento:
+                return _existentes(model, *args)
+            lecturas.append(args)
+            return [] if len(lecturas) == 1 else _existentes(model, *args)
+
+        with patch('api.services.sync_service._existentes', side_effect=existentes):
+            resp = self.client.post(url, {'movimientos': [{
+                'uuid': uuid_carrera, 'updated_at': timezone.now().isoformat(), 'monto': '10.00',
+                'fecha': '2024-03-06', 'es_cobro': False, 'categoria': 'Carrera'
+            }]}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(lecturas), 2)
+        self.assertEqual(Movimiento.objects.filter(client_uuid=uuid_carrera).count(), 1)
+        self.assertEqual(resp.data['sincronizados'], {'trabajos': 0, 'movimientos': 0})
+
+        # En MySQL la misma carrera suele llegar como deadlock (1213): también se reintenta
+        lecturas.clear()
+
+        def deadlock(model, *args):
+            if model is Movimiento:
+                lecturas.append(args)
+                if len(lecturas) == 1:
+                    raise OperationalError(1213, 'Deadlock found when trying to get lock')
+            return _existentes(model, *args)
+
+        with patch('api.services.sync_service._existentes', side_effect=deadlock), \
+                patch('api.services.sync_service._transaccion_propia', return_value=True):
+            resp = self.client.post(url, {'movimientos': [{
+                'uuid': str(uuid.uuid4()), 'updated_at': timezone.now().isoformat(), 'monto': '3.00',
+                'fecha': '2024-03-07', 'es_cobro': False, 'categoria': 'Carrera'
+            }]}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(lecturas), 2)
+        self.assertEqual(resp.data['sincronizados'], {'trabajos': 0, 'movimientos': 1})
+
     @patch('api.controllers.whatsapp_controller.process_with_openai')
     def test_whatsapp_webhook(self, mock_openai):
         mock_openai.return_value = (True, 'respuesta simulada')
@@ -14,12 +14,12 @@ from .controllers.maquinas_controller import MaquinaCreateAPIView, MaquinaUpdate
 from .apis.personal_api import get_personal, validate_dni
 from .controllers.personal_controller import PersonalCreateAPIView, PersonalUpdateAPIView, PersonalDestroyAPIView
 from .apis.trabajos_api import (
-    get_trabajos, get_trabajo_detalle,
+    get_trabajos, get_trabajo_detalle, get_calendario_trabajos,
     update_trabajo_personal, delete_trabajo_personal
 )
 from .controllers.trabajos_controller import (
     TrabajoCreateAPIView, TrabajoUpdateAPIView, 
-    TrabajoDestroyAPIView, RegistrarHorasView
+    TrabajoDestroyAPIView, RegistrarHorasView, RegistrarHorasBulkView
 )
 
 
@@ -54,7 +54,8 @@ from .apis.flutter_api import (
 from .apis.dashboard_api import (
     DashboardResumenView, DashboardEstadisticasView, FlutterDashboardResumenView
 )
-from .apis.reportes_api import ReporteTrabajosView, ReporteFinancieroView
+from .apis.exportaciones_api import exportar
+from .apis.reportes_api import ReporteTrabajosView, ReporteFinancieroView, ReporteSeriesView
 from .apis.mobile_api import MobileSyncView
 from .apis.whatsapp_api import whatsapp_webhook
 from .apis.weather_api import get_weather_forecast
@@ -124,6 +125,8 @@ urlpatterns = [
     # Trabajos
     path('trabajos/create/', TrabajoCreateAPIView.as_view(), name='trabajo-create'),
     path('trabajos/registrar-horas/', RegistrarHorasView.as_view(), name='trabajo-registrar-horas'),
+    path('trabajos/registrar-horas/bulk/', RegistrarHorasBulkView.as_view(), name='trabajo-registrar-horas-bulk'),
+    path('trabajos/calendario/', get_calendario_trabajos, name='trabajo-calendario'),
     path('trabajos/detalle/<int:pk>/', get_trabajo_detalle, name='trabajo-full-detail'),
     path('trabajos/', get_trabajos, name='trabajo-list'),
     path('trabajos/<int:pk>/', get_trabajos, name='trabajo-detail'),
@@ -216,6 +219,8 @@ urlpatterns = [
     path('dashboard/estadisticas/', DashboardEstadisticasView.as_view(), name='dashboard-estadisticas'),
     path('reportes/trabajos/', ReporteTrabajosView.as_view(), name='reporte-trabajos'),
     path('reportes/financiero/', ReporteFinancieroView.as_view(), name='reporte-financiero'),
+    path('reportes/series/', ReporteSeriesView.as_view(), name='reporte-series'),
+    path('exportar/<str:recurso>/', exportar, name='exportar'),
 
     # Endpoints Móviles
     path('mobile/sync/', MobileSyncView.as_view(), name='mobile-sync'),
@@ -1,27 +1,50 @@
 """
 Utilidades para el manejo de requests y autenticación.
 """
-from .services.auth_token_service import get_usuario_id_from_token
+from datetime import date, timedelta
 
 
 def get_usuario_id_from_request(request):
     """
-    Obtiene el usuario_id del request desde el access_token.
-    Busca el token en el header Authorization (Bearer token) o en query params.
+    Obtiene el usuario_id del request desde el principal que deja
+    AccessTokenAuthentication en request.user (el token se resuelve una sola vez).
     """
-    # Intentar desde header Authorization
-    auth_header = request.headers.get('Authorization', '')
-    if auth_header.startswith('Bearer '):
-        access_token = auth_header.replace('Bearer ', '').strip()
-        usuario_id = get_usuario_id_from_token(access_token)
-        if usuario_id:
-            return usuario_id
-    
-    # Fallback a query param (para compatibilidad)
-    access_token = request.query_params.get('access_token')
-    if access_token:
-        usuario_id = get_usuario_id_from_token(access_token)
-        if usuario_id:
-            return usuario_id
-    
-    return None
+    return getattr(getattr(request, 'user', None), 'usuario_id', None)
+
+
+def parse_rango_fechas(periodo=None, desde=None, hasta=None):
+    """
+    Convierte los filtros de período de los reportes en un rango semiabierto
+    [inicio, fin) de fechas, apto para `campo__gte=inicio, campo__lt=fin` (usa índices).
+
+    - `periodo`: 'YYYY', 'YYYY-MM' o 'YYYY-MM-DD'.
+    - `desde`/`hasta`: fechas 'YYYY-MM-DD', ambas inclusive; cualquiera puede omitirse.
+    Si se indica `desde` o `hasta` se ignora `periodo`. Lanza ValueError si el formato es inválido.
+    """
+    if desde or hasta:
+        inicio = date.fromisoformat(desde) if desde else None
+        fin = date.fromisoformat(hasta) + timedelta(days=1) if hasta else None
+        return inicio, fin
+
+    partes = [int(p) for p in periodo.split('-')]
+    if len(partes) == 1:
+        return date(partes[0], 1, 1), date(partes[0] + 1, 1, 1)
+    if len(partes) == 2:
+        year, month = partes
+        inicio = date(year, month, 1)
+        fin = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return inicio, fin
+    if len(partes) == 3:
+        inicio = date(*partes)
+        return inicio, inicio + timedelta(days=1)
+    raise ValueError(f'Período inválido: {periodo}')
+
+
+def filtro_rango_fechas(campo: str, inicio, fin) -> dict:
+    """kwargs de filter() para el rango semiabierto [inicio, fin) sobre `campo`."""
+    filtro = {}
+    if inicio is not None:
+        filtro[f'{campo}__gte'] = inicio
+    if fin is not None:
+        filtro[f'{campo}__lt'] = fin
+    return filtro
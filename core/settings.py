@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Comprime lo que devuelve el resto de la cadena (gzip/brotli, ver api/middleware.py)
+    'api.middleware.CompresionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -147,14 +149,81 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework configuration
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (),  # Sin autenticación por defecto
+    # Resuelve el access_token una vez por request y deja el tenant en request.user
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'api.authentication.AccessTokenAuthentication',
+    ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # Mismo JSON que JSONRenderer, serializado con orjson (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
 
+# Cache de resolución de tokens de acceso (segundos)
+AUTH_TOKEN_LOCAL_CACHE_TTL = int(os.getenv('AUTH_TOKEN_LOCAL_CACHE_TTL', '10'))  # LRU por proceso
+AUTH_TOKEN_LOCAL_CACHE_MAX_SIZE = 2048
+AUTH_TOKEN_SHARED_CACHE_TTL = int(os.getenv('AUTH_TOKEN_SHARED_CACHE_TTL', '300'))  # cache de Django, solo si es compartido
+
+# Formato de los tokens emitidos en el login: 'opaque' (fila en auth_tokens) o 'signed'
+# (HMAC, se valida sin base). 'signed' exige AUTH_TOKEN_SIGNING_KEY propia: con la clave
+# vacía, 'django-insecure-...' o igual a SECRET_KEY los tokens firmados se rechazan
+AUTH_TOKEN_FORMAT = os.getenv('AUTH_TOKEN_FORMAT', 'opaque')
+AUTH_TOKEN_SIGNING_KEY = os.getenv('AUTH_TOKEN_SIGNING_KEY', '')
+AUTH_TOKEN_REVOCATION_REFRESH = int(os.getenv('AUTH_TOKEN_REVOCATION_REFRESH', '5'))  # sync de revocaciones
+AUTH_TOKEN_REVOCATION_FULL_RELOAD = 300
+
+# Barrido de tokens expirados/inactivos (también: manage.py purge_auth_tokens)
+AUTH_TOKEN_PURGE_INTERVAL = 3600
+AUTH_TOKEN_PURGE_BATCH_SIZE = 1000
+
+
+# Cache de Django: versiones del cache de respuestas y tokens opacos resueltos.
+# Con varios procesos (workers de gunicorn/uwsgi) tiene que ser compartido: con
+# LocMemCache cada proceso guarda sus propias versiones y una escritura solo
+# invalida las respuestas del proceso que la atendió. REDIS_URL=redis://host:6379/0
+# usa Redis (paquete `redis`); sin él queda el cache local del proceso y los tokens
+# resueltos se cachean solo en el LRU de cada proceso (AUTH_TOKEN_LOCAL_CACHE_TTL).
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache de respuestas de lectura por tenant (api/response_cache.py)
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+# Con el cache local solo es correcto si hay un único proceso (runserver, tests):
+# sin cache compartido y sin esta opción el cache de respuestas queda apagado
+RESPONSE_CACHE_SINGLE_PROCESS = os.getenv('RESPONSE_CACHE_SINGLE_PROCESS', str(DEBUG)).lower() == 'true'
+
+# Compresión gzip/brotli de respuestas (api/middleware.py); por debajo del umbral no se comprime
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 5
+# Sin compresión (BREACH): devuelven tokens y reflejan datos del request
+RESPONSE_COMPRESSION_EXCLUDED_PATHS = ('/api/auth/',)
+
+
+# Sincronización incremental del móvil (api/services/sync_service.py)
+# Tombstones más viejos se purgan (manage.py purge_registros_eliminados); un since
+# anterior a la retención recibe el snapshot completo
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+SYNC_SOLAPAMIENTO_SEGUNDOS = 30
+
 
 # JWT configuration
 from datetime import timedelta